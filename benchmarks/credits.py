@@ -0,0 +1,236 @@
+"""Program guide credit counts: correlated subquery vs grouped page lookup
+
+Arguments:
+----------
+    $ python benchmarks/credits.py [options]
+
+Options:
+--------
+    --host         MariaDB host (default: localhost)
+    --port         MariaDB port (default: 3306)
+    --user         MariaDB user (default: mythtv)
+    --password     MariaDB password (default: mythtv)
+    --database     Scratch database, created if needed (default: mythme_bench)
+    --programs     Synthetic program rows (default: 500000)
+    --credits      Synthetic credits rows (default: 5000000)
+    --limit        Guide page size (default: 500)
+    --runs         Timed runs per plan, best is reported (default: 5)
+    --reload       Recreate the synthetic tables even if they're populated
+
+Never point --database at mythconverg: its channel, program and credits tables
+are dropped and refilled. Rows are generated with MariaDB's sequence engine.
+Prints EXPLAIN for both plans, then the best wall-clock time of each.
+"""
+
+import time
+import argparse
+import mariadb
+
+CHANNELS = 200
+
+SCHEMA = [
+    """CREATE TABLE channel (
+  chanid INT UNSIGNED NOT NULL PRIMARY KEY,
+  channum VARCHAR(10) NOT NULL,
+  callsign VARCHAR(20) NOT NULL,
+  name VARCHAR(64) NOT NULL,
+  icon VARCHAR(255) NOT NULL DEFAULT '',
+  visible TINYINT NOT NULL DEFAULT 1
+)""",
+    """CREATE TABLE program (
+  chanid INT UNSIGNED NOT NULL,
+  starttime DATETIME NOT NULL,
+  endtime DATETIME NOT NULL,
+  title VARCHAR(128) NOT NULL,
+  subtitle VARCHAR(128) NOT NULL DEFAULT '',
+  description TEXT NOT NULL,
+  category VARCHAR(64) NOT NULL DEFAULT '',
+  category_type VARCHAR(64) NOT NULL DEFAULT '',
+  airdate YEAR NOT NULL DEFAULT 0000,
+  stars FLOAT NOT NULL DEFAULT 0,
+  season SMALLINT NOT NULL DEFAULT 0,
+  episode SMALLINT NOT NULL DEFAULT 0,
+  originalairdate DATE DEFAULT NULL,
+  PRIMARY KEY (chanid, starttime),
+  KEY endtime (endtime),
+  KEY title (title)
+)""",
+    """CREATE TABLE credits (
+  person MEDIUMINT UNSIGNED NOT NULL,
+  chanid INT UNSIGNED NOT NULL,
+  starttime DATETIME NOT NULL,
+  role VARCHAR(20) NOT NULL,
+  priority TINYINT UNSIGNED NOT NULL DEFAULT 0,
+  UNIQUE KEY chanid (chanid, starttime, person, role),
+  KEY person (person, role)
+)""",
+]
+
+FIELDS = """channel.chanid, channel.channum, channel.callsign, channel.name, channel.icon,
+program.title, program.subtitle, program.starttime, program.endtime, program.description, program.category,
+program.category_type, CONVERT(program.airdate USING utf8) as year, program.stars, program.season,
+program.episode, program.originalairdate"""
+
+CORRELATED = """(SELECT COUNT(*) FROM credits
+WHERE credits.chanid = program.chanid AND credits.starttime = program.starttime) AS credits"""
+
+PAGE = """FROM channel, program
+WHERE channel.chanid = program.chanid AND channel.visible > 0
+AND program.endtime >= %s
+ORDER BY title asc, program.starttime asc, program.chanid asc
+LIMIT {limit}"""
+
+
+def populate(conn, programs: int, credits: int):
+    per_channel = programs // CHANNELS
+    with conn.cursor() as cursor:
+        for table in ["credits", "program", "channel"]:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        for ddl in SCHEMA:
+            cursor.execute(ddl)
+        cursor.execute(
+            f"""INSERT INTO channel (chanid, channum, callsign, name)
+SELECT 1000 + seq, seq, CONCAT('CH', seq), CONCAT('Channel ', seq) FROM seq_1_to_{CHANNELS}"""
+        )
+        # half-hour slots on every channel, starting a day ago
+        cursor.execute(
+            f"""INSERT INTO program (chanid, starttime, endtime, title, description, category_type, airdate)
+SELECT 1000 + c.seq,
+  NOW() - INTERVAL 1 DAY + INTERVAL (s.seq * 30) MINUTE,
+  NOW() - INTERVAL 1 DAY + INTERVAL (s.seq * 30 + 30) MINUTE,
+  CONCAT('Title ', (c.seq * 7919 + s.seq) % 20000), 'Synthetic program', 'movie', 1930 + s.seq % 90
+FROM seq_1_to_{CHANNELS} c, seq_0_to_{per_channel - 1} s"""
+        )
+        # ten credits per program on average, spread unevenly
+        cursor.execute(
+            f"""INSERT IGNORE INTO credits (person, chanid, starttime, role, priority)
+SELECT (p.rn * 31 + r.seq) % 100000, p.chanid, p.starttime, 'actor', r.seq
+FROM (SELECT chanid, starttime, ROW_NUMBER() OVER () AS rn FROM program) p, seq_1_to_20 r
+WHERE r.seq <= (p.rn % 21)
+LIMIT {credits}"""
+        )
+        cursor.execute("ANALYZE TABLE channel, program, credits")
+        cursor.fetchall()
+    conn.commit()
+
+
+def row_count(conn, table: str) -> int:
+    with conn.cursor() as cursor:
+        try:
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            return cursor.fetchone()[0]
+        except mariadb.ProgrammingError:
+            return 0
+
+
+def explain(conn, sql: str, params: list):
+    with conn.cursor(dictionary=True) as cursor:
+        cursor.execute(f"EXPLAIN {sql}", params)
+        for row in cursor.fetchall():
+            print(
+                f"  {row['id']:<3} {row['select_type']:<20} {row['table'] or '':<14} "
+                f"{row['type'] or '':<8} {row['key'] or '':<10} {row['rows'] or '':>9}  {row['Extra'] or ''}"
+            )
+
+
+def correlated_plan(conn, limit: int, cutoff: str) -> int:
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {FIELDS},\n{CORRELATED}\n{PAGE.format(limit=limit)}", [cutoff]
+        )
+        return len(cursor.fetchall())
+
+
+def grouped_plan(conn, limit: int, cutoff: str) -> int:
+    with conn.cursor(dictionary=True) as cursor:
+        cursor.execute(f"SELECT {FIELDS}\n{PAGE.format(limit=limit)}", [cutoff])
+        rows = cursor.fetchall()
+        params: list = []
+        for row in rows:
+            params += [row["chanid"], row["starttime"]]
+        cursor.execute(grouped_sql(len(rows)), params)
+        cursor.fetchall()
+        return len(rows)
+
+
+def grouped_sql(count: int) -> str:
+    pairs = ", ".join(["(%s, %s)"] * count)
+    return f"""SELECT chanid, starttime, COUNT(*) AS credits FROM credits
+WHERE (chanid, starttime) IN ({pairs})
+GROUP BY chanid, starttime"""
+
+
+def best_time(func, runs: int, *args) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        before = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - before)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="mythme credits query benchmark")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=3306)
+    parser.add_argument("--user", default="mythtv")
+    parser.add_argument("--password", default="mythtv")
+    parser.add_argument("--database", default="mythme_bench")
+    parser.add_argument("--programs", type=int, default=500000)
+    parser.add_argument("--credits", type=int, default=5000000)
+    parser.add_argument("--limit", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--reload", action="store_true")
+    args = parser.parse_args()
+
+    if args.database == "mythconverg":
+        parser.error("refusing to overwrite mythconverg tables")
+
+    conn = mariadb.connect(
+        host=args.host, port=args.port, user=args.user, password=args.password
+    )
+    with conn.cursor() as cursor:
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {args.database}")
+    conn.database = args.database
+
+    if args.reload or row_count(conn, "program") == 0:
+        print(f"Loading {args.programs} programs, up to {args.credits} credits...")
+        before = time.time()
+        populate(conn, args.programs, args.credits)
+        print(f"Loaded in {time.time() - before:.1f} seconds")
+    print(
+        f"program: {row_count(conn, 'program')} rows, credits: {row_count(conn, 'credits')} rows"
+    )
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT NOW()")
+        cutoff = str(cursor.fetchone()[0])
+
+    print("\nCorrelated subquery plan:")
+    explain(
+        conn,
+        f"SELECT {FIELDS},\n{CORRELATED}\n{PAGE.format(limit=args.limit)}",
+        [cutoff],
+    )
+    print("\nGrouped page lookup plan (page query, then credits):")
+    explain(conn, f"SELECT {FIELDS}\n{PAGE.format(limit=args.limit)}", [cutoff])
+    with conn.cursor(dictionary=True) as cursor:
+        cursor.execute(
+            f"SELECT chanid, starttime\n{PAGE.format(limit=args.limit)}", [cutoff]
+        )
+        keys = cursor.fetchall()
+    params: list = []
+    for key in keys:
+        params += [key["chanid"], key["starttime"]]
+    explain(conn, grouped_sql(len(keys)), params)
+
+    correlated = best_time(correlated_plan, args.runs, conn, args.limit, cutoff)
+    grouped = best_time(grouped_plan, args.runs, conn, args.limit, cutoff)
+    print(f"\nBest of {args.runs}, {args.limit} row page:")
+    print(f"  correlated subquery: {correlated:>9.1f} ms")
+    print(f"  grouped lookup:      {grouped:>9.1f} ms")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Concurrent load benchmark for a running mythme server
+
+Arguments:
+----------
+    $ python benchmarks/load.py [options]
+
+Options:
+--------
+    --base         Server base URL (default: http://127.0.0.1:8000)
+    --path         Request path, repeatable (default: guide page, recordings and channels)
+    --clients      Concurrent clients (default: 50)
+    --duration     Seconds to run (default: 30)
+
+Run once against a server started from the commit before a change and once after,
+then compare requests/sec and latency percentiles. Mixing a slow MythTV-backed path
+(/api/recorded) with guide queries (/api/programs) shows whether the slow calls
+starve the fast ones.
+"""
+
+import time
+import asyncio
+import argparse
+import statistics
+import httpx
+
+DEFAULT_PATHS = [
+    "/api/programs?type=movie&sort=start&limit=50",
+    "/api/recorded?limit=500",
+    "/api/channels",
+]
+
+
+async def client_loop(
+    client: httpx.AsyncClient,
+    paths: list[str],
+    offset: int,
+    until: float,
+    latencies: dict[str, list[float]],
+    errors: dict[str, int],
+):
+    i = offset
+    while time.monotonic() < until:
+        path = paths[i % len(paths)]
+        i += 1
+        before = time.perf_counter()
+        try:
+            response = await client.get(path)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            latencies[path].append((time.perf_counter() - before) * 1000)
+        else:
+            errors[path] += 1
+
+
+def percentile(values: list[float], pct: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0
+    return statistics.quantiles(values, n=100)[pct - 1]
+
+
+async def run(base: str, paths: list[str], clients: int, duration: float):
+    latencies: dict[str, list[float]] = {path: [] for path in paths}
+    errors: dict[str, int] = {path: 0 for path in paths}
+    limits = httpx.Limits(max_connections=clients)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=120) as client:
+        until = time.monotonic() + duration
+        await asyncio.gather(
+            *[
+                client_loop(client, paths, i, until, latencies, errors)
+                for i in range(clients)
+            ]
+        )
+
+    total = sum(len(lat) for lat in latencies.values())
+    print(f"{clients} clients, {duration:.0f} seconds")
+    print(f"{'path':<50} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+    for path in paths:
+        lat = latencies[path]
+        print(
+            f"{path[:50]:<50} {len(lat) / duration:>8.1f} {percentile(lat, 50):>8.1f} "
+            f"{percentile(lat, 95):>8.1f} {errors[path]:>7}"
+        )
+    print(f"{'total':<50} {total / duration:>8.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="mythme load benchmark")
+    parser.add_argument("--base", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", action="append", dest="paths")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30)
+    args = parser.parse_args()
+
+    asyncio.run(
+        run(args.base, args.paths or DEFAULT_PATHS, args.clients, args.duration)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Per-row cost of converting program rows to models, and of serializing them
+
+Arguments:
+----------
+    $ python benchmarks/rows.py [options]
+
+Options:
+--------
+    --rows         Rows per page (default: 10000)
+    --channels     Distinct channels among the rows (default: 100)
+    --runs         Timed runs, best is reported (default: 5)
+
+Rows are synthetic, shaped like ProgramData's SQL results. No database or MythTV
+queries are run, but importing mythme needs its usual config (see README).
+Compares three ways of building Program models:
+ - per row: Program, Channel and ChannelIcon validated for every row (as
+   ProgramData.to_program used to)
+ - construct: model_construct (no validation) with shared channels
+ - to_program: ProgramData.to_program (validated, with one Channel per chanid)
+"""
+
+import timeit
+import random
+import argparse
+from datetime import date, datetime, time, timedelta, timezone
+from mythme.data.programs import ProgramData
+from mythme.model.channel import Channel, ChannelIcon
+from mythme.model.program import Program, ProgramsResponse
+
+
+def make_rows(count: int, channels: int) -> list[dict]:
+    random.seed(1)
+    start = datetime(2025, 1, 1)
+    rows = []
+    for i in range(count):
+        chanid = 1000 + i % channels
+        starttime = start + timedelta(minutes=30 * (i // channels))
+        rows.append(
+            {
+                "chanid": chanid,
+                "channum": str(chanid - 1000),
+                "callsign": f"CH{chanid}",
+                "name": f"Channel {chanid}",
+                "icon": f"ch{chanid}_dark.png" if chanid % 3 else "",
+                "title": random.choice(["Dracula", "The Thing", "News at Six"]),
+                "subtitle": random.choice(["", "Part One"]),
+                "starttime": starttime,
+                "endtime": starttime + timedelta(minutes=30),
+                "description": "A synthetic program description " * 3,
+                "category": random.choice(["Horror", "News"]),
+                "category_type": random.choice(["movie", "series"]),
+                "year": random.choice(["1931", "1979", "0000"]),
+                "stars": random.choice([0.0, 0.5, 0.75]),
+                "season": random.choice([0, 3]),
+                "episode": random.choice([0, 12]),
+                "originalairdate": random.choice([None, date(1931, 2, 14)]),
+                "credits": random.randrange(20),
+            }
+        )
+    return rows
+
+
+def validated_program(row: dict) -> Program:
+    """Per-row validated models"""
+    channel = Channel(
+        id=row["chanid"],
+        number=row["channum"],
+        callsign=row["callsign"],
+        name=row["name"],
+    )
+    if row["icon"]:
+        channel.icon = ChannelIcon(file=row["icon"])
+        try:
+            channel.icon.shade = row["icon"].split("_")[1]
+        except IndexError:
+            pass
+    return Program(
+        channel=channel,
+        title=row["title"],
+        subtitle=row["subtitle"] or None,
+        start=row["starttime"].replace(tzinfo=timezone.utc),
+        end=row["endtime"].replace(tzinfo=timezone.utc),
+        description=row["description"] or None,
+        category=row["category"],
+        type=row["category_type"],
+        year=int(row["year"]) if row["year"] else None,
+        rating=row["stars"] * 5,
+        season=row["season"] or None,
+        episode=row["episode"] or None,
+        aired=row["originalairdate"] or None,
+        credits=row["credits"] or 0,
+    )
+
+
+def validated_page(rows: list[dict]) -> list[Program]:
+    return [validated_program(row) for row in rows]
+
+
+def constructed_page(rows: list[dict]) -> list[Program]:
+    program_data = ProgramData()
+    programs = []
+    for row in rows:
+        programs.append(
+            Program.model_construct(
+                channel=program_data.to_channel(row),
+                title=row["title"],
+                subtitle=row["subtitle"] or None,
+                start=row["starttime"].replace(tzinfo=timezone.utc),
+                end=row["endtime"].replace(tzinfo=timezone.utc),
+                description=row["description"] or None,
+                category=row["category"],
+                type=row["category_type"],
+                year=int(row["year"]) if row["year"] else None,
+                rating=row["stars"] * 5,
+                season=row["season"] or None,
+                episode=row["episode"] or None,
+                aired=datetime.combine(row["originalairdate"], time())
+                if row["originalairdate"]
+                else None,
+                credits=row["credits"] or 0,
+            )
+        )
+    return programs
+
+
+def to_program_page(rows: list[dict]) -> list[Program]:
+    program_data = ProgramData()  # channels are shared within a page
+    return [program_data.to_program(row) for row in rows]
+
+
+def best_time(func, runs: int, *args) -> float:
+    return min(timeit.repeat(lambda: func(*args), number=1, repeat=runs))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="mythme row conversion benchmark")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--channels", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.channels)
+
+    def dump(programs: list[Program]) -> str:
+        response = ProgramsResponse(programs=programs, total=len(programs))
+        return response.model_dump_json(exclude_none=True)
+
+    results = []
+    expected = None
+    for name, convert in [
+        ("per row", validated_page),
+        ("construct", constructed_page),
+        ("to_program", to_program_page),
+    ]:
+        programs = convert(rows)
+        serialized = dump(programs)
+        if expected is not None and serialized != expected:
+            raise SystemExit(f"{name} models serialize differently")
+        expected = serialized
+        results.append(
+            (
+                name,
+                best_time(convert, args.runs, rows),
+                best_time(dump, args.runs, programs),
+            )
+        )
+
+    print(f"{args.rows} rows, {args.channels} channels, best of {args.runs}")
+    print(f"{'':<12} {'convert':>12} {'serialize':>12} {'total':>12}")
+    for name, convert, serialize in results:
+        print(
+            f"{name:<12} {convert / args.rows * 1e6:>9.2f} us "
+            f"{serialize / args.rows * 1e6:>9.2f} us "
+            f"{(convert + serialize) * 1000:>9.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Video streaming throughput benchmark for a running mythme server
+
+Arguments:
+----------
+    $ python benchmarks/stream.py --path /api/media/videos/<file> [options]
+
+Options:
+--------
+    --base         Server base URL (default: http://127.0.0.1:8000)
+    --path         Video path to stream (required)
+    --streams      Concurrent streams (default: 4)
+    --duration     Seconds to run (default: 20)
+    --range        Request 8 MiB ranges at random offsets instead of whole files
+    --pid          mythme server process id, to report its CPU usage (Linux only)
+
+Each stream downloads the file repeatedly, discarding the content. Run once against
+the commit before a change and once after, with the file in page cache, and compare
+MB/s per stream and server CPU seconds per GB sent.
+"""
+
+import os
+import time
+import random
+import asyncio
+import argparse
+import httpx
+
+RANGE_SIZE = 8 * 1024 * 1024
+
+
+def cpu_seconds(pid: int) -> float:
+    """utime + stime of a process, from /proc"""
+    with open(f"/proc/{pid}/stat", "r") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def stream_loop(
+    client: httpx.AsyncClient,
+    path: str,
+    size: int,
+    ranges: bool,
+    until: float,
+    received: list[int],
+    index: int,
+):
+    while time.monotonic() < until:
+        headers = {}
+        if ranges and size > RANGE_SIZE:
+            start = random.randrange(0, size - RANGE_SIZE)
+            headers["Range"] = f"bytes={start}-{start + RANGE_SIZE - 1}"
+        async with client.stream("GET", path, headers=headers) as response:
+            if response.status_code >= 400:
+                raise RuntimeError(f"{path}: HTTP {response.status_code}")
+            async for chunk in response.aiter_raw():
+                received[index] += len(chunk)
+                if time.monotonic() >= until:
+                    break
+
+
+async def run(
+    base: str, path: str, streams: int, duration: float, ranges: bool, pid: int
+):
+    async with httpx.AsyncClient(base_url=base, timeout=120) as client:
+        head = await client.get(path, headers={"Range": "bytes=0-0"})
+        size = int(head.headers["content-range"].split("/")[1])
+
+        received = [0] * streams
+        cpu_before = cpu_seconds(pid) if pid else 0
+        before = time.monotonic()
+        until = before + duration
+        await asyncio.gather(
+            *[
+                stream_loop(client, path, size, ranges, until, received, i)
+                for i in range(streams)
+            ]
+        )
+        elapsed = time.monotonic() - before
+        cpu = cpu_seconds(pid) - cpu_before if pid else 0
+
+    total_mb = sum(received) / 1024 / 1024
+    print(
+        f"{streams} streams, {elapsed:.0f} seconds, {'ranges' if ranges else 'full file'}"
+    )
+    print(f"total:      {total_mb / elapsed:>9.1f} MB/s")
+    print(f"per stream: {total_mb / elapsed / streams:>9.1f} MB/s")
+    if pid:
+        print(
+            f"server cpu: {cpu / elapsed * 100:>9.1f} % ({cpu / (total_mb / 1024):.2f} s/GB)"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="mythme streaming benchmark")
+    parser.add_argument("--base", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", required=True)
+    parser.add_argument("--streams", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--range", action="store_true", dest="ranges")
+    parser.add_argument("--pid", type=int, default=0)
+    args = parser.parse_args()
+
+    asyncio.run(
+        run(args.base, args.path, args.streams, args.duration, args.ranges, args.pid)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
-from fastapi import APIRouter
-from mythme.data.channels import ChannelData
+from fastapi import APIRouter, Request, Response
+from mythme.data.channels import AsyncChannelData
 from mythme.model.program import Channel
+from mythme.utils.cache import response_cache
 
 router = APIRouter()
 
 
-@router.get("/channels")
-def get_channels() -> list[Channel]:
-    return ChannelData().get_channels()
+@router.get("/channels", response_model=list[Channel])
+async def get_channels(request: Request) -> Response:
+    return await response_cache.respond(
+        request, "guide:channels", AsyncChannelData().get_channels
+    )
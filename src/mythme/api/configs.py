@@ -1,12 +1,17 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from mythme.model.config import MythtvConfig
+from mythme.utils.cache import response_cache
 from mythme.utils.config import config
 
 router = APIRouter()
 
 
-@router.get("/configs/{cfg}")
-def get_config(cfg: str) -> MythtvConfig:
+@router.get("/configs/{cfg}", response_model=MythtvConfig)
+async def get_config(cfg: str, request: Request) -> Response:
     if not cfg == "mythtv":
         raise ValueError(f"Unsupported config: {cfg}")
+    return await response_cache.respond(request, "config:mythtv", get_mythtv_config)
+
+
+async def get_mythtv_config() -> MythtvConfig:
     return config.mythtv
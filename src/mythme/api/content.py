@@ -1,86 +1,116 @@
-import os
-from fastapi import APIRouter, Header, HTTPException, status
-from fastapi.responses import StreamingResponse
-from httpx import AsyncClient
+from urllib.parse import quote
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from typing_extensions import Optional
 from mythme.utils.config import config
+from mythme.utils.ffmpeg import FfmpegError
 from mythme.utils.log import logger
-from mythme.utils.media import (
-    get_range,
-    media_file_path,
-    send_bytes_range_requests,
-    video_media_type,
-)
+from mythme.utils.mythtv import api_url, async_client
+from mythme.utils.media import VideoFileResponse, media_file_path, video_media_type
+from mythme.utils.remux import remuxer
 
 router = APIRouter()
 
+PROXIED_HEADERS = [
+    "content-length",
+    "content-range",
+    "content-encoding",
+    "accept-ranges",
+    "last-modified",
+    "etag",
+]
 
-@router.get("/files/{path:path}")
-async def receive_file(path: str, group: str, download: Optional[str] = None):
-    async def stream_response():
-        async with AsyncClient() as client:
-            async with client.stream(
-                "GET",
-                f"{config.mythtv.api_base}/Content/GetFile?FileName={path}&StorageGroup={group}",
-            ) as response:
-                if response.status_code != 200:
-                    response_text = await response.aread()
-                    logger.error(
-                        f"MythTV file request failed ({response.status_code}): {response_text.decode()}"
-                    )
-                    raise HTTPException(
-                        status_code=response.status_code, detail=response_text.decode()
-                    )
-                async for chunk in response.aiter_bytes():
-                    if chunk:
-                        yield chunk
 
+@router.get("/files/{path:path}")
+async def receive_file(
+    path: str, group: str, request: Request, download: Optional[str] = None
+):
+    """Served from the storage group dir if mounted locally, else proxied from MythTV."""
     headers = {}
     if download:
         headers = {"content-disposition": f"attachment; filename={download}"}
+
+    file_path = await run_in_threadpool(media_file_path, group, path)
+    if file_path:
+        return VideoFileResponse(
+            file_path,
+            "application/octet-stream",
+            int(config.media.chunk_kb * 1024),
+            headers,
+        )
+
+    url = api_url(
+        "Content/GetFile", {"FileName": quote(path), "StorageGroup": quote(group)}
+    )
+    upstream_headers = {
+        name: request.headers[name]
+        for name in ["range", "if-range"]
+        if name in request.headers
+    }
+    response = await async_client.stream(url, upstream_headers)
+    if response.status_code not in [200, 206]:
+        response_text = (await response.aread()).decode(errors="replace")
+        await response.aclose()
+        logger.error(
+            f"MythTV file request failed ({response.status_code}): {response_text}"
+        )
+        raise HTTPException(status_code=response.status_code, detail=response_text)
+
+    for name in PROXIED_HEADERS:
+        if name in response.headers:
+            headers[name] = response.headers[name]
     return StreamingResponse(
-        stream_response(),
-        status_code=200,
+        response.aiter_raw(),
+        status_code=response.status_code,
         media_type="application/octet-stream",
         headers=headers,
+        background=BackgroundTask(response.aclose),
     )
 
 
 @router.get("/media/videos/{path:path}")
-async def stream_video(path: str, range: str = Header(None)):
-    """Browser cannot play video/mp2t (ts) streams."""
-    video_path = media_file_path("Videos", path)
+async def stream_video(path: str):
+    """Browser cannot play video/mp2t (ts) streams: use /media/hls for those."""
+    video_path = await run_in_threadpool(media_file_path, "Videos", path)
     if not video_path:
         raise HTTPException(status_code=404, detail=f"Video not found: {path}")
     media_type = video_media_type(path)
     if not media_type:
         raise HTTPException(status_code=400, detail=f"Unknown media type: {path}")
 
-    file_size = os.path.getsize(video_path)
+    return VideoFileResponse(video_path, media_type, int(config.media.chunk_kb * 1024))
 
-    headers = {
-        "content-type": media_type,
-        "accept-ranges": "bytes",
-        "content-encoding": "identity",
-        "content-length": str(file_size),
-        "access-control-expose-headers": (
-            "content-type, accept-ranges, content-length, "
-            "content-range, content-encoding"
-        ),
-    }
-    start = 0
-    end = file_size - 1
-    status_code = status.HTTP_200_OK
-
-    if range is not None:
-        start, end = get_range(range, file_size)
-        size = end - start + 1
-        headers["content-length"] = str(size)
-        headers["content-range"] = f"bytes {start}-{end}/{file_size}"
-        status_code = status.HTTP_206_PARTIAL_CONTENT
 
-    return StreamingResponse(
-        send_bytes_range_requests(str(video_path), start, end, 1024 * 1024),
-        headers=headers,
-        status_code=status_code,
+@router.get("/media/hls/{path:path}/index.m3u8")
+async def hls_playlist(path: str, group: str = "Videos"):
+    """HLS playlist for a video or recording (eg: group=Default), remuxed on demand."""
+    file_path = await run_in_threadpool(media_file_path, group, path)
+    if not file_path:
+        raise HTTPException(status_code=404, detail=f"File not found: {path}")
+    try:
+        playlist = await remuxer.playlist(file_path, f"?group={quote(group)}")
+    except FfmpegError as ex:
+        raise HTTPException(status_code=500, detail=f"Cannot read {path}: {ex}")
+    return Response(
+        playlist,
+        media_type="application/vnd.apple.mpegurl",
+        headers={"Cache-Control": "no-cache"},
     )
+
+
+@router.get("/media/hls/{path:path}/{index}.ts")
+async def hls_segment(path: str, index: int, group: str = "Videos"):
+    file_path = await run_in_threadpool(media_file_path, group, path)
+    if not file_path:
+        raise HTTPException(status_code=404, detail=f"File not found: {path}")
+    try:
+        segment = await remuxer.segment(file_path, index)
+    except FfmpegError as ex:
+        raise HTTPException(
+            status_code=500, detail=f"Cannot remux segment {index} of {path}: {ex}"
+        )
+    if not segment:
+        raise HTTPException(status_code=404, detail=f"Segment not found: {index}")
+    return FileResponse(segment, media_type="video/mp2t")
@@ -1,11 +1,11 @@
 from datetime import datetime
 from fastapi import APIRouter
 from mythme.model.credit import Credit
-from mythme.data.credits import CreditsData
+from mythme.data.credits import AsyncCreditsData
 
 router = APIRouter()
 
 
 @router.get("/credits")
-def get_credits(channel_id: int, start: datetime) -> list[Credit]:
-    return CreditsData().get_credits(channel_id, start)
+async def get_credits(channel_id: int, start: datetime) -> list[Credit]:
+    return await AsyncCreditsData().get_credits(channel_id, start)
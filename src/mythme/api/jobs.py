@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException
+from mythme.model.job import Job, JobsResponse
+from mythme.utils.jobs import JobNotCancellable, job_queue
+
+router = APIRouter()
+
+
+@router.get("/jobs", response_model_exclude_none=True)
+async def get_jobs() -> JobsResponse:
+    return JobsResponse(jobs=job_queue.get_jobs())
+
+
+@router.get("/jobs/{id}", response_model_exclude_none=True)
+async def get_job(id: str) -> Job:
+    job = job_queue.get(id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {id}")
+    return job
+
+
+@router.delete("/jobs/{id}", response_model_exclude_none=True)
+async def cancel_job(id: str) -> Job:
+    """Cancels a queued job, or a running one that's cancellable (finished jobs are
+    returned as is). Its status changes to cancelled once it has stopped."""
+    try:
+        job = job_queue.cancel(id)
+    except JobNotCancellable as ex:
+        raise HTTPException(status_code=409, detail=str(ex))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {id}")
+    return job
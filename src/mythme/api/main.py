@@ -1,13 +1,24 @@
+import base64
 import platform
 import asyncio
 from contextlib import asynccontextmanager
-from starlette.responses import RedirectResponse
+from starlette.exceptions import HTTPException
+from starlette.responses import RedirectResponse, Response
+from starlette.types import Scope
 from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from mythme.data.recordings import RecordingsData
 from mythme.data.channels import ChannelData
+from mythme.data.guide import guide
+from mythme.data.watcher import VideoWatcher
+from mythme.utils.compression import CompressionMiddleware, PrecompressedFiles
+from mythme.utils.config import config
+from mythme.utils.db import pool
+from mythme.utils.jobs import job_queue
 from mythme.utils.log import logger
+from mythme.utils.mythtv import async_client
+from mythme.utils.thumbnails import thumbnailer
 from mythme.api import channels
 from mythme.api import programs
 from mythme.api import queries
@@ -16,11 +27,37 @@ from mythme.api import credits
 from mythme.api import videos
 from mythme.api import content
 from mythme.api import configs
+from mythme.api import metrics
+from mythme.api import thumbnails
+from mythme.api import jobs
 
 logger.info(f"Python: {platform.python_version()}")
 
+PLACEHOLDER_ICON = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+"""Transparent 1x1 png"""
+
+
+class IconFiles(StaticFiles):
+    """Serves a placeholder for icons that haven't been fetched yet."""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        try:
+            return await super().get_response(path, scope)
+        except HTTPException as ex:
+            if ex.status_code != 404:
+                raise
+            return Response(
+                PLACEHOLDER_ICON,
+                media_type="image/png",
+                headers={"Cache-Control": "no-store"},
+            )
+
+
 recording_data = RecordingsData()
 channels_data = ChannelData()
+video_watcher = VideoWatcher()
 
 
 async def periodic_reload(after: int = 600):
@@ -32,12 +69,30 @@ async def periodic_reload(after: int = 600):
         recording_data.load_scheduled()
 
 
+def log_icons_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception():
+        logger.error(f"Loading channel icons failed: {task.exception()}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    pool.open()
     recording_data.load_scheduled()
-    channels_data.load_icons()
+    icons_task = asyncio.create_task(channels_data.load_icons())
+    icons_task.add_done_callback(log_icons_failure)
     asyncio.create_task(periodic_reload())
+    if config.videos.watch:
+        video_watcher.start()
+    guide.start()
+    job_queue.load()
     yield
+    icons_task.cancel()
+    thumbnailer.stop()
+    await guide.stop()
+    await video_watcher.stop()
+    await job_queue.stop()
+    await async_client.aclose()
+    pool.close()
 
 
 router = APIRouter(prefix="/api")
@@ -50,6 +105,9 @@ router.include_router(credits.router)
 router.include_router(videos.router)
 router.include_router(content.router)
 router.include_router(configs.router)
+router.include_router(metrics.router)
+router.include_router(thumbnails.router)
+router.include_router(jobs.router)
 
 
 app = FastAPI(lifespan=lifespan)
@@ -61,15 +119,26 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if config.compression.enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=config.compression.minimum_size,
+        gzip_level=config.compression.gzip_level,
+        brotli_quality=config.compression.brotli_quality,
+    )
+    ui_files: StaticFiles = PrecompressedFiles(
+        cache_dir=f"{config.mythme_dir}/ui-cache",
+        minimum_size=config.compression.minimum_size,
+        packages=[("mythme", "ui")],
+        html=True,
+    )
+else:
+    ui_files = StaticFiles(packages=[("mythme", "ui")], html=True)
 app.include_router(router)
-app.mount(
-    "/mythme",
-    StaticFiles(packages=[("mythme", "ui")], html=True),
-    name="ui",
-)
+app.mount("/mythme", ui_files, name="ui")
 app.mount(
     "/icons",
-    StaticFiles(directory=f"{channels_data.icons_dir}", html=False),
+    IconFiles(directory=f"{channels_data.icons_dir}", html=False),
     name="icons",
 )
 
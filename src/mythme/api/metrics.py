@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from mythme.data.programs import count_cache
+from mythme.model.metrics import MetricsResponse
+from mythme.utils.db import pool
+from mythme.utils.mythtv import api_cache, api_stats
+from mythme.utils.remux import segment_cache
+from mythme.utils.thumbnails import thumbnailer
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+def get_metrics() -> MetricsResponse:
+    return MetricsResponse(
+        database=pool.metrics(),
+        mythtv=api_stats.metrics(),
+        mythtv_cache=api_cache.metrics(),
+        program_counts=count_cache.metrics(),
+        segments=segment_cache.metrics(),
+        thumbnails=thumbnailer.cache.metrics(),
+    )
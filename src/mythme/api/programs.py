@@ -1,37 +1,76 @@
-from fastapi import APIRouter, Request
-from mythme.model.program import ProgramsResponse
-from mythme.data.programs import ProgramData
+from fastapi import APIRouter, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from mythme.model.program import Program, ProgramsResponse
+from mythme.data.guide import guide
+from mythme.data.programs import AsyncProgramData, ProgramData
 from mythme.data.recordings import RecordingsData
 from mythme.query.queries import parse_params
+from mythme.utils.cache import response_cache
+from mythme.utils.streaming import stream_format, stream_list
 
 router = APIRouter()
 
-recordings_data = RecordingsData()
 
-
-@router.get("/programs", response_model_exclude_none=True)
-def get_programs(request: Request) -> ProgramsResponse:
+@router.get(
+    "/programs", response_model=ProgramsResponse, response_model_exclude_none=True
+)
+async def get_programs(request: Request) -> ProgramsResponse | StreamingResponse:
+    """Streamed as rows are converted with stream=true or Accept: application/x-ndjson"""
     query = parse_params(dict(request.query_params))
+    page = None
+    snapshot = guide.snapshot
+    if snapshot and not query.debug:
+        page = await run_in_threadpool(snapshot.get_page, query)
+    if page is None:
+        page = await AsyncProgramData().get_page(query)
+
     program_data = ProgramData()
-    programs_response = program_data.get_programs(query)
-    for program in programs_response.programs:
+    scheduled = RecordingsData.scheduled
+
+    def to_program(row: dict) -> Program:
+        program = program_data.to_program(row)
         if program.year == 0:
             program.year = None
-        program.recording = recordings_data.find_scheduled_recording(
-            program.channel.id, program.start
+        program.recording = scheduled.find(program.channel.id, program.start)
+        return program
+
+    format = stream_format(request)
+    if format:
+        return stream_list(
+            format,
+            "programs",
+            (to_program(row) for row in page.rows),
+            total=page.total,
+            cursor=page.cursor,
+            query=page.query,
         )
 
-    return programs_response
+    def to_response() -> ProgramsResponse:
+        return ProgramsResponse(
+            programs=[to_program(row) for row in page.rows],
+            total=page.total,
+            cursor=page.cursor,
+            query=page.query,
+        )
+
+    return await run_in_threadpool(to_response)
+
+
+@router.get("/programs/categories", response_model=list[str])
+async def get_categories(request: Request) -> Response:
+    return await response_cache.respond(request, "guide:categories", load_categories)
 
 
-@router.get("/programs/categories")
-def get_categories() -> list[str]:
-    categories = ProgramData().get_categories()
+async def load_categories() -> list[str]:
+    categories = await AsyncProgramData().get_categories()
     if len(categories) > 0 and categories[0] == "":
         categories.pop(0)
     return categories
 
 
-@router.get("/programs/genres")
-def get_genres() -> list[str]:
-    return ProgramData().get_genres()
+@router.get("/programs/genres", response_model=list[str])
+async def get_genres(request: Request) -> Response:
+    return await response_cache.respond(
+        request, "guide:genres", AsyncProgramData().get_genres
+    )
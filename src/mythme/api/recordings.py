@@ -1,32 +1,45 @@
 from datetime import datetime
 from fastapi import APIRouter, Request, HTTPException
-from mythme.data.recordings import RecordingsData
+from fastapi.responses import StreamingResponse
+from mythme.data.recordings import AsyncRecordingsData, RecordingsData
 from mythme.model.recording import Recording, RecordingsResponse
 from mythme.model.scheduled import RecordingRequest, ScheduledRecording, recording_types
 from mythme.query.queries import parse_params
-from mythme.utils.mythtv import api_call
+from mythme.utils.mythtv import api_call_async
 from mythme.utils.log import logger
+from mythme.utils.streaming import stream_format, stream_list
 
 router = APIRouter()
 
 
-@router.get("/recorded", response_model_exclude_none=True)
-def get_recordings(request: Request) -> RecordingsResponse:
+@router.get(
+    "/recorded", response_model=RecordingsResponse, response_model_exclude_none=True
+)
+async def get_recordings(request: Request) -> RecordingsResponse | StreamingResponse:
     query = parse_params(dict(request.query_params))
-    return RecordingsData().get_recordings(query)
+    recordings_response = await AsyncRecordingsData().get_recordings(query)
+    format = stream_format(request)
+    if format:
+        return stream_list(
+            format,
+            "recordings",
+            recordings_response.recordings,
+            total=recordings_response.total,
+        )
+    return recordings_response
 
 
 @router.get("/recorded/{recid}", response_model_exclude_none=True)
-def get_recording(recid: int) -> Recording:
-    recording = RecordingsData().get_recording(recid)
+async def get_recording(recid: int) -> Recording:
+    recording = await AsyncRecordingsData().get_recording(recid)
     if recording is None:
         raise HTTPException(status_code=404, detail=f"Recording not found: {recid}")
     return recording
 
 
 @router.delete("/recorded/{recid}", response_model_exclude_none=True)
-def delete_recording(recid: int):
-    res = RecordingsData().delete_recording(recid)
+async def delete_recording(recid: int):
+    res = await AsyncRecordingsData().delete_recording(recid)
     if res:
         return {"message": f"Deleted recid: {recid}"}
     else:
@@ -34,14 +47,14 @@ def delete_recording(recid: int):
 
 
 @router.put("/recordings")
-def schedule_recording(recording: RecordingRequest) -> ScheduledRecording:
+async def schedule_recording(recording: RecordingRequest) -> ScheduledRecording:
     rec_type = recording_types[recording.type]
     if not rec_type:
         logger.error(f"Invalid recording type: {recording.type}")
         raise HTTPException(status_code=400, detail="Invalid recording type")
 
     logger.info(f"Getting recording schedule: {recording}")
-    result = api_call(
+    result = await api_call_async(
         "Dvr/GetRecordSchedule",
         params={
             "ChanId": f"{recording.channel_id}",
@@ -55,7 +68,7 @@ def schedule_recording(recording: RecordingRequest) -> ScheduledRecording:
     rule = result["RecRule"]
 
     logger.info(f"Scheduling recording: {recording}")
-    result = api_call(
+    result = await api_call_async(
         "Dvr/AddRecordSchedule",
         method="POST",
         params={
@@ -87,9 +100,9 @@ def schedule_recording(recording: RecordingRequest) -> ScheduledRecording:
 
 
 @router.delete("/recordings/{id}")
-def unschedule_recording(id: int):
+async def unschedule_recording(id: int):
     logger.info(f"Unscheduling recording: {id}")
-    result = api_call(
+    result = await api_call_async(
         "Dvr/RemoveRecordSchedule", method="POST", params={"RecordId": f"{id}"}
     )
     if not result:
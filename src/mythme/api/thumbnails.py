@@ -0,0 +1,84 @@
+from pathlib import Path
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from mythme.data.recordings import AsyncRecordingsData, RecordingsData
+from mythme.utils.ffmpeg import FfmpegError
+from mythme.utils.media import media_file_path
+from mythme.utils.thumbnails import thumbnailer
+
+router = APIRouter()
+
+CACHE_CONTROL = "max-age=3600"
+
+
+async def recording_path(recid: int) -> Path:
+    recording = await AsyncRecordingsData().get_recording(recid)
+    if recording is None:
+        raise HTTPException(status_code=404, detail=f"Recording not found: {recid}")
+    file = await run_in_threadpool(RecordingsData().get_recording_file, recording)
+    if not file:
+        raise HTTPException(
+            status_code=404, detail=f"Recording file not found: {recid}"
+        )
+    return Path(file)
+
+
+async def file_path(group: str, path: str) -> Path:
+    resolved = await run_in_threadpool(media_file_path, group, path)
+    if not resolved:
+        raise HTTPException(status_code=404, detail=f"File not found: {path}")
+    return resolved
+
+
+async def thumbnail_response(path: Path, at: Optional[float]) -> FileResponse:
+    try:
+        thumbnail = await thumbnailer.thumbnail(path, at)
+    except FfmpegError as ex:
+        raise HTTPException(status_code=500, detail=f"Thumbnail failed: {ex}")
+    return FileResponse(
+        thumbnail, media_type="image/jpeg", headers={"Cache-Control": CACHE_CONTROL}
+    )
+
+
+async def sprite_response(path: Path) -> FileResponse:
+    try:
+        sprite = await thumbnailer.sprite(path)
+    except FfmpegError as ex:
+        raise HTTPException(status_code=500, detail=f"Sprite failed: {ex}")
+    return FileResponse(
+        sprite.path,
+        media_type="image/jpeg",
+        headers={
+            "Cache-Control": CACHE_CONTROL,
+            "x-sprite-interval": f"{sprite.interval:.3f}",
+            "x-sprite-columns": str(sprite.columns),
+            "x-sprite-count": str(sprite.count),
+            "access-control-expose-headers": "x-sprite-interval, x-sprite-columns, x-sprite-count",
+        },
+    )
+
+
+@router.get("/thumbnails/recordings/{recid}")
+async def get_recording_thumbnail(recid: int, at: Optional[float] = None):
+    """at = seconds into the recording"""
+    return await thumbnail_response(await recording_path(recid), at)
+
+
+@router.get("/thumbnails/files/{path:path}")
+async def get_file_thumbnail(
+    path: str, group: str = "Videos", at: Optional[float] = None
+):
+    return await thumbnail_response(await file_path(group, path), at)
+
+
+@router.get("/sprites/recordings/{recid}")
+async def get_recording_sprite(recid: int):
+    """Seek-bar tiles: x-sprite-count tiles, x-sprite-columns per row, x-sprite-interval seconds apart"""
+    return await sprite_response(await recording_path(recid))
+
+
+@router.get("/sprites/files/{path:path}")
+async def get_file_sprite(path: str, group: str = "Videos"):
+    return await sprite_response(await file_path(group, path))
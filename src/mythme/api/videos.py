@@ -1,11 +1,13 @@
 import os
-import shutil
 from typing import Optional
-from fastapi import APIRouter, Request, HTTPException, UploadFile
-from fastapi.responses import PlainTextResponse
+from anyio import from_thread
+from fastapi import APIRouter, Request, Response, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from mythme.data.recordings import RecordingsData
-from mythme.data.videos import VideoData
+from mythme.data.videos import AsyncVideoData, VideoData
 from mythme.model.api import MessageResponse
+from mythme.model.job import Job
 from mythme.model.query import Criterion, Paging, Query, Sort
 from mythme.model.recording import Recording
 from mythme.model.video import (
@@ -13,6 +15,7 @@ from mythme.model.video import (
     DailyVidWatched,
     DeleteMetadataResponse,
     Video,
+    VideoCopyResponse,
     VideoScanRequest,
     VideoScanResponse,
     VideoSyncRequest,
@@ -20,24 +23,39 @@ from mythme.model.video import (
     VideosResponse,
 )
 from mythme.query.queries import parse_params
+from mythme.utils.config import config
 from mythme.utils.dailyvids import to_psv, update_watched
+from mythme.utils.jobs import JobContext, JobError, job_queue
+from mythme.utils.filecopy import copy_file
 from mythme.utils.mythtv import get_myth_hostname, get_storage_group_dirs
 from mythme.utils.log import logger
+from mythme.utils.streaming import stream_format, stream_list
+from mythme.utils.thumbnails import thumbnailer
 
 router = APIRouter()
 
 
-@router.get("/videos", response_model_exclude_none=True)
-def get_videos(request: Request) -> VideosResponse:
+@router.get("/videos", response_model=VideosResponse, response_model_exclude_none=True)
+async def get_videos(request: Request) -> VideosResponse | StreamingResponse:
     params = dict(request.query_params)
     params["sort"] = params["sort"] if "sort" in params else "id"
     query = parse_params(params)
-    return VideoData().get_videos(query)
+    videos_response = await AsyncVideoData().get_videos(query)
+    format = stream_format(request)
+    if format:
+        return stream_list(
+            format,
+            "videos",
+            videos_response.videos,
+            total=videos_response.total,
+            watched=videos_response.watched,
+        )
+    return videos_response
 
 
 @router.get("/videos/{path:path}", response_model_exclude_none=True)
-def get_video(path: str) -> Video:
-    video = VideoData().get_video(path.replace("&", "%26"))
+async def get_video(path: str) -> Video:
+    video = await AsyncVideoData().get_video(path.replace("&", "%26"))
     if video is None:
         raise HTTPException(status_code=404)
     return video
@@ -84,29 +102,46 @@ def delete_video_metadata() -> DeleteMetadataResponse:
     return DeleteMetadataResponse(deleted=rows)
 
 
-@router.patch("/videos", response_model_exclude_none=True)
-def sync_videos(sync_request: VideoSyncRequest) -> VideoSyncResponse:
-    result = VideoData().sync_video_metadata(sync_request.videos)
-    if result is None:
-        raise HTTPException(status_code=404, detail="No video storage group dirs found")
-    (updated, missing) = result
-    return VideoSyncResponse(updated=updated, missing=missing)
+def accepted(job: Job, response: Response) -> Job:
+    response.headers["Location"] = f"/api/jobs/{job.id}"
+    return job
+
+
+@router.patch("/videos", status_code=202, response_model_exclude_none=True)
+async def sync_videos(sync_request: VideoSyncRequest, response: Response) -> Job:
+    """Job result is a VideoSyncResponse"""
+
+    async def sync(_context: JobContext) -> VideoSyncResponse:
+        result = await run_in_threadpool(
+            VideoData().sync_video_metadata, sync_request.videos
+        )
+        if result is None:
+            raise JobError("No video storage group dirs found")
+        return result
 
+    return accepted(job_queue.submit("video-sync", sync), response)
 
-@router.post("/video-scan", response_model_exclude_none=True)
-def scan_videos(request: VideoScanRequest) -> VideoScanResponse:
-    result = VideoData().scan_videos()
-    if result is None:
-        raise HTTPException(status_code=404, detail="No video storage group dirs found")
 
-    (added, deleted) = result
-    return VideoScanResponse(added=added, deleted=deleted)
+@router.post("/video-scan", status_code=202, response_model_exclude_none=True)
+async def scan_videos(request: VideoScanRequest, response: Response) -> Job:
+    """Job result is a VideoScanResponse"""
 
+    async def scan(_context: JobContext) -> VideoScanResponse:
+        result = await run_in_threadpool(VideoData().scan_videos)
+        if result is None:
+            raise JobError("No video storage group dirs found")
+        (added, deleted) = result
+        if config.thumbnails.prewarm:
+            thumbnailer.prewarm(added)
+        return VideoScanResponse(added=added, deleted=deleted)
 
-@router.post("/video-file", response_model_exclude_none=True)
+    return accepted(job_queue.submit("video-scan", scan), response)
+
+
+@router.post("/video-file", status_code=202, response_model_exclude_none=True)
 def post_video_file(
-    source: str, category: str, recording: Recording
-) -> MessageResponse:
+    source: str, category: str, recording: Recording, response: Response
+) -> Job:
     if not source == "recording":
         raise HTTPException(
             status_code=400,
@@ -151,10 +186,40 @@ def post_video_file(
         video_path = f"{sg_dir}/{video_file}"
         # copies to first existing sg subdir
         if os.path.isdir(os.path.dirname(video_path)):
-            shutil.copy(recording_file, video_path)
-            return MessageResponse(
-                message=f"Recording '{recording.title}' copied to Videos storage group under {category} category"
-            )
+
+            async def copy(context: JobContext) -> VideoCopyResponse:
+                def progress(copied: int, total: int, bytes_per_sec: float):
+                    context.check_cancelled()
+                    context.progress(
+                        copied / total if total else 1.0,
+                        f"{bytes_per_sec / 1048576:.1f} MB/s",
+                    )
+
+                result = await run_in_threadpool(
+                    copy_file,
+                    str(recording_file),
+                    video_path,
+                    config.videos.copy_mb_per_sec * 1048576,
+                    config.videos.copy_checksum,
+                    progress,
+                )
+                logger.info(
+                    f"Copied {recording_file} to {video_path} ({result.method}): "
+                    f"{result.size} bytes in {result.seconds:.1f} seconds"
+                )
+                return VideoCopyResponse(
+                    message=f"Recording '{recording.title}' copied to Videos storage group under {category} category",
+                    file=video_file,
+                    size=result.size,
+                    seconds=round(result.seconds, 3),
+                    bytes_per_sec=round(result.bytes_per_sec),
+                    method=result.method,
+                    sha256=result.sha256,
+                )
+
+            # sync route, so submit on the event loop
+            job = from_thread.run_sync(job_queue.submit, "video-file", copy, True)
+            return accepted(job, response)
 
     raise HTTPException(
         status_code=404,
@@ -193,27 +258,29 @@ async def upload_poster(file: UploadFile, category: str) -> MessageResponse:
 
 
 @router.get("/dailyvid", response_model_exclude_none=True)
-def get_dailyvid(ext: Optional[str] = None) -> DailyVid:
-    dailyvid = VideoData().next_dailyvid(ext)
+async def get_dailyvid(ext: Optional[str] = None) -> DailyVid:
+    dailyvid = await AsyncVideoData().next_dailyvid(ext)
     if dailyvid is None:
         raise HTTPException(status_code=404)
     return dailyvid
 
 
 @router.patch("/dailyvid", response_model_exclude_none=True)
-def dailyvid_watched(dv_watched: DailyVidWatched) -> MessageResponse:
-    video = VideoData().get_video_by_file(dv_watched.file.replace("&", "%26"))
+async def dailyvid_watched(dv_watched: DailyVidWatched) -> MessageResponse:
+    video = await AsyncVideoData().get_video_by_file(
+        dv_watched.file.replace("&", "%26")
+    )
     if not video:
         raise HTTPException(status_code=404, detail=f"No video: {dv_watched.file}")
     video.watched = dv_watched.watched
-    update_watched(video)
+    await run_in_threadpool(update_watched, video)
 
     return MessageResponse(message=f"Video {video.id} watched: {dv_watched.watched}")
 
 
 @router.get("/dailyvids-psv", response_class=PlainTextResponse)
-def get_dailyvids():
-    vids = VideoData().get_videos(
+async def get_dailyvids():
+    vids = await AsyncVideoData().get_videos(
         Query(
             criteria=[Criterion(name="movies", value="false")],
             sort=Sort(name="file"),
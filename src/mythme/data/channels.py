@@ -1,11 +1,21 @@
 import os
+import json
 import time
+import asyncio
+import aiofiles
+from typing import Optional
 from mythme.model.channel import Channel, ChannelIcon
-from mythme.utils.db import get_connection
-from mythme.utils.mythtv import get_channel_icon
+from mythme.utils.db import get_connection, run_db
+from mythme.utils.mythtv import (
+    ChannelIconInfo,
+    get_channel_icon_async,
+    get_channel_icon_info_async,
+)
 from mythme.utils.config import config
 from mythme.utils.log import logger
 
+MAX_ICON_FETCHES = 8
+
 
 class ChannelData:
     select = """SELECT chanid, channum, callsign, name, icon
@@ -16,6 +26,7 @@ ORDER BY CONVERT(channum, UNSIGNED) asc"""
 
     def __init__(self):
         self.icons_dir = f"{config.mythme_dir}/icons"
+        self.icon_manifest_file = f"{config.mythme_dir}/icons.json"
         os.makedirs(self.icons_dir, exist_ok=True)
 
     def get_channels(self) -> list[Channel]:
@@ -41,20 +52,117 @@ ORDER BY CONVERT(channum, UNSIGNED) asc"""
 
         return channel
 
-    def load_icons(self):
+    async def load_icons(self):
+        """Fetches missing or changed channel icons, a few at a time."""
         before = time.time()
         logger.info("Loading channel icons...")
 
-        channels = self.get_channels()
-        for channel in channels:
-            if channel.icon:
-                icon_file = f"{self.icons_dir}/{channel.icon.file}"
-                if not os.path.isfile(icon_file):
-                    icon = get_channel_icon(channel.id)
-                    if icon:
-                        with open(icon_file, "wb") as f:
-                            f.write(icon)
+        channels = [
+            channel for channel in await run_db(self.get_channels) if channel.icon
+        ]
+        manifest = self.load_icon_manifest()
+        semaphore = asyncio.Semaphore(MAX_ICON_FETCHES)
+        entries = await asyncio.gather(
+            *[self.update_icon(channel, manifest, semaphore) for channel in channels]
+        )
+        fetched = 0
+        for channel, (entry, was_fetched) in zip(channels, entries):
+            if entry:
+                manifest[str(channel.id)] = entry
+            fetched += was_fetched
+        self.save_icon_manifest(manifest)
 
         logger.info(
-            f"Loaded {len(channels)} channel icons in: {(time.time() - before):.2f} seconds"
+            f"Loaded {len(channels)} channel icons ({fetched} fetched) in: {(time.time() - before):.2f} seconds"  # noqa: E501
         )
+
+    async def update_icon(
+        self, channel: Channel, manifest: dict[str, dict], semaphore: asyncio.Semaphore
+    ) -> tuple[Optional[dict], bool]:
+        """Manifest entry for the channel's icon (None if it couldn't be
+        fetched), and whether it was fetched.
+        """
+        if not channel.icon:
+            return None, False
+        entry = manifest.get(str(channel.id))
+        async with semaphore:
+            try:
+                info = None
+                stale = self.is_icon_missing(channel, entry)
+                if not stale:
+                    info = await get_channel_icon_info_async(channel.id)
+                    stale = info is not None and self.is_icon_changed(
+                        channel, entry, info
+                    )
+                if stale:
+                    fetched = await self.fetch_icon(channel)
+                    return fetched, fetched is not None
+            except Exception as ex:
+                logger.error(f"Cannot fetch icon for channel {channel.id}: {ex}")
+                return None, False
+        # fetched before the manifest existed, or before dates were recorded
+        modified = (entry or {}).get("modified") or (info.modified if info else None)
+        return {"file": channel.icon.file, "modified": modified}, False
+
+    def is_icon_missing(self, channel: Channel, entry: Optional[dict]) -> bool:
+        """Not fetched, or channel.icon has changed since it was."""
+        if not channel.icon:
+            return False
+        if not os.path.isfile(f"{self.icons_dir}/{channel.icon.file}"):
+            return True
+        return entry is not None and entry.get("file") != channel.icon.file
+
+    def is_icon_changed(
+        self, channel: Channel, entry: Optional[dict], info: ChannelIconInfo
+    ) -> bool:
+        """The upstream icon's size or date differs from the fetched one."""
+        if not channel.icon:
+            return False
+        icon_file = f"{self.icons_dir}/{channel.icon.file}"
+        if info.size is not None and info.size != os.path.getsize(icon_file):
+            return True
+        modified = entry.get("modified") if entry else None
+        return None not in (info.modified, modified) and info.modified != modified
+
+    async def fetch_icon(self, channel: Channel) -> Optional[dict]:
+        if not channel.icon:
+            return None
+        result = await get_channel_icon_async(channel.id)
+        if not result:
+            return None
+        icon, info = result
+        # write then rename, so /icons never serves a partial file
+        icon_file = f"{self.icons_dir}/{channel.icon.file}"
+        temp_file = f"{icon_file}.{channel.id}.tmp"
+        async with aiofiles.open(temp_file, mode="wb") as f:
+            await f.write(icon)
+        os.replace(temp_file, icon_file)
+        return {"file": channel.icon.file, "modified": info.modified}
+
+    def load_icon_manifest(self) -> dict[str, dict]:
+        """Icon file and upstream Last-Modified by channel id, as of the last fetch."""
+        if not os.path.isfile(self.icon_manifest_file):
+            return {}
+        try:
+            with open(self.icon_manifest_file, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as ex:
+            logger.error(f"Ignoring unreadable {self.icon_manifest_file}: {ex}")
+            return {}
+        # entries were just the icon file
+        return {
+            id: {"file": entry} if isinstance(entry, str) else entry
+            for id, entry in manifest.items()
+        }
+
+    def save_icon_manifest(self, manifest: dict[str, dict]):
+        with open(self.icon_manifest_file, "w") as f:
+            json.dump(manifest, f)
+
+
+class AsyncChannelData:
+    def __init__(self):
+        self.data = ChannelData()
+
+    async def get_channels(self) -> list[Channel]:
+        return await run_db(self.data.get_channels)
@@ -1,6 +1,6 @@
 from datetime import datetime
 from mythme.model.credit import Credit
-from mythme.utils.db import get_connection
+from mythme.utils.db import get_connection, run_db
 
 
 class CreditsData:
@@ -18,3 +18,11 @@ ORDER BY credits.priority"""
 
     def to_credit(self, row: dict) -> Credit:
         return Credit(name=row["name"], role=row["role"])
+
+
+class AsyncCreditsData:
+    def __init__(self):
+        self.data = CreditsData()
+
+    async def get_credits(self, channel_id: int, start: datetime) -> list[Credit]:
+        return await run_db(self.data.get_credits, channel_id, start)
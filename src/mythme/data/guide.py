@@ -0,0 +1,526 @@
+import re
+import time
+import asyncio
+from array import array
+from collections import defaultdict
+from bisect import bisect_left, bisect_right
+from datetime import datetime, UTC
+from typing import Any, Callable, Optional
+from mythme.data.programs import ProgramData, ProgramsPage, count_cache
+from mythme.model.query import Criterion, Query
+from mythme.utils.cache import response_cache
+from mythme.utils.config import config
+from mythme.utils.db import get_connection, run_db
+from mythme.utils.log import logger
+
+TEXT_COLUMNS = [
+    "callsign",
+    "channum",
+    "title",
+    "subtitle",
+    "description",
+    "category",
+    "category_type",
+]
+NUMBER_COLUMNS = ["airdate", "stars", "season", "episode"]
+TIME_COLUMNS = ["starttime", "endtime"]
+
+HASH_INDEXES = ["title", "category", "category_type", "callsign"]
+"""Casefolded value -> row ids, for = and IN criteria"""
+RANGE_INDEXES = ["starttime", "stars", "airdate"]
+"""Sorted values, for range criteria"""
+
+Predicate = Callable[[int], bool]
+
+SEARCH_FIELDS = ["description", "subtitle", "title"]
+"""Searched columns, in increasing order of relevance weight"""
+MIN_PREFIX = 2
+"""Shorter search terms only match whole words"""
+WORD = re.compile(r"\w+")
+
+
+class SearchIndex:
+    """Inverted index of title, subtitle and description words.
+
+    Every search term must match (as a word or the start of one) in some
+    field. A row scores the weight of the best field each term matches in,
+    doubled for a whole-word match, summed over the terms.
+    """
+
+    def __init__(self, columns: dict[str, list]):
+        postings: dict[str, list[int]] = defaultdict(list)
+        findall = WORD.findall
+        for weight, field in enumerate(SEARCH_FIELDS, start=1):
+            for id, text in enumerate(columns[field]):
+                if text:
+                    posting = id << 2 | weight  # row id and field weight
+                    for word in set(findall(text.casefold())):
+                        postings[word].append(posting)
+        self.postings = {word: array("l", ids) for word, ids in postings.items()}
+        self.vocabulary = sorted(postings)
+
+    def search(self, text: str) -> dict[int, int]:
+        """Scores by row id, for rows matching all terms."""
+        scores: Optional[dict[int, int]] = None
+        for term in dict.fromkeys(self.words(text)):
+            term_scores: dict[int, int] = {}
+            for word in self.matching(term):
+                bonus = 2 if word == term else 1
+                for posting in self.postings[word]:
+                    id, score = posting >> 2, (posting & 3) * bonus
+                    if score > term_scores.get(id, 0):
+                        term_scores[id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    id: score + term_scores[id]
+                    for id, score in scores.items()
+                    if id in term_scores
+                }
+            if not scores:
+                break
+        return scores or {}
+
+    def matching(self, term: str) -> list[str]:
+        if len(term) < MIN_PREFIX:
+            return [term] if term in self.postings else []
+        words = []
+        for i in range(bisect_left(self.vocabulary, term), len(self.vocabulary)):
+            if not self.vocabulary[i].startswith(term):
+                break
+            words.append(self.vocabulary[i])
+        return words
+
+    def words(self, text: str) -> list[str]:
+        return WORD.findall(text.casefold())
+
+
+class GuideSnapshot:
+    """Immutable, column-oriented copy of the upcoming program guide.
+
+    Rows are stored in (starttime, chanid) order and identified by position.
+    Queries are narrowed through the most selective index, then every
+    criterion is checked against the candidate rows. Text comparisons ignore
+    case, like MariaDB's default collations.
+    """
+
+    def __init__(self, version: tuple, rows: list[dict], channels: dict[int, dict]):
+        self.version = version
+        self.channels = channels
+        self.size = len(rows)
+        self.columns: dict[str, list] = {
+            name: [row[name] for row in rows]
+            for name in TEXT_COLUMNS + NUMBER_COLUMNS + TIME_COLUMNS
+            if name not in ["callsign", "channum"]
+        }
+        self.columns["callsign"] = [channels[row["chanid"]]["callsign"] for row in rows]
+        self.columns["channum"] = [channels[row["chanid"]]["channum"] for row in rows]
+        self.chanids = array("l", [row["chanid"] for row in rows])
+        self.years = [row["year"] for row in rows]
+        self.aired = [row["originalairdate"] for row in rows]
+        self.credits = array("l", [row["credits"] for row in rows])
+        self.genres = [row["genres"] for row in rows]
+
+        self.hash_indexes: dict[str, dict[Any, array]] = {}
+        for name in HASH_INDEXES:
+            index: dict[Any, list[int]] = defaultdict(list)
+            for id, value in enumerate(self.columns[name]):
+                index[self.fold(value)].append(id)
+            self.hash_indexes[name] = {
+                value: array("l", ids) for value, ids in index.items()
+            }
+        self.range_indexes: dict[str, tuple[list, array]] = {}
+        for name in RANGE_INDEXES:
+            column = self.columns[name]
+            # NULLs are left out, since no range includes them
+            present = [id for id in range(self.size) if column[id] is not None]
+            ids = array("l", sorted(present, key=column.__getitem__))
+            self.range_indexes[name] = ([column[id] for id in ids], ids)
+        self.search_index = SearchIndex(self.columns)
+
+    def get_page(self, query: Query) -> Optional[ProgramsPage]:
+        """Returns None if the query needs SQL (eg: unsupported criteria)."""
+        program_data = ProgramData()
+        candidates: Optional[list[int]] = None
+        predicates: list[Predicate] = []
+        for criterion in query.criteria:
+            name = program_data.colname(criterion.name)
+            value = program_data.colval(criterion)
+            predicate = self.predicate(name, criterion, value)
+            if predicate is None:
+                return None
+            predicates.append(predicate)
+            ids = self.lookup(name, criterion, value)
+            if ids is not None and (candidates is None or len(ids) < len(candidates)):
+                candidates = ids
+        scores: dict[int, int] = {}
+        if query.search:
+            scores = self.search_index.search(query.search)
+            predicates.append(scores.__contains__)
+            if candidates is None or len(scores) < len(candidates):
+                candidates = list(scores)
+
+        now = datetime.now(UTC).replace(tzinfo=None)
+        endtimes = self.columns["endtime"]
+        # rows starting from now on can't have ended
+        current = bisect_left(self.columns["starttime"], now)
+        if candidates is None:
+            matches = [id for id in range(current) if endtimes[id] >= now]
+            matches += range(current, self.size)
+        else:
+            candidates.sort()
+            matches = [id for id in candidates if id >= current or endtimes[id] >= now]
+        for predicate in predicates:
+            matches = [id for id in matches if predicate(id)]
+
+        sort_col = program_data.colsort(query.sort.name)
+        sort_key = self.sort_key(sort_col)
+        if sort_key is None:
+            return None
+        if query.sort.name == "relevance":
+            # best first, ties in (starttime, chanid) order
+            matches.sort(key=scores.__getitem__, reverse=True)
+        elif sort_col != "starttime":
+            # stable, so ties stay in (starttime, chanid) order
+            matches.sort(key=sort_key, reverse=query.sort.order == "desc")
+        elif query.sort.order == "desc":
+            # starttime desc is followed by chanid asc
+            matches.sort(key=lambda id: self.columns["starttime"][id], reverse=True)
+
+        start = query.paging.offset
+        if query.paging.cursor:
+            values = program_data.decode_cursor(query.paging.cursor, query.sort)
+            after = self.after(matches, values)
+            if after is None:
+                return None
+            start = after
+        page = matches[start : start + query.paging.limit]
+        response = ProgramsPage(rows=(self.row(id) for id in page), total=len(matches))
+        if start + query.paging.limit < len(matches):
+            last = self.row(page[-1])
+            last["sortkey"] = self.sortkey(sort_col, page[-1])
+            response.cursor = program_data.encode_cursor(query.sort, last)
+        return response
+
+    def predicate(
+        self, name: str, criterion: Criterion, value: str | list[str]
+    ) -> Optional[Predicate]:
+        if name == "genre":
+            genres = self.genres
+            if criterion.operator == "LIKE" and isinstance(value, str):
+                regex = self.like_regex(value)
+                return lambda id: any(regex.fullmatch(g) for g in genres[id])
+            wanted = self.convert(name, value, criterion.operator)
+            if wanted is None:
+                return None
+            if criterion.operator == "=":
+                return lambda id: wanted in genres[id]
+            if criterion.operator == "IN":
+                return lambda id: any(g in wanted for g in genres[id])
+            return None
+
+        if name not in self.columns:
+            return None
+        column = self.columns[name]
+        if criterion.operator == "LIKE":
+            if name not in TEXT_COLUMNS or not isinstance(value, str):
+                return None
+            regex = self.like_regex(value)
+            return lambda id: (
+                column[id] is not None and regex.fullmatch(column[id]) is not None
+            )
+
+        wanted = self.convert(name, value, criterion.operator)
+        if wanted is None:
+            return None
+        compare = self.comparison(criterion.operator, wanted)
+        if compare is None:
+            return None
+        fold = self.fold if name in TEXT_COLUMNS else self.same
+        # NULL matches nothing, as in SQL
+        return lambda id: column[id] is not None and compare(fold(column[id]))
+
+    def comparison(self, operator: str, wanted: Any) -> Optional[Callable[[Any], bool]]:
+        match operator:
+            case "=":
+                return lambda value: value == wanted
+            case "<>":
+                return lambda value: value != wanted
+            case ">":
+                return lambda value: value > wanted
+            case "<":
+                return lambda value: value < wanted
+            case ">=":
+                return lambda value: value >= wanted
+            case "<=":
+                return lambda value: value <= wanted
+            case "IN":
+                return lambda value: value in wanted
+            case "BETWEEN":
+                low, high = wanted
+                return lambda value: low <= value <= high
+        return None
+
+    def lookup(
+        self, name: str, criterion: Criterion, value: str | list[str]
+    ) -> Optional[list[int]]:
+        """Row ids that may match, if an index applies."""
+        wanted = self.convert(name, value, criterion.operator)
+        if wanted is None:
+            return None
+        if name in self.hash_indexes:
+            index = self.hash_indexes[name]
+            if criterion.operator == "=":
+                return list(index.get(wanted, []))
+            if criterion.operator == "IN":
+                return [id for v in wanted for id in index.get(v, [])]
+        if name in self.range_indexes:
+            values, ids = self.range_indexes[name]
+            lo, hi = 0, len(values)
+            match criterion.operator:
+                case "=":
+                    lo, hi = bisect_left(values, wanted), bisect_right(values, wanted)
+                case ">":
+                    lo = bisect_right(values, wanted)
+                case ">=":
+                    lo = bisect_left(values, wanted)
+                case "<":
+                    hi = bisect_left(values, wanted)
+                case "<=":
+                    hi = bisect_right(values, wanted)
+                case "BETWEEN":
+                    lo = bisect_left(values, wanted[0])
+                    hi = bisect_right(values, wanted[1])
+                case _:
+                    return None
+            return list(ids[lo:hi])
+        return None
+
+    def convert(self, name: str, value: str | list[str], operator: str) -> Any:
+        """Criterion value(s) in the column's comparable form, or None if unsupported."""
+        if isinstance(value, list):
+            try:
+                converted = [self.convert_one(name, str(v)) for v in value]
+            except ValueError:
+                return None
+            if operator == "BETWEEN":
+                return tuple(converted) if len(converted) == 2 else None
+            return set(converted)
+        try:
+            return self.convert_one(name, value)
+        except ValueError:
+            return None
+
+    def convert_one(self, name: str, value: str) -> Any:
+        if name in TEXT_COLUMNS or name == "genre":
+            return self.fold(value)
+        if name in NUMBER_COLUMNS:
+            return float(value)
+        if name in TIME_COLUMNS:
+            dt = datetime.fromisoformat(value)
+            if dt.tzinfo:
+                dt = dt.astimezone(UTC).replace(tzinfo=None)
+            return dt
+        raise ValueError(f"Unsupported column: {name}")
+
+    def sort_key(self, sort_col: str) -> Optional[Callable[[int], Any]]:
+        # NULLs sort first (last when reversed for desc), as in MariaDB
+        if sort_col == "airdate":
+            years, aired = self.columns["airdate"], self.aired
+            return lambda id: (
+                years[id] is not None,
+                years[id] or 0,
+                aired[id] is not None,
+                aired[id] or 0,
+            )
+        if sort_col in ["starttime", "endtime"] or sort_col in NUMBER_COLUMNS:
+            column = self.columns[sort_col]
+            return lambda id: (column[id] is not None, column[id] or 0)
+        if sort_col in TEXT_COLUMNS:
+            column = self.columns[sort_col]
+            return lambda id: (column[id] is not None, self.fold(column[id] or ""))
+        if sort_col.startswith("CAST(channum"):
+            channums = self.columns["channum"]
+            return lambda id: self.unsigned(channums[id])
+        return None
+
+    def sortkey(self, sort_col: str, id: int) -> Any:
+        """The ORDER BY value SQL returns as sortkey (for cursors)."""
+        if sort_col.startswith("CAST(channum"):
+            return self.unsigned(self.columns["channum"][id])
+        return self.columns[sort_col][id]
+
+    def after(self, matches: list[int], values: list) -> Optional[int]:
+        """Position following the cursor row, or None if it's no longer in matches."""
+        try:
+            starttime = datetime.fromisoformat(str(values[-2]))
+            chanid = int(values[-1])
+        except (ValueError, IndexError):
+            raise ValueError("Invalid cursor")
+        starttimes = self.columns["starttime"]
+        for pos, id in enumerate(matches):
+            if self.chanids[id] == chanid and starttimes[id] == starttime:
+                return pos + 1
+        return None
+
+    def row(self, id: int) -> dict:
+        """Row as returned by ProgramData SQL."""
+        channel = self.channels[self.chanids[id]]
+        return {
+            "chanid": self.chanids[id],
+            "channum": channel["channum"],
+            "callsign": channel["callsign"],
+            "name": channel["name"],
+            "icon": channel["icon"],
+            "title": self.columns["title"][id],
+            "subtitle": self.columns["subtitle"][id],
+            "starttime": self.columns["starttime"][id],
+            "endtime": self.columns["endtime"][id],
+            "description": self.columns["description"][id],
+            "category": self.columns["category"][id],
+            "category_type": self.columns["category_type"][id],
+            "year": self.years[id],
+            "stars": self.columns["stars"][id],
+            "season": self.columns["season"][id],
+            "episode": self.columns["episode"][id],
+            "originalairdate": self.aired[id],
+            "credits": self.credits[id],
+        }
+
+    def fold(self, value: Any) -> Any:
+        # trailing spaces are insignificant in MariaDB string comparisons
+        return value.rstrip(" ").casefold() if isinstance(value, str) else value
+
+    def same(self, value: Any) -> Any:
+        return value
+
+    def unsigned(self, value: str) -> int:
+        digits = re.match(r"\d*", value.strip())
+        return int(digits.group()) if digits and digits.group() else 0
+
+    def like_regex(self, pattern: str) -> re.Pattern:
+        regex = ""
+        escaped = False
+        for ch in pattern:
+            if escaped:
+                regex += re.escape(ch)
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == "%":
+                regex += ".*"
+            elif ch == "_":
+                regex += "."
+            else:
+                regex += re.escape(ch)
+        return re.compile(regex, re.IGNORECASE | re.DOTALL)
+
+
+class GuideData:
+    version_sql = """SELECT COUNT(*), MAX(starttime),
+(SELECT COUNT(*) FROM channel WHERE visible > 0 AND deleted IS NULL)
+FROM program"""
+    programs_sql = """SELECT program.chanid, program.title, program.subtitle, program.starttime, program.endtime,
+program.description, program.category, program.category_type, program.airdate,
+CONVERT(program.airdate USING utf8) as year, program.stars, program.season, program.episode, program.originalairdate
+FROM channel, program
+WHERE channel.chanid = program.chanid AND channel.visible > 0 AND channel.deleted IS NULL
+AND program.endtime >= %s
+ORDER BY program.starttime, program.chanid"""  # noqa: E501
+    channels_sql = """SELECT chanid, channum, callsign, name, icon
+FROM channel
+WHERE visible > 0
+AND deleted IS NULL"""
+    credits_sql = """SELECT credits.chanid, credits.starttime, COUNT(*) AS credits
+FROM credits, program
+WHERE credits.chanid = program.chanid AND credits.starttime = program.starttime AND program.endtime >= %s
+GROUP BY credits.chanid, credits.starttime"""  # noqa: E501
+    genres_sql = """SELECT programgenres.chanid, programgenres.starttime, programgenres.genre
+FROM programgenres, program
+WHERE programgenres.chanid = program.chanid AND programgenres.starttime = program.starttime
+AND programgenres.relevance != 0 AND program.endtime >= %s"""  # noqa: E501
+
+    def get_version(self) -> tuple:
+        """Changes whenever mythfilldatabase adds or replaces guide data,
+        or channels are hidden/shown.
+        """
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(GuideData.version_sql)
+                return tuple(cursor.fetchone())
+
+    def build_snapshot(self, version: tuple) -> GuideSnapshot:
+        now = datetime.now(UTC).replace(tzinfo=None)
+        with get_connection() as conn:
+            with conn.cursor(dictionary=True) as cursor:
+                cursor.execute(GuideData.channels_sql)
+                channels = {row["chanid"]: row for row in cursor.fetchall()}
+                cursor.execute(GuideData.credits_sql, [now])
+                credits = {
+                    (row["chanid"], row["starttime"]): row["credits"]
+                    for row in cursor.fetchall()
+                }
+                genres: dict[tuple, list[str]] = {}
+                cursor.execute(GuideData.genres_sql, [now])
+                for row in cursor.fetchall():
+                    key = (row["chanid"], row["starttime"])
+                    genres.setdefault(key, []).append(row["genre"].casefold())
+                cursor.execute(GuideData.programs_sql, [now])
+                rows = cursor.fetchall()
+        for row in rows:
+            key = (row["chanid"], row["starttime"])
+            row["credits"] = credits.get(key, 0)
+            row["genres"] = genres.get(key, [])
+        return GuideSnapshot(version, rows, channels)
+
+
+class GuideSnapshotter:
+    """Watches for guide changes, dropping cached guide lookups and (if
+    enabled) rebuilding the GuideSnapshot in the background.
+    """
+
+    def __init__(self):
+        self.guide_data = GuideData()
+        self.version: Optional[tuple] = None
+        self.snapshot: Optional[GuideSnapshot] = None
+        self.stop_event = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        self.stop_event.set()
+        if self.task:
+            await self.task
+
+    async def run(self):
+        while not self.stop_event.is_set():
+            try:
+                await self.refresh()
+            except Exception as ex:
+                logger.error(f"Guide snapshot refresh failed: {ex}")
+            try:
+                await asyncio.wait_for(
+                    self.stop_event.wait(), timeout=config.guide.check_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def refresh(self):
+        version = await run_db(self.guide_data.get_version)
+        if version == self.version:
+            return
+        response_cache.invalidate("guide:")
+        count_cache.invalidate()
+        if config.guide.snapshot:
+            before = time.time()
+            self.snapshot = await run_db(self.guide_data.build_snapshot, version)
+            logger.info(
+                f"Built guide snapshot of {self.snapshot.size} programs in: {(time.time() - before):.2f} seconds"  # noqa: E501
+            )
+        self.version = version
+
+
+guide = GuideSnapshotter()
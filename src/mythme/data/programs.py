@@ -1,22 +1,48 @@
+import re
 import json
+import base64
+from dataclasses import dataclass
 from datetime import datetime, timezone, UTC
+from typing import Iterable, Optional
 from mythme.model.channel import ChannelIcon
-from mythme.model.query import Criterion, DbQuery, Query
+from mythme.model.query import Criterion, DbQuery, Query, Sort
 from mythme.model.program import Channel, Program, ProgramsResponse
-from mythme.utils.db import get_connection
+from mythme.utils.cache import TtlCache
+from mythme.utils.config import config
+from mythme.utils.db import get_connection, run_db
 from mythme.utils.log import logger
 
+count_cache: TtlCache[int] = TtlCache(
+    max_entries=256, ttl=config.cache.ttl, max_bytes=256
+)
+"""Program totals by query fingerprint, so paging doesn't recount every page"""
+
+
+@dataclass
+class ProgramsPage:
+    """A page of rows (as selected by ProgramData.fields), converted on demand."""
+
+    rows: Iterable[dict]
+    total: int
+    cursor: Optional[str] = None
+    query: Optional[DbQuery] = None
+
 
 # without CONVERT, 0000 in airdate throws an error
 class ProgramData:
     fields = """channel.chanid, channel.channum, channel.callsign, channel.name, channel.icon,
 program.title, program.subtitle, program.starttime, program.endtime, program.description, program.category, program.category_type,
-CONVERT(program.airdate USING utf8) as year, program.stars, program.season, program.episode, program.originalairdate,
-(SELECT COUNT(*) FROM credits WHERE credits.chanid = program.chanid AND credits.starttime = program.starttime) AS credits"""  # noqa: E501
+CONVERT(program.airdate USING utf8) as year, program.stars, program.season, program.episode, program.originalairdate"""  # noqa: E501
     tables = "FROM channel, program"
     clause = "WHERE channel.chanid = program.chanid AND channel.visible > 0"
 
+    def __init__(self):
+        self.channels: dict[int, Channel] = {}
+
     def get_programs(self, query: Query, with_genres: bool = False) -> ProgramsResponse:
+        return self.to_programs_response(self.get_page(query, with_genres))
+
+    def get_page(self, query: Query, with_genres: bool = False) -> ProgramsPage:
         fields = ProgramData.fields
         tables = ProgramData.tables
         clause = ProgramData.clause
@@ -24,55 +50,168 @@ CONVERT(program.airdate USING utf8) as year, program.stars, program.season, prog
             fields += ", programgenres.genre"
             tables += ", programgenres"
             clause += " AND programgenres.chanid = program.chanid AND programgenres.starttime = program.starttime AND programgenres.relevance != 0"  # noqa: E501
-        clause += (
-            "\nAND program.endtime >= "
-            + f"'{datetime.now(UTC).isoformat(timespec="seconds")}.000Z'"
-        )
 
-        params: list[str] = []
+        filters = ""
+        params: list = []
         for criterion in query.criteria:
-            clause += f" AND {self.colname(criterion.name)} {criterion.operator} "
+            filters += f" AND {self.colname(criterion.name)} {criterion.operator} "
             val = self.colval(criterion)
             if isinstance(val, list):
                 if criterion.operator == "IN":
-                    clause += "(" + ", ".join(["%s"] * len(val)) + ")"
+                    filters += "(" + ", ".join(["%s"] * len(val)) + ")"
                 elif criterion.operator == "BETWEEN":
-                    clause += "%s AND %s"
+                    filters += "%s AND %s"
                 params.extend(val)
             else:
-                clause += "%s"
+                filters += "%s"
                 params.append(val)
+        if query.search:
+            # no relevance ranking here (that needs the guide snapshot)
+            for word in re.findall(r"\w+", query.search):
+                filters += (
+                    " AND (title LIKE %s OR subtitle LIKE %s OR description LIKE %s)"
+                )
+                escaped = word.replace("_", "\\_")
+                params += [f"%{escaped}%"] * 3
 
-        total = 0
+        # the endtime cutoff moves every second, so it's left out of the count fingerprint
+        fingerprint = f"{tables} {clause}{filters} {json.dumps(params)}"
+        clause += (
+            "\nAND program.endtime >= "
+            + f"'{datetime.now(UTC).isoformat(timespec="seconds")}.000Z'"
+        )
+        clause += filters
 
         with get_connection() as conn:
-            with conn.cursor() as cursor:
-                count_sql = f"SELECT COUNT(*) {tables} {clause}"
-                logger.debug(f"Program count SQL: {count_sql}")
-                logger.debug(f"Program count params: {repr(params)}")
-                cursor.execute(count_sql, params)
-                total = cursor.fetchone()[0]
+            total = count_cache.get(fingerprint)
+            if total is None:
+                with conn.cursor() as cursor:
+                    count_sql = f"SELECT COUNT(*) {tables} {clause}"
+                    logger.debug(f"Program count SQL: {count_sql}")
+                    logger.debug(f"Program count params: {repr(params)}")
+                    cursor.execute(count_sql, params)
+                    total = cursor.fetchone()[0]
+                    count_cache.put(fingerprint, total, 1)
             with conn.cursor(dictionary=True) as cursor:
-                sql = f"SELECT {fields}\n{tables}\n{clause}"
                 sort_col = self.colsort(query.sort.name)
-                sql += f"\nORDER BY {sort_col} {query.sort.order}"
-                if sort_col == "airdate":
-                    sql += f", originalairdate {query.sort.order}"
-                if sort_col != "starttime":
-                    sql += ", starttime"
-                sql += f"\nLIMIT {query.paging.limit} OFFSET {query.paging.offset}"
+                keys = self.sort_keys(sort_col, query.sort.order)
+                if query.paging.cursor:
+                    seek, seek_params = self.seek_clause(
+                        keys, self.decode_cursor(query.paging.cursor, query.sort)
+                    )
+                    clause += f"\nAND ({seek})"
+                    params = params + seek_params
+                sql = f"SELECT {fields}, {sort_col} AS sortkey\n{tables}\n{clause}"
+                sql += "\nORDER BY " + ", ".join(
+                    f"{col} {order}" for col, order in keys
+                )
+                # one extra row tells whether there's a next page
+                sql += f"\nLIMIT {query.paging.limit + 1}"
+                if not query.paging.cursor:
+                    sql += f" OFFSET {query.paging.offset}"
                 logger.debug(f"Programs SQL: {sql}")
                 logger.debug(f"Programs params: {repr(params)}")
                 cursor.execute(sql, params)
-                response = ProgramsResponse(
-                    programs=[self.to_program(row) for row in cursor.fetchall()],
-                    total=total,
-                )
+                rows = cursor.fetchall()
+                page = rows[: query.paging.limit]
+                self.add_credit_counts(cursor, page)
+                response = ProgramsPage(rows=page, total=total)
+                if len(rows) > query.paging.limit:
+                    response.cursor = self.encode_cursor(
+                        query.sort, rows[query.paging.limit - 1]
+                    )
                 if query.debug:
                     response.query = DbQuery(sql=sql, params=params)
 
                 return response
 
+    def to_programs_response(self, page: ProgramsPage) -> ProgramsResponse:
+        return ProgramsResponse(
+            programs=[self.to_program(row) for row in page.rows],
+            total=page.total,
+            cursor=page.cursor,
+            query=page.query,
+        )
+
+    def add_credit_counts(self, cursor, rows: list[dict]):
+        """Sets row["credits"] using one grouped query for the whole page,
+        instead of a dependent COUNT(*) subquery for every program row.
+        """
+        if not rows:
+            return
+        sql = "SELECT chanid, starttime, COUNT(*) AS credits FROM credits"
+        sql += "\nWHERE (chanid, starttime) IN ("
+        sql += ", ".join(["(%s, %s)"] * len(rows)) + ")"
+        sql += "\nGROUP BY chanid, starttime"
+        params: list = []
+        for row in rows:
+            params += [row["chanid"], row["starttime"]]
+        cursor.execute(sql, params)
+        counts = {
+            (c["chanid"], c["starttime"]): c["credits"] for c in cursor.fetchall()
+        }
+        for row in rows:
+            row["credits"] = counts.get((row["chanid"], row["starttime"]), 0)
+
+    def sort_keys(self, sort_col: str, order: str) -> list[tuple[str, str]]:
+        """ORDER BY columns; chanid last makes the ordering total, as seek paging requires."""
+        keys = [(sort_col, order)]
+        if sort_col == "airdate":
+            keys.append(("originalairdate", order))
+        if sort_col != "starttime":
+            keys.append(("program.starttime", "asc"))
+        keys.append(("program.chanid", "asc"))
+        return keys
+
+    def seek_clause(
+        self, keys: list[tuple[str, str]], values: list
+    ) -> tuple[str, list]:
+        """Rows strictly after values in ORDER BY keys order (NULLs sort first ascending)."""
+        if len(values) != len(keys):
+            raise ValueError("Invalid cursor")
+        ors: list[str] = []
+        params: list = []
+        equal: list[str] = []
+        equal_params: list = []
+        for (col, order), val in zip(keys, values):
+            if val is None:
+                after = f"{col} IS NOT NULL" if order == "asc" else None
+                same = f"{col} IS NULL"
+                vals = []
+            else:
+                if order == "asc":
+                    after = f"{col} > %s"
+                else:
+                    after = f"({col} < %s OR {col} IS NULL)"
+                same = f"{col} = %s"
+                vals = [val]
+            if after:
+                ors.append("(" + " AND ".join(equal + [after]) + ")")
+                params += equal_params + vals
+            equal.append(same)
+            equal_params += vals
+        return " OR ".join(ors) or "FALSE", params
+
+    def encode_cursor(self, sort: Sort, row: dict) -> str:
+        values = [row["sortkey"]]
+        if self.colsort(sort.name) == "airdate":
+            values.append(row["originalairdate"])
+        if self.colsort(sort.name) != "starttime":
+            values.append(row["starttime"])
+        values.append(row["chanid"])
+        # values go back to the db as query params, so str() datetimes in db format
+        cursor = json.dumps([sort.name, sort.order, values], default=str)
+        return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+    def decode_cursor(self, cursor: str, sort: Sort) -> list:
+        try:
+            name, order, values = json.loads(base64.urlsafe_b64decode(cursor))
+        except (ValueError, TypeError):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        if name != sort.name or order != sort.order or not isinstance(values, list):
+            raise ValueError(f"Cursor does not match sort: {sort.name} {sort.order}")
+        return values
+
     def get_categories(self) -> list[str]:
         sql = "SELECT DISTINCT category FROM program ORDER BY category"
         with get_connection() as conn:
@@ -108,6 +247,8 @@ CONVERT(program.airdate USING utf8) as year, program.stars, program.season, prog
         return name
 
     def colsort(self, name: str) -> str:
+        if name == "relevance":
+            return "starttime"
         sort = self.colname(name)
         if sort == "channum":
             sort = "CAST(channum as unsigned)"
@@ -148,21 +289,8 @@ CONVERT(program.airdate USING utf8) as year, program.stars, program.season, prog
         return criterion.value
 
     def to_program(self, row: dict) -> Program:
-        channel = Channel(
-            id=row["chanid"],
-            number=row["channum"],
-            callsign=row["callsign"],
-            name=row["name"],
-        )
-        if row["icon"]:
-            channel.icon = ChannelIcon(file=row["icon"])
-            try:
-                channel.icon.shade = row["icon"].split("_")[1]
-            except IndexError:
-                pass
-
         return Program(
-            channel=channel,
+            channel=self.to_channel(row),
             title=row["title"],
             subtitle=row["subtitle"] or None,
             start=self.from_local_timezone(row["starttime"]),
@@ -179,5 +307,45 @@ CONVERT(program.airdate USING utf8) as year, program.stars, program.season, prog
             credits=row["credits"] or 0,
         )
 
+    def to_channel(self, row: dict) -> Channel:
+        """One Channel per chanid: a page repeats the same few channels, and an
+        existing Channel instance isn't revalidated when a Program is built.
+        """
+        channel = self.channels.get(row["chanid"])
+        if channel is None:
+            channel = Channel(
+                id=row["chanid"],
+                number=row["channum"],
+                callsign=row["callsign"],
+                name=row["name"],
+            )
+            if row["icon"]:
+                channel.icon = ChannelIcon(file=row["icon"])
+                try:
+                    channel.icon.shade = row["icon"].split("_")[1]
+                except IndexError:
+                    pass
+            self.channels[row["chanid"]] = channel
+        return channel
+
     def from_local_timezone(self, dt: datetime) -> datetime:
         return dt.replace(tzinfo=timezone.utc)
+
+
+class AsyncProgramData:
+    def __init__(self):
+        self.data = ProgramData()
+
+    async def get_programs(
+        self, query: Query, with_genres: bool = False
+    ) -> ProgramsResponse:
+        return await run_db(self.data.get_programs, query, with_genres)
+
+    async def get_page(self, query: Query, with_genres: bool = False) -> ProgramsPage:
+        return await run_db(self.data.get_page, query, with_genres)
+
+    async def get_categories(self) -> list[str]:
+        return await run_db(self.data.get_categories)
+
+    async def get_genres(self) -> list[str]:
+        return await run_db(self.data.get_genres)
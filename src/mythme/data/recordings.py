@@ -1,15 +1,23 @@
 import os
 import time
+import threading
+from dataclasses import replace
 from datetime import datetime
 from typing import Optional
+from fastapi.concurrency import run_in_threadpool
 from mythme.model.channel import Channel, ChannelIcon
 from mythme.model.credit import Credit
 from mythme.model.query import Query, Sort
 from mythme.model.recording import Recording, RecordingsResponse
 from mythme.model.scheduled import ScheduledRecording
 from mythme.utils.mythtv import (
+    api_cache,
     api_call,
+    api_call_async,
     api_update,
+    api_update_async,
+    cached_api_call,
+    cached_api_call_async,
     paging_params,
     get_storage_group_dirs,
 )
@@ -17,30 +25,72 @@ from mythme.utils.log import logger
 from mythme.utils.text import trim_article
 
 
+class ScheduledIndex:
+    """Immutable snapshot of upcoming recordings, keyed by (channel_id, start).
+
+    Where several recordings share a key, the one with the highest type wins.
+    """
+
+    def __init__(self, recordings: list[ScheduledRecording]):
+        self.recordings = recordings
+        self.winners: dict[tuple[int, datetime], ScheduledRecording] = {}
+        for sr in recordings:
+            key = self.key(sr.channel_id, sr.start)
+            winner = self.winners.get(key)
+            if winner is None or sr.type > winner.type:
+                self.winners[key] = sr
+
+    def key(self, channel_id: int, start: datetime) -> tuple[int, datetime]:
+        # match on wall-clock date/time regardless of tzinfo
+        return (channel_id, start.replace(tzinfo=None))
+
+    def find(self, channel_id: int, start: datetime) -> Optional[ScheduledRecording]:
+        return self.winners.get(self.key(channel_id, start))
+
+    def __len__(self) -> int:
+        return len(self.recordings)
+
+
 class RecordingsData:
-    scheduled_recordings: list[ScheduledRecording] = []
+    scheduled = ScheduledIndex([])
+    """Replaced wholesale (never mutated) so readers always see a complete index"""
+    scheduled_lock = threading.Lock()
+    """Serializes index updates"""
 
     def get_recordings(self, query: Query) -> RecordingsResponse:
         before = time.time()
+        recorded_params = self.recorded_params(query)
+        if recorded_params:
+            res = api_call(f"Dvr/GetRecorded?{recorded_params}")
+            result: Optional[dict] = self.recorded_result(res, recorded_params)
+        else:
+            result = cached_api_call("Dvr/GetRecordedList" + paging_params(query))
+        return self.to_recordings_response(result, query, before)
+
+    def recorded_params(self, query: Query) -> Optional[str]:
+        """Query params for a single recording identified by chanid and starttime."""
         chanid_crit = next(filter(lambda c: c.name == "chanid", query.criteria), None)
         starttime_crit = next(
             filter(lambda c: c.name == "starttime", query.criteria), None
         )
         if chanid_crit and starttime_crit:
-            q = f"ChanId={chanid_crit.value}&StartTime={starttime_crit.value}"
-            res = api_call(f"Dvr/GetRecorded?{q}")
-            if res is None or not res["Program"] or not res["Program"]["Recording"]:
-                raise ValueError(f"Unable to retrieve recording: {q}")
-            result: Optional[dict] = {"ProgramList": {"TotalAvailable": 1}}
-            pl: list[dict] = [res["Program"]]
-            if result:
-                result["ProgramList"]["Programs"] = pl
-        else:
-            result = api_call("Dvr/GetRecordedList" + paging_params(query))
+            return f"ChanId={chanid_crit.value}&StartTime={starttime_crit.value}"
+        return None
+
+    def recorded_result(self, res: Optional[dict], q: str) -> dict:
+        """Shape a single Dvr/GetRecorded result like a Dvr/GetRecordedList result."""
+        if res is None or not res["Program"] or not res["Program"]["Recording"]:
+            raise ValueError(f"Unable to retrieve recording: {q}")
+        return {"ProgramList": {"TotalAvailable": 1, "Programs": [res["Program"]]}}
+
+    def to_recordings_response(
+        self, result: Optional[dict], query: Query, before: float
+    ) -> RecordingsResponse:
         total = 0
         if result and "ProgramList" in result and "Programs" in result["ProgramList"]:
+            channels: dict[int, Channel] = {}
             recordings = [
-                self.to_recording(prog)
+                self.to_recording(prog, channels)
                 for prog in result["ProgramList"]["Programs"]
                 if "RecGroup" not in prog["Recording"]
                 or prog["Recording"]["RecGroup"] != "Deleted"
@@ -62,6 +112,9 @@ class RecordingsData:
 
     def get_recording(self, recid: int) -> Optional[Recording]:
         result = api_call(f"Dvr/GetRecorded?RecordedId={recid}")
+        return self.recording_result(result)
+
+    def recording_result(self, result: Optional[dict]) -> Optional[Recording]:
         prog = result["Program"] if result and "Program" in result else None
         if prog:
             rec = prog["Recording"] if "Recording" in prog else None
@@ -70,7 +123,9 @@ class RecordingsData:
         return None
 
     def delete_recording(self, recid: int) -> bool:
-        return api_update(path=f"Dvr/DeleteRecording?RecordedId={recid}")
+        deleted = api_update(path=f"Dvr/DeleteRecording?RecordedId={recid}")
+        api_cache.invalidate("Dvr/GetRecordedList")
+        return deleted
 
     def sort(self, recording: Recording, sort: Sort) -> tuple:
         """Sort according to query."""
@@ -95,30 +150,41 @@ class RecordingsData:
         logger.info("Loading scheduled recordings...")
         result = api_call("Dvr/GetUpcomingList")
         if result:
-            RecordingsData.scheduled_recordings = [
-                self.to_scheduled_recording(sr)
-                for sr in result["ProgramList"]["Programs"]
-            ]
+            scheduled = ScheduledIndex(
+                [
+                    self.to_scheduled_recording(sr)
+                    for sr in result["ProgramList"]["Programs"]
+                ]
+            )
+            with RecordingsData.scheduled_lock:
+                RecordingsData.scheduled = scheduled
             logger.info(
-                f"Loaded {len(RecordingsData.scheduled_recordings)} scheduled recordings in: {(time.time() - before):.2f} seconds\n"  # noqa: E501
+                f"Loaded {len(scheduled)} scheduled recordings in: {(time.time() - before):.2f} seconds\n"  # noqa: E501
             )
         else:
             logger.error("Failed to load scheduled recordings")
 
-    def to_recording(self, prog: dict) -> Recording:
+    def to_recording(
+        self, prog: dict, channels: Optional[dict[int, Channel]] = None
+    ) -> Recording:
+        """channels: shared by recordings in a list, keyed by chanid"""
         chan = prog["Channel"]
-        channel = Channel(
-            id=chan["ChanId"],
-            number=chan["ChanNum"],
-            callsign=chan["CallSign"],
-            name=chan["ChannelName"],
-        )
-        if "Icon" in chan:
-            channel.icon = ChannelIcon(file=chan["Icon"])
-            try:
-                channel.icon.shade = chan["Icon"].split("_")[1]
-            except IndexError:
-                pass
+        channel = channels.get(chan["ChanId"]) if channels is not None else None
+        if channel is None:
+            channel = Channel(
+                id=chan["ChanId"],
+                number=chan["ChanNum"],
+                callsign=chan["CallSign"],
+                name=chan["ChannelName"],
+            )
+            if "Icon" in chan:
+                channel.icon = ChannelIcon(file=chan["Icon"])
+                try:
+                    channel.icon.shade = chan["Icon"].split("_")[1]
+                except IndexError:
+                    pass
+            if channels is not None:
+                channels[chan["ChanId"]] = channel
 
         rec = prog["Recording"]
 
@@ -148,20 +214,11 @@ class RecordingsData:
                 recording.episode = prog["Episode"]
         recording.credits = []
         if "Cast" in prog and "CastMembers" in prog["Cast"]:
+            seen: set[tuple[str, str]] = set()
             for cm in prog["Cast"]["CastMembers"]:
-                credit = Credit(name=cm["Name"], role=cm["Role"])
-                if (
-                    next(
-                        (
-                            c
-                            for c in recording.credits
-                            if c.name == credit.name and c.role == credit.role
-                        ),
-                        None,
-                    )
-                    is None
-                ):
-                    recording.credits.append(credit)
+                if (cm["Name"], cm["Role"]) not in seen:
+                    seen.add((cm["Name"], cm["Role"]))
+                    recording.credits.append(Credit(name=cm["Name"], role=cm["Role"]))
 
         return recording
 
@@ -177,30 +234,28 @@ class RecordingsData:
     def find_scheduled_recording(
         self, channel_id: int, start: datetime
     ) -> Optional[ScheduledRecording]:
-        recording: Optional[ScheduledRecording] = None
-        for sr in RecordingsData.scheduled_recordings:
-            if (
-                sr.channel_id == channel_id
-                and sr.start.date() == start.date()
-                and sr.start.time() == start.time()
-                and (recording is None or sr.type > recording.type)
-            ):
-                recording = sr
-        return recording
+        return RecordingsData.scheduled.find(channel_id, start)
 
     def set_scheduled_recording(self, recording: ScheduledRecording):
-        rec = self.find_scheduled_recording(recording.channel_id, recording.start)
-        if rec:
-            rec.id = recording.id
-            rec.type = recording.type
-            rec.status = recording.status
-        else:
-            RecordingsData.scheduled_recordings.append(recording)
+        with RecordingsData.scheduled_lock:
+            scheduled = RecordingsData.scheduled
+            rec = scheduled.find(recording.channel_id, recording.start)
+            if rec:
+                updated = replace(
+                    rec, id=recording.id, type=recording.type, status=recording.status
+                )
+                recordings = [
+                    updated if sr is rec else sr for sr in scheduled.recordings
+                ]
+            else:
+                recordings = scheduled.recordings + [recording]
+            RecordingsData.scheduled = ScheduledIndex(recordings)
 
     def remove_scheduled_recording(self, id: int):
-        RecordingsData.scheduled_recordings = [
-            sr for sr in RecordingsData.scheduled_recordings if sr.id != id
-        ]
+        with RecordingsData.scheduled_lock:
+            RecordingsData.scheduled = ScheduledIndex(
+                [sr for sr in RecordingsData.scheduled.recordings if sr.id != id]
+            )
 
     def get_recording_file(self, recording: Recording) -> Optional[str]:
         sg_dirs = get_storage_group_dirs(recording.group)
@@ -210,3 +265,32 @@ class RecordingsData:
                 if os.path.isfile(filepath):
                     return filepath
         return None
+
+
+class AsyncRecordingsData:
+    def __init__(self):
+        self.data = RecordingsData()
+
+    async def get_recordings(self, query: Query) -> RecordingsResponse:
+        before = time.time()
+        recorded_params = self.data.recorded_params(query)
+        if recorded_params:
+            res = await api_call_async(f"Dvr/GetRecorded?{recorded_params}")
+            result: Optional[dict] = self.data.recorded_result(res, recorded_params)
+        else:
+            result = await cached_api_call_async(
+                "Dvr/GetRecordedList" + paging_params(query)
+            )
+        # converting and sorting a full list takes a while: keep it off the event loop
+        return await run_in_threadpool(
+            self.data.to_recordings_response, result, query, before
+        )
+
+    async def get_recording(self, recid: int) -> Optional[Recording]:
+        result = await api_call_async(f"Dvr/GetRecorded?RecordedId={recid}")
+        return await run_in_threadpool(self.data.recording_result, result)
+
+    async def delete_recording(self, recid: int) -> bool:
+        deleted = await api_update_async(path=f"Dvr/DeleteRecording?RecordedId={recid}")
+        api_cache.invalidate("Dvr/GetRecordedList")
+        return deleted
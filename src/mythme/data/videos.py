@@ -4,24 +4,42 @@ import textwrap
 import random
 from datetime import datetime
 from typing import Optional, Tuple, Union
+from fastapi.concurrency import run_in_threadpool
 from mythme.model.credit import Credit
 from mythme.model.query import Criterion, Paging, Query, Sort
-from mythme.model.video import DailyVid, Video, VideosResponse, WebRef
-from mythme.utils.dailyvids import load_watched_vids
-from mythme.utils.db import get_connection
+from mythme.model.video import (
+    DailyVid,
+    Video,
+    VideoSyncResponse,
+    VideoSyncTimings,
+    VideosResponse,
+    WebRef,
+)
+from mythme.utils.dailyvids import get_watched_store
+from mythme.utils.db import get_connection, run_db
 from mythme.utils.media import media_file_path
 from mythme.utils.mythtv import (
     api_call,
+    api_call_async,
     api_update,
     get_myth_hostname,
     get_storage_group_dirs,
-    paging_params,
 )
-from mythme.utils.text import gen_hash, safe_filename, trim_article
+from mythme.utils.scanner import VideoScanner
+from mythme.utils.text import gen_hash, safe_filename
 from mythme.utils.config import config
 from mythme.utils.log import logger
 
 MOVIE_DIRS = ["Film Noir", "Home Movies", "Pre-Code", "Silent", "Watchable"]
+TITLE_SORT_KEY = (
+    "CASE WHEN LEFT(LOWER(title), 2) = 'a ' THEN SUBSTRING(LOWER(title), 3)"
+    " WHEN LEFT(LOWER(title), 3) = 'an ' THEN SUBSTRING(LOWER(title), 4)"
+    " WHEN LEFT(LOWER(title), 4) = 'the ' THEN SUBSTRING(LOWER(title), 5)"
+    " ELSE LOWER(title) END"
+)
+"""trim_article(title.lower()), in SQL (no % so it's safe alongside parameters)"""
+SQL_BATCH_SIZE = 1000
+"""Values per IN (...) list"""
 
 
 class VideoData:
@@ -55,69 +73,122 @@ class VideoData:
 
     values = [f"%({field})s" for field in db_fields]
 
+    def __init__(self):
+        self.manifest_file = f"{config.mythme_dir}/video-manifest.json"
+
     def get_videos(self, query: Query) -> VideosResponse:
-        """Uses the MythTV API"""
+        """Queries videometadata, with filtering, sorting and paging done in SQL
+        (so a page costs the same however large the library)."""
         before = time.time()
-        id_crit = next(filter(lambda c: c.name == "id", query.criteria), None)
-        if id_crit:
-            res = api_call(f"Video/GetVideo?Id={id_crit.value}")
-            if (
-                res is None
-                or not res["VideoMetadataInfo"]
-                or not res["VideoMetadataInfo"]["Id"]
-            ):
-                raise ValueError(f"Unable to retrieve video: {id_crit.value}")
-            result: Optional[dict] = {"VideoMetadataInfoList": {"Count": 1}}
-            vmis: list[dict] = [res["VideoMetadataInfo"]]
-            if result:
-                result["VideoMetadataInfoList"]["VideoMetadataInfos"] = vmis
+        where, params = self.videos_where(query)
+        columns = "intid, title, subtitle, filename, releasedate, plot, userrating, director, coverfile, inetref"  # noqa: E501
+        sql = f"SELECT {columns} FROM videometadata{where} ORDER BY {self.videos_order(query.sort)}"  # noqa: E501 # nosec B608
+        paging = query.paging
+        if paging.limit:
+            sql += f" LIMIT {int(paging.limit)} OFFSET {int(paging.offset)}"
+        watched_files = get_watched_store().get_watched()
+        with get_connection() as conn:
+            with conn.cursor(dictionary=True) as cursor:
+                cursor.execute(
+                    f"SELECT COUNT(*) AS total FROM videometadata{where}",  # nosec B608
+                    params,
+                )
+                total = cursor.fetchone()["total"]
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+                actors = self.get_actors(cursor, [row["intid"] for row in rows])
+                found = self.get_filepaths_in(
+                    cursor, where, params, list(watched_files.keys())
+                )
+
+        crits = {crit.name: crit.value for crit in query.criteria}
+        if "id" in crits and not rows:
+            raise ValueError(f"Unable to retrieve video: {crits['id']}")
+        if not crits.keys() & {"id", "ext"} and crits.get("movies") != "true":
+            # dailyvids should all be in the list
+            for file in watched_files.keys() - found:
+                logger.error(f"Unfound dailyvid: '{file}'")
+
+        videos: list[Video] = []
+        for row in rows:
+            video = self.to_db_video(row, actors.get(row["intid"]))
+            video.watched = watched_files.get(video.file)
+            videos.append(video)
+        logger.info(
+            f"Retrieved {len(videos)} of {total} videos in: {(time.time() - before):.2f} seconds\n"
+        )
+        return VideosResponse(videos=videos, total=total, watched=len(found))
+
+    def videos_where(self, query: Query) -> tuple[str, list]:
+        """WHERE clause (or empty) for id, movies and ext criteria."""
+        clauses: list[str] = []
+        params: list = []
+        for crit in query.criteria:
+            if crit.name == "id":
+                clauses.append("intid = %s")
+                params.append(crit.value)
+            elif crit.name == "movies" and crit.value in ["true", "false"]:
+                # movies are in the top-level MOVIE_DIRS
+                dirs = " OR ".join(["filename LIKE %s"] * len(MOVIE_DIRS))
+                clauses.append(f"({dirs})" if crit.value == "true" else f"NOT ({dirs})")
+                params += [f"{self.escape_like(d)}/%" for d in MOVIE_DIRS]
+            elif crit.name == "ext":
+                clauses.append("filename LIKE %s")
+                params.append(f"%.{self.escape_like(crit.value)}")
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def videos_order(self, sort: Sort) -> str:
+        """ORDER BY for sort (id if unnamed), with intid as tiebreaker."""
+        desc = " DESC" if sort.order == "desc" else ""
+        if not sort.name or sort.name == "id":
+            return f"intid{desc}"
+        elif sort.name == "file":
+            return f"LOWER(filename){desc}, intid{desc}"
+        elif sort.name == "title":
+            return f"{TITLE_SORT_KEY}{desc}, intid{desc}"
         else:
-            result = api_call("Video/GetVideoList" + paging_params(query))
-        if (
-            result
-            and "VideoMetadataInfoList" in result
-            and "VideoMetadataInfos" in result["VideoMetadataInfoList"]
-        ):
-            videos = [
-                self.to_video(vid)
-                for vid in result["VideoMetadataInfoList"]["VideoMetadataInfos"]
-            ]
-            logger.info(
-                f"Retrieved {len(videos)} videos in: {(time.time() - before):.2f} seconds\n"
+            raise ValueError(f"Unsupported sort: {sort.name}")
+
+    def get_actors(self, cursor, videoids: list[int]) -> dict[int, list[str]]:
+        """Cast names by videoid."""
+        actors: dict[int, list[str]] = {}
+        for i in range(0, len(videoids), SQL_BATCH_SIZE):
+            batch = videoids[i : i + SQL_BATCH_SIZE]
+            cursor.execute(
+                "SELECT vmc.idvideo, vc.cast FROM videometadatacast vmc"  # nosec B608
+                " JOIN videocast vc ON vc.intid = vmc.idcast"
+                f" WHERE vmc.idvideo IN ({', '.join(['%s'] * len(batch))})"
+                " ORDER BY vmc.idvideo, vmc.idcast",
+                batch,
             )
-        else:
-            raise Exception("Failed to retrieve videos")
-
-        movies_crit = next(filter(lambda c: c.name == "movies", query.criteria), None)
-        if movies_crit:
-            if movies_crit.value == "true":
-                videos = [v for v in videos if v.file.split("/")[0] in MOVIE_DIRS]
-            elif movies_crit.value == "false":
-                videos = [v for v in videos if v.file.split("/")[0] not in MOVIE_DIRS]
-
-        if query.sort.name and query.sort.name != "id":
-            videos.sort(
-                key=lambda vid: self.sort(vid, query.sort),
-                reverse=True if query.sort.order == "desc" else False,
+            for row in cursor.fetchall():
+                actors.setdefault(row["idvideo"], []).append(row["cast"])
+        return actors
+
+    def get_filepaths_in(
+        self, cursor, where: str, params: list, filepaths: list[str]
+    ) -> set[str]:
+        """Those of filepaths in videometadata (and matching where)."""
+        found: set[str] = set()
+        for i in range(0, len(filepaths), SQL_BATCH_SIZE):
+            batch = filepaths[i : i + SQL_BATCH_SIZE]
+            in_files = f"filename IN ({', '.join(['%s'] * len(batch))})"
+            cursor.execute(
+                f"SELECT filename FROM videometadata{where} {'AND' if where else 'WHERE'} {in_files}",  # noqa: E501 # nosec B608
+                params + batch,
             )
+            found.update(row["filename"] for row in cursor.fetchall())
+        return found
 
-        watched_videos = load_watched_vids(videos, id_crit is None)
-        total = len(videos)
-        watched = 0
-        for vid in videos:
-            if vid.file in watched_videos:
-                vid.watched = watched_videos[vid.file]
-                watched += 1
-
-        ext_crit = next(filter(lambda c: c.name == "ext", query.criteria), None)
-        if ext_crit:
-            videos = [v for v in videos if v.file.endswith(f".{ext_crit.value}")]
-
-        return VideosResponse(videos=videos, total=total, watched=watched)
+    def escape_like(self, value: str) -> str:
+        return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
     def get_video(self, path: str) -> Optional[Video]:
         """Uses the MythTV API"""
         res = api_call(f"/Video/GetVideoByFileName?FileName={path}")
+        return self.video_result(res)
+
+    def video_result(self, res: Optional[dict]) -> Optional[Video]:
         if (
             res
             and "VideoMetadataInfo" in res
@@ -141,14 +212,7 @@ class VideoData:
 
     def get_video_by_file(self, filename: str) -> Optional[Video]:
         res = api_call(f"/Video/GetVideoByFileName?FileName={filename}")
-        if (
-            res
-            and "VideoMetadataInfo" in res
-            and "Id" in res["VideoMetadataInfo"]
-            and res["VideoMetadataInfo"]["Id"]
-        ):
-            return self.to_video(res["VideoMetadataInfo"])
-        return None
+        return self.video_result(res)
 
     def get_video_file(self, title: str, category: str, medium: str) -> Optional[str]:
         """Checks the file system, returns the full file path"""
@@ -177,11 +241,13 @@ class VideoData:
 
     def add_video(self, filepath: str, host: str) -> bool:
         """Add video metadata. File should exist on fs."""
-        return api_update(f"Video/AddVideo?FileName={filepath}&HostName={host}")
+        added = api_update(f"Video/AddVideo?FileName={filepath}&HostName={host}")
+        return added
 
     def update_video(self, video: Video) -> bool:
         """Uses the MythTV API"""
-        return api_update("Video/UpdateVideoMetadata", params=self.from_video(video))
+        updated = api_update("Video/UpdateVideoMetadata", params=self.from_video(video))
+        return updated
 
     def delete_video_metadata(self) -> int:
         """Deletes all video metadata directly from the database"""
@@ -221,17 +287,28 @@ class VideoData:
                     filepaths[filename] = intid
                 return filepaths
 
-    def get_fs_filepaths(self) -> Optional[list[str]]:
+    def get_db_filepaths_under(self, paths: set[str]) -> set[str]:
+        """DB file paths equal to one of paths, or inside one of them as a directory."""
+        if not paths:
+            return set()
+        clauses: list[str] = []
+        params: list[str] = []
+        for path in paths:
+            escaped = self.escape_like(path)
+            clauses.append("filename = %s OR filename LIKE %s")
+            params += [path, f"{escaped}/%"]
+        sql = f"SELECT filename FROM videometadata WHERE {' OR '.join(clauses)}"  # nosec B608
+        with get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                return {row[0] for row in cursor.fetchall()}
+
+    def get_fs_filepaths(self) -> Optional[set[str]]:
         sg_dirs = get_storage_group_dirs("Videos")
         if sg_dirs is None:
             return None
         logger.info(f"Scanning video storage group directories: {sg_dirs}")
-        filepaths: list[str] = []
-        for sg_dir in sg_dirs:
-            for root, _dirs, files in os.walk(sg_dir):
-                for file in files:
-                    filepaths.append(os.path.join(root[len(sg_dir) + 1 :], file))
-        return filepaths
+        return VideoScanner(self.manifest_file).scan(sg_dirs)
 
     def get_insert_sql(self) -> str:
         return f"INSERT INTO videometadata ({', '.join(self.db_fields)}) VALUES ({', '.join(self.values)})"  # noqa: E501 # nosec B608
@@ -248,108 +325,232 @@ class VideoData:
             + " WHERE filename = %(filename)s"
         )
 
+    def get_insert_many_sql(self) -> str:
+        """Positional variant of get_insert_sql for executemany."""
+        return f"INSERT INTO videometadata ({', '.join(self.db_fields)}) VALUES ({', '.join(['%s'] * len(self.db_fields))})"  # noqa: E501 # nosec B608
+
+    def get_update_many_sql(self) -> str:
+        """Positional variant of get_update_sql for executemany (filename last)."""
+        return (
+            "UPDATE videometadata SET "  # nosec B608
+            + ", ".join([f"{field} = %s" for field in self.db_fields])
+            + " WHERE filename = %s"
+        )
+
+    def is_video_file(self, filepath: str) -> bool:
+        """Has an extension and isn't hidden (eg: a copy's temp file)."""
+        name = os.path.basename(filepath)
+        return not name.startswith(".") and "." in name
+
     def scan_videos(self) -> Optional[Tuple[list[str], list[str]]]:
         """Crawls file system and updates the database. Returns a tuple with added/deleted filepaths."""
         fs_filepaths = self.get_fs_filepaths()
         if fs_filepaths is None:
             return None
-        db_filepaths = self.get_db_filepaths()
-        deleted: list[str] = []
-        with get_connection() as conn:
-            with conn.cursor(dictionary=True) as cursor:
-                for db_filepath in db_filepaths:
-                    file_exists = db_filepath in fs_filepaths
-                    if not file_exists:
-                        logger.info(
-                            f"Deleting metadata for unfound file: {db_filepath}"
-                        )
-                        cursor.execute(
-                            "DELETE FROM videometadata WHERE filename = %s",
-                            (db_filepath,),
-                        )
-                        deleted.append(db_filepath)
+        db_filepaths = self.get_db_filepaths().keys()
+        deleted = sorted(db_filepaths - fs_filepaths)
+        added = sorted(
+            fs_filepath
+            for fs_filepath in fs_filepaths - db_filepaths
+            if self.is_video_file(fs_filepath)
+        )
+        self.apply_scan(added, deleted)
+        return (added, deleted)
 
-        added: list[str] = []
-        with get_connection() as conn:
-            with conn.cursor(dictionary=True) as cursor:
-                for fs_filepath in fs_filepaths:
-                    if (
-                        fs_filepath not in db_filepaths and fs_filepath.rfind(".") > 0
-                    ):  # not known and not hidden
-                        logger.info(f"Found new video file: {fs_filepath}")
-                        data = (
-                            self.base_sql_data(fs_filepath)
-                            | self.info_sql_data()
-                            | self.unused_sql_data()
-                        )
-                        sql = self.get_insert_sql()
-                        cursor.execute(sql, data)
-                        added.append(fs_filepath)
+    def sync_changed_paths(
+        self, sg_dirs: list[str], changed: set[str]
+    ) -> Tuple[list[str], list[str]]:
+        """Like scan_videos, but only for changed files/dirs (full paths under sg_dirs)."""
+        relpaths: set[str] = set()
+        for path in changed:
+            sg_dir = next((d for d in sg_dirs if path.startswith(f"{d}/")), None)
+            if sg_dir:
+                relpaths.add(path[len(sg_dir) + 1 :])
+
+        fs_filepaths: set[str] = set()
+        for relpath in relpaths:
+            for sg_dir in sg_dirs:
+                path = os.path.join(sg_dir, relpath)
+                if os.path.isfile(path):
+                    fs_filepaths.add(relpath)
+                elif os.path.isdir(path):
+                    for root, _dirs, files in os.walk(path):
+                        for file in files:
+                            fs_filepaths.add(
+                                os.path.join(root[len(sg_dir) + 1 :], file)
+                            )
+        db_filepaths = self.get_db_filepaths_under(relpaths)
+        added = sorted(
+            fs_filepath
+            for fs_filepath in fs_filepaths - db_filepaths
+            if self.is_video_file(fs_filepath)
+        )
+        deleted = sorted(
+            db_filepath
+            for db_filepath in db_filepaths - fs_filepaths
+            if not any(os.path.isfile(os.path.join(d, db_filepath)) for d in sg_dirs)
+        )
+        self.apply_scan(added, deleted)
         return (added, deleted)
 
-    def sync_video_metadata(
-        self, videos: list[Video]
-    ) -> Optional[Tuple[list[str], list[str]]]:
-        """Updates matching videos in the database"""
+    def apply_scan(self, added: list[str], deleted: list[str]):
+        """Inserts/deletes videometadata rows for added/deleted files in one transaction."""
+        if not added and not deleted:
+            return
+        for db_filepath in deleted:
+            logger.info(f"Deleting metadata for unfound file: {db_filepath}")
+        rows: list[tuple] = []
+        for fs_filepath in added:
+            logger.info(f"Found new video file: {fs_filepath}")
+            data = (
+                self.base_sql_data(fs_filepath)
+                | self.info_sql_data()
+                | self.unused_sql_data()
+            )
+            rows.append(tuple(data[field] for field in self.db_fields))
+
+        with get_connection() as conn:
+            conn.begin()
+            try:
+                with conn.cursor() as cursor:
+                    if deleted:
+                        cursor.executemany(
+                            "DELETE FROM videometadata WHERE filename = %s",
+                            [(db_filepath,) for db_filepath in deleted],
+                        )
+                    if rows:
+                        cursor.executemany(self.get_insert_many_sql(), rows)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def sync_video_metadata(self, videos: list[Video]) -> Optional[VideoSyncResponse]:
+        """Updates matching videos in the database, in one transaction.
+        Cast names and links are looked up and inserted in batches rather than per actor."""
+        before = time.perf_counter()
         sg_dirs = get_storage_group_dirs("Videos")
         if sg_dirs is None:
             return None
         updated: list[str] = []
         missing: list[str] = []
         db_filepaths = self.get_db_filepaths()
+        rows: list[tuple] = []
+        actors: dict[int, list[str]] = {}  # cast names by videoid
+        for vid in videos:
+            filepath = self.get_filepath(vid.title, vid.category, vid.medium)
+            if not filepath:
+                if vid.medium != "DVD":
+                    missing.append(vid.title)
+                continue
+            if filepath not in db_filepaths:
+                logger.info(f"Video missing from database: {filepath}")
+                missing.append(filepath)
+                continue
+            logger.info(f"Update existing video title: {vid.title}")
+            data = (
+                self.base_sql_data(filepath)
+                | self.info_sql_data(vid)
+                | self.unused_sql_data()
+                | {"contenttype": "MOVIE"}
+            )
+            rows.append(tuple(data[field] for field in self.db_fields) + (filepath,))
+            if vid.credits:
+                actors[db_filepaths[filepath]] = [
+                    c.name for c in vid.credits if c.role == "actor"
+                ]
+            updated.append(vid.title)
+
+        timings = {"resolve_ms": time.perf_counter() - before}
         with get_connection() as conn:
-            with conn.cursor(dictionary=True) as cursor:
-                for vid in videos:
-                    filepath = self.get_filepath(vid.title, vid.category, vid.medium)
-                    if not filepath:
-                        if vid.medium != "DVD":
-                            missing.append(vid.title)
-                        continue
-                    row_exists = filepath in db_filepaths
-                    if row_exists:
-                        logger.info(f"Update existing video title: {vid.title}")
-                        sql = self.get_update_sql()
-                        data = (
-                            self.base_sql_data(filepath)
-                            | self.info_sql_data(vid)
-                            | self.unused_sql_data()
-                            | {"contenttype": "MOVIE"}
+            conn.begin()
+            try:
+                with conn.cursor() as cursor:
+                    step = time.perf_counter()
+                    if rows:
+                        cursor.executemany(self.get_update_many_sql(), rows)
+                    timings["metadata_ms"] = time.perf_counter() - step
+
+                    step = time.perf_counter()
+                    cast_names = {name for names in actors.values() for name in names}
+                    cast_ids = self.get_cast_ids(cursor, cast_names)
+                    new_names = {
+                        name.lower(): name
+                        for name in cast_names
+                        if name.lower() not in cast_ids
+                    }
+                    if new_names:
+                        cursor.executemany(
+                            "INSERT INTO videocast (cast) VALUES (%s)",
+                            [(name,) for name in new_names.values()],
                         )
-                        cursor.execute(sql, data)
-                        videoid = db_filepaths[filepath]
-                        if vid.credits:
-                            actors = [c.name for c in vid.credits if c.role == "actor"]
-                            for actor in actors:
-                                cursor.execute(
-                                    "SELECT intid FROM videocast where cast = %(cast)s",
-                                    {"cast": actor},
-                                )
-                                row = cursor.fetchone()
-                                castid = row["intid"] if row else None
-                                if not castid:
-                                    cursor.execute(
-                                        "INSERT INTO videocast (cast) VALUES (%(cast)s)",
-                                        {"cast": actor},
-                                    )
-                                    castid = cursor.lastrowid
-                                cursor.execute(
-                                    "SELECT 1 FROM videometadatacast WHERE idvideo = %(idvideo)s AND idcast = %(idcast)s",  # noqa: E501
-                                    {"idvideo": videoid, "idcast": castid},
-                                )
-                                if cursor.fetchone() is None:
-                                    cursor.execute(
-                                        "INSERT INTO videometadatacast (idvideo, idcast) VALUES (%(idvideo)s, %(idcast)s)",  # noqa: E501
-                                        {"idvideo": videoid, "idcast": castid},
-                                    )
-
-                        updated.append(vid.title)
-                    else:
-                        logger.info(f"Video missing from database: {filepath}")
-                        missing.append(filepath)
-
-        return (updated, missing)
+                        cast_ids |= self.get_cast_ids(cursor, set(new_names.values()))
+                    timings["cast_ms"] = time.perf_counter() - step
+
+                    step = time.perf_counter()
+                    links: set[tuple[int, int]] = set()
+                    for videoid, names in actors.items():
+                        for name in names:
+                            castid = cast_ids.get(name.lower())
+                            if castid is None:
+                                # collation folded it some other way (eg: accents)
+                                logger.warning(f"Cast id not found for: {name}")
+                            else:
+                                links.add((videoid, castid))
+                    links -= self.get_cast_links(cursor, list(actors.keys()))
+                    if links:
+                        cursor.executemany(
+                            "INSERT IGNORE INTO videometadatacast (idvideo, idcast) VALUES (%s, %s)",  # noqa: E501
+                            sorted(links),
+                        )
+                    timings["links_ms"] = time.perf_counter() - step
+
+                step = time.perf_counter()
+                conn.commit()
+                timings["commit_ms"] = time.perf_counter() - step
+            except Exception:
+                conn.rollback()
+                raise
+
+        timings["total_ms"] = time.perf_counter() - before
+        return VideoSyncResponse(
+            updated=updated,
+            missing=missing,
+            timings=VideoSyncTimings(
+                **{name: round(secs * 1000, 1) for name, secs in timings.items()}
+            ),
+        )
+
+    def get_cast_ids(self, cursor, names: set[str]) -> dict[str, int]:
+        """videocast intids by lowercase name (names compare case-insensitively in MySQL)."""
+        cast_ids: dict[str, int] = {}
+        ordered = sorted(names)
+        for i in range(0, len(ordered), SQL_BATCH_SIZE):
+            batch = ordered[i : i + SQL_BATCH_SIZE]
+            cursor.execute(
+                f"SELECT intid, cast FROM videocast WHERE cast IN ({', '.join(['%s'] * len(batch))})",  # noqa: E501 # nosec B608
+                batch,
+            )
+            for intid, cast in cursor.fetchall():
+                cast_ids.setdefault(cast.lower(), intid)
+        return cast_ids
+
+    def get_cast_links(self, cursor, videoids: list[int]) -> set[tuple[int, int]]:
+        """Existing (idvideo, idcast) pairs for videoids."""
+        links: set[tuple[int, int]] = set()
+        for i in range(0, len(videoids), SQL_BATCH_SIZE):
+            batch = videoids[i : i + SQL_BATCH_SIZE]
+            cursor.execute(
+                f"SELECT idvideo, idcast FROM videometadatacast WHERE idvideo IN ({', '.join(['%s'] * len(batch))})",  # noqa: E501 # nosec B608
+                batch,
+            )
+            links.update((idvideo, idcast) for idvideo, idcast in cursor.fetchall())
+        return links
 
     def next_dailyvid(self, ext: Optional[str] = None) -> Optional[DailyVid]:
+        return self.to_dailyvid(self.get_videos(self.dailyvids_query(ext)))
+
+    def dailyvids_query(self, ext: Optional[str] = None) -> Query:
         query = Query(
             criteria=[Criterion(name="movies", value="false")],
             sort=Sort(name="file"),
@@ -357,7 +558,9 @@ class VideoData:
         )
         if ext:
             query.criteria.append(Criterion(name="ext", value=ext))
-        vids = self.get_videos(query)
+        return query
+
+    def to_dailyvid(self, vids: VideosResponse) -> Optional[DailyVid]:
         videos = vids.videos
         watched: list[Video] = []
         unwatched: list[Video] = []
@@ -386,16 +589,6 @@ class VideoData:
             latest=latest,
         )
 
-    def sort(self, video: Video, sort: Sort) -> tuple:
-        """Sort according to query."""
-        if sort.name == "file":
-            return (video.file.lower(), video.id)
-        elif sort.name == "title":
-            title = trim_article(video.title.lower())
-            return (title, video.id)
-        else:
-            raise ValueError(f"Unsupported sort: {sort.name}")
-
     def get_title(self, file: str) -> str:
         filename = file[file.rindex("/") + 1 :]
         title = filename[: filename.rindex(".")]
@@ -504,6 +697,30 @@ class VideoData:
             video.webref = WebRef(site="imdb.com", ref=vid["Inetref"])
         return video
 
+    def to_db_video(self, row: dict, actors: Optional[list[str]] = None) -> Video:
+        """Like to_video, from a videometadata row."""
+        video = Video(id=row["intid"], title=row["title"], file=row["filename"])
+        if row["subtitle"]:
+            video.subtitle = row["subtitle"]
+        if row["releasedate"] and row["releasedate"].year:
+            video.year = row["releasedate"].year
+        if row["plot"] and row["plot"] != "None":
+            video.description = row["plot"]
+        if row["userrating"]:
+            video.rating = row["userrating"] / 2
+        credits: list[Credit] = []
+        if row["director"] and row["director"] != "Unknown":
+            credits.append(Credit(name=row["director"], role="director"))
+        for actor in actors or []:
+            credits.append(Credit(name=actor, role="actor"))
+        if len(credits):
+            video.credits = credits
+        if row["coverfile"]:
+            video.poster = row["coverfile"][row["coverfile"].rfind("/") + 1 :]
+        if row["inetref"] and row["inetref"] != "00000000":
+            video.webref = WebRef(site="imdb.com", ref=row["inetref"])
+        return video
+
     def from_video(self, video: Video) -> dict:
         vid = {"Id": video.id, "Title": video.title}
         if video.subtitle:
@@ -534,3 +751,24 @@ class VideoData:
             vid["Inetref"] = video.webref.ref
 
         return vid
+
+
+class AsyncVideoData:
+    def __init__(self):
+        self.data = VideoData()
+
+    async def get_videos(self, query: Query) -> VideosResponse:
+        return await run_db(self.data.get_videos, query)
+
+    async def get_video(self, path: str) -> Optional[Video]:
+        """Uses the MythTV API"""
+        res = await api_call_async(f"/Video/GetVideoByFileName?FileName={path}")
+        return await run_in_threadpool(self.data.video_result, res)
+
+    async def get_video_by_file(self, filename: str) -> Optional[Video]:
+        res = await api_call_async(f"/Video/GetVideoByFileName?FileName={filename}")
+        return await run_in_threadpool(self.data.video_result, res)
+
+    async def next_dailyvid(self, ext: Optional[str] = None) -> Optional[DailyVid]:
+        vids = await self.get_videos(self.data.dailyvids_query(ext))
+        return await run_in_threadpool(self.data.to_dailyvid, vids)
@@ -0,0 +1,82 @@
+import time
+import asyncio
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from watchfiles import awatch
+from mythme.data.videos import VideoData
+from mythme.utils.config import config
+from mythme.utils.db import run_db
+from mythme.utils.log import logger
+from mythme.utils.mythtv import get_storage_group_dirs
+
+RETRY_SECONDS = 1
+MAX_RETRY_SECONDS = 60
+"""Backoff (doubling with each failure) before watching is restarted"""
+
+
+class VideoWatcher:
+    """Applies Videos storage group file changes to videometadata as they happen.
+
+    Uses inotify (via watchfiles) and debounces bursts of events, so copying a
+    directory of files results in one batch of inserts.
+    """
+
+    def __init__(self):
+        self.video_data = VideoData()
+        self.stop_event = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        self.stop_event.set()
+        if self.task:
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            except Exception:
+                pass  # already logged by run()
+
+    async def run(self):
+        """Watches until stopped, restarting (with backoff) if watching fails."""
+        delay = RETRY_SECONDS
+        while not self.stop_event.is_set():
+            started = time.monotonic()
+            try:
+                await self.watch()
+                if not self.stop_event.is_set():
+                    logger.error("Video watcher stopped unexpectedly")
+            except Exception as ex:
+                logger.exception(f"Video watcher failed: {ex}")
+            if time.monotonic() - started > MAX_RETRY_SECONDS:
+                delay = RETRY_SECONDS  # it had been working
+            try:
+                await asyncio.wait_for(self.stop_event.wait(), delay)
+            except asyncio.TimeoutError:
+                logger.info(f"Restarting video watcher after {delay}s")
+            delay = min(delay * 2, MAX_RETRY_SECONDS)
+
+    async def watch(self):
+        sg_dirs = await run_in_threadpool(get_storage_group_dirs, "Videos")
+        if not sg_dirs:
+            raise FileNotFoundError("No Videos storage group dirs")
+        logger.info(f"Watching video storage group directories: {sg_dirs}")
+        async for changes in awatch(
+            *sg_dirs,
+            debounce=int(config.videos.debounce * 1000),
+            stop_event=self.stop_event,
+        ):
+            changed = {path for _change, path in changes}
+            try:
+                added, deleted = await run_db(
+                    self.video_data.sync_changed_paths, sg_dirs, changed
+                )
+                if added or deleted:
+                    logger.info(
+                        f"Video watcher added {len(added)}, deleted {len(deleted)}"
+                    )
+            except Exception as ex:
+                # the next change to these files will retry them
+                logger.exception(f"Video watcher failed to apply changes: {ex}")
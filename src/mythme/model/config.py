@@ -1,5 +1,17 @@
 from typing import Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+
+@dataclass
+class DbPoolConfig:
+    min_size: int = 1
+    max_size: int = 10
+    timeout: float = 10
+    """Seconds to wait for a free connection before giving up"""
+    validation_interval: float = 30
+    """Ping connections idle longer than this many seconds before reuse"""
+    max_idle: float = 300
+    """Close connections (above min_size) idle longer than this many seconds"""
 
 
 @dataclass
@@ -9,6 +21,19 @@ class DbConnectConfig:
     username: str
     password: str
     database: str
+    pool: DbPoolConfig = field(default_factory=DbPoolConfig)
+
+
+@dataclass
+class MythtvHttpConfig:
+    connect_timeout: float = 5
+    read_timeout: float = 60
+    retries: int = 3
+    """Retries for connection errors, and for 5xx responses to GET requests"""
+    backoff: float = 0.5
+    """Backoff factor in seconds (doubles with each retry)"""
+    pool_size: int = 10
+    """Keep-alive connections held open to the backend"""
 
 
 @dataclass
@@ -16,6 +41,83 @@ class MythtvConfig:
     api_base: str
     categories: dict[str, str]
     storage_groups: dict[str, list[str]]
+    http: MythtvHttpConfig = field(default_factory=MythtvHttpConfig)
+
+
+@dataclass
+class CacheConfig:
+    ttl: float = 120
+    """Seconds before a cached MythTV list response is refetched (0 disables)"""
+    max_entries: int = 32
+    max_mb: float = 128
+    """Cap on the total size of cached responses, in upstream payload megabytes"""
+
+
+@dataclass
+class VideosConfig:
+    watch: bool = False
+    """Keep videometadata in sync with the Videos storage group as files change"""
+    debounce: float = 2
+    """Seconds of quiet before a burst of file changes is applied"""
+    copy_mb_per_sec: float = 50
+    """Cap on recording copies into the Videos storage group (0: none), so playback isn't starved"""
+    copy_checksum: bool = True
+    """sha256 of copied recordings (unless reflinked), at the cost of copying through userspace"""
+
+
+@dataclass
+class MediaConfig:
+    chunk_kb: int = 1024
+    """Read size for streamed media, when the server can't send files itself"""
+    ffmpeg: str = "ffmpeg"
+    ffprobe: str = "ffprobe"
+    workers: int = 2
+    """Concurrent ffmpeg/ffprobe processes"""
+    segment_seconds: float = 6
+    """Length of HLS segments remuxed from recordings"""
+    segment_cache_mb: float = 2048
+    """Cap on remuxed segments kept in $MYTHME_DIR/segments"""
+
+
+@dataclass
+class ThumbnailsConfig:
+    workers: int = 1
+    """Concurrent ffmpeg processes (separate from media.workers)"""
+    width: int = 320
+    sprite_width: int = 160
+    """Width of each seek-bar sprite tile"""
+    sprite_columns: int = 10
+    prewarm: bool = False
+    """Generate thumbnails for videos added by a scan"""
+    cache_mb: float = 256
+    """Cap on images kept in $MYTHME_DIR/thumbnails"""
+
+
+@dataclass
+class JobsConfig:
+    workers: int = 1
+    """Background jobs (scans, syncs, file copies) run at once"""
+    keep: int = 100
+    """Finished jobs kept in $MYTHME_DIR/jobs.json"""
+
+
+@dataclass
+class CompressionConfig:
+    enabled: bool = True
+    """br (with the brotli extra installed) or gzip for API responses and UI files"""
+    minimum_size: int = 1024
+    """Smaller responses are sent as is"""
+    gzip_level: int = 6
+    brotli_quality: int = 4
+    """API responses are compressed per request, so favor speed (UI files get 11)"""
+
+
+@dataclass
+class GuideConfig:
+    snapshot: bool = True
+    """Answer program queries from an in-memory copy of the upcoming guide"""
+    check_interval: float = 60
+    """Seconds between checks for guide changes (eg: after mythfilldatabase)"""
 
 
 @dataclass
@@ -29,3 +131,10 @@ class MythmeConfig:
     database: DbConnectConfig
     mythtv: MythtvConfig
     dailyvid: Optional[DailyVidConfig] = None
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    videos: VideosConfig = field(default_factory=VideosConfig)
+    guide: GuideConfig = field(default_factory=GuideConfig)
+    media: MediaConfig = field(default_factory=MediaConfig)
+    thumbnails: ThumbnailsConfig = field(default_factory=ThumbnailsConfig)
+    compression: CompressionConfig = field(default_factory=CompressionConfig)
+    jobs: JobsConfig = field(default_factory=JobsConfig)
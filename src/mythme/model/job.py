@@ -0,0 +1,26 @@
+from typing import Any, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+
+class Job(BaseModel):
+    id: str
+    type: str
+    """eg: video-scan, video-sync, video-file"""
+    status: str
+    """queued, running, succeeded, failed or cancelled"""
+    created: datetime
+    started: Optional[datetime] = None
+    finished: Optional[datetime] = None
+    progress: Optional[float] = None
+    """Fraction done (0 to 1), for jobs that can tell"""
+    message: Optional[str] = None
+    result: Optional[dict[str, Any]] = None
+    """eg: VideoScanResponse or VideoSyncResponse fields"""
+    error: Optional[str] = None
+    cancellable: bool = False
+    """Whether it can be cancelled once running (all jobs can while queued)"""
+
+
+class JobsResponse(BaseModel):
+    jobs: list[Job]
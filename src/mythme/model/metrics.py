@@ -0,0 +1,50 @@
+from pydantic import BaseModel
+
+
+class DbPoolMetrics(BaseModel):
+    size: int
+    """Open connections (idle + in use)"""
+    idle: int
+    in_use: int
+    max_size: int
+    created: int
+    closed: int
+    checkouts: int
+    waits: int
+    """Checkouts that had to wait for a connection to be returned"""
+    exhausted: int
+    """Checkouts that timed out waiting for a connection"""
+    failed_checks: int
+    """Idle connections discarded after a failed health check"""
+    recycled: int
+    """Connections closed after exceeding max_idle"""
+
+
+class EndpointMetrics(BaseModel):
+    requests: int
+    errors: int
+    """Connection failures and 5xx responses"""
+    retries: int
+    avg_ms: float
+    max_ms: float
+
+
+class CacheMetrics(BaseModel):
+    entries: int
+    bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    """Entries dropped to stay within max_entries/max_mb"""
+    expirations: int
+
+
+class MetricsResponse(BaseModel):
+    database: DbPoolMetrics
+    mythtv: dict[str, EndpointMetrics]
+    mythtv_cache: CacheMetrics
+    program_counts: CacheMetrics
+    segments: CacheMetrics
+    """Remuxed HLS segments on disk"""
+    thumbnails: CacheMetrics
+    """Thumbnails and sprites on disk"""
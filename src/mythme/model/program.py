@@ -32,4 +32,6 @@ class Program(BaseModel):
 class ProgramsResponse(BaseModel):
     programs: list[Program]
     total: int
+    cursor: Optional[str] = None
+    """Pass as the cursor param to fetch the next page (absent on the last page)"""
     query: Optional[DbQuery] = None
@@ -1,4 +1,4 @@
-from typing import Literal, get_args
+from typing import Literal, Optional, get_args
 from pydantic import BaseModel
 
 Operator = Literal["=", ">", "<", ">=", "<=", "<>", "IN", "BETWEEN", "LIKE"]
@@ -15,6 +15,8 @@ class Sort(BaseModel):
 class Paging(BaseModel):
     offset: int
     limit: int
+    cursor: Optional[str] = None
+    """Opaque position after the last row of the previous page (replaces offset)"""
 
 
 class Criterion(BaseModel):
@@ -27,6 +29,8 @@ class Query(BaseModel):
     criteria: list[Criterion]
     sort: Sort
     paging: Paging
+    search: Optional[str] = None
+    """Words to find in title, subtitle or description"""
     debug: bool = False
 
 
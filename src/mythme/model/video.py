@@ -53,9 +53,32 @@ class VideoSyncRequest(BaseModel):
     videos: list[Video]
 
 
+class VideoSyncTimings(BaseModel):
+    resolve_ms: float
+    """Matching titles to files"""
+    metadata_ms: float
+    cast_ms: float
+    """Looking up and adding cast names"""
+    links_ms: float
+    commit_ms: float
+    total_ms: float
+
+
 class VideoSyncResponse(BaseModel):
     updated: list[str]
     missing: list[str]
+    timings: Optional[VideoSyncTimings] = None
+
+
+class VideoCopyResponse(BaseModel):
+    message: str
+    file: str
+    size: int
+    seconds: float
+    bytes_per_sec: float
+    method: str
+    """reflink, copy_file_range or stream"""
+    sha256: Optional[str] = None
 
 
 class DailyVid(BaseModel):
@@ -5,7 +5,7 @@ from mythme.model.recording import Recording
 def parse_params(params: dict[str, str]) -> Query:
     criteria: list[Criterion] = []
     for key, value in params.items():
-        if key in ["sort", "offset", "limit", "desc", "debug"]:
+        if key in ["sort", "offset", "limit", "cursor", "desc", "debug", "q", "stream"]:
             continue
         val = value
         op: Operator = "="
@@ -42,6 +42,9 @@ def parse_params(params: dict[str, str]) -> Query:
         ]:
             sort.name = sort_name
         sort.order = "asc"
+    search = params.get("q", "").strip() or None
+    if search and "sort" not in params:
+        sort.name = "relevance"
     if "desc" in params and params["desc"] == "true":
         sort.order = "desc"
 
@@ -54,7 +57,11 @@ def parse_params(params: dict[str, str]) -> Query:
         lim = int(params["limit"])
         if lim > 0:
             paging.limit = 10000 if lim > 10000 else lim
+    if params.get("cursor"):
+        paging.cursor = params["cursor"]
 
     debug = "debug" in params and params["debug"] == "true"
 
-    return Query(criteria=criteria, sort=sort, paging=paging, debug=debug)
+    return Query(
+        criteria=criteria, sort=sort, paging=paging, search=search, debug=debug
+    )
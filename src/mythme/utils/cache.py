@@ -0,0 +1,134 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Generic, Optional, TypeVar
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from mythme.model.metrics import CacheMetrics
+
+T = TypeVar("T")
+
+
+class TtlCache(Generic[T]):
+    """Thread-safe LRU cache with per-entry expiry and a total size cap.
+
+    Entry sizes are supplied by the caller (eg: upstream payload bytes), so the
+    cap is approximate. Cached values are shared: callers must not mutate them.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, max_bytes: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, tuple[float, int, T]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: str) -> Optional[T]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            expires, size, value = entry
+            if expires < time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key: str, value: T, size: int):
+        if self.ttl <= 0 or self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def invalidate(self, prefix: str = ""):
+        """Drop entries whose key starts with prefix (all entries by default)."""
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                self._remove(key)
+
+    def metrics(self) -> CacheMetrics:
+        with self._lock:
+            return CacheMetrics(
+                entries=len(self._entries),
+                bytes=self._bytes,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+            )
+
+    def _remove(self, key: str):
+        _expires, size, _value = self._entries.pop(key)
+        self._bytes -= size
+
+
+class ResponseCache:
+    """Serialized JSON responses for slow-changing lookups, with strong ETags.
+
+    Entries live until invalidated (eg: when guide data changes). Clients are
+    told to revalidate every time, which costs a 304 and no db access.
+    """
+
+    cache_control = "no-cache"
+
+    def __init__(self):
+        self._entries: dict[str, tuple[bytes, str]] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        """Bumped by invalidate(), so a response produced from data that changed
+        meanwhile isn't stored"""
+
+    async def respond(
+        self, request: Request, key: str, produce: Callable[[], Awaitable[Any]]
+    ) -> Response:
+        entry = self._entries.get(key)
+        if entry is None:
+            generation = self._generation
+            body = JSONResponse(jsonable_encoder(await produce())).body
+            etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+            entry = (bytes(body), etag)
+            with self._lock:
+                if self._generation == generation:
+                    self._entries[key] = entry
+        body, etag = entry
+        headers = {"ETag": etag, "Cache-Control": self.cache_control}
+        if self.matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    def matches(self, if_none_match: Optional[str], etag: str) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses weak comparison
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return etag in tags
+
+    def invalidate(self, prefix: str = ""):
+        """Drop entries whose key starts with prefix (all entries by default)."""
+        with self._lock:
+            self._generation += 1
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+
+response_cache = ResponseCache()
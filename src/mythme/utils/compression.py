@@ -0,0 +1,271 @@
+import os
+import gzip
+import zlib
+import uuid
+from typing import Any, Optional
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from mythme.utils.text import gen_hash
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/vnd.apple.mpegurl",
+    "image/svg+xml",
+)
+"""Media, images and downloads are already compressed (and may be ranged)"""
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """br (if the brotli package is installed) or gzip, if accepted."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    pass
+        if q > 0:
+            accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """Compresses text and JSON responses with br or gzip, per Accept-Encoding.
+
+    Like starlette's GZipMiddleware, but other content types (and server
+    extensions like zerocopy) are passed through untouched, and streamed
+    responses are flushed with each chunk so that compression doesn't hold
+    back the first rows.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        level = self.brotli_quality if encoding == "br" else self.gzip_level
+        responder = CompressionResponder(self.app, self.minimum_size, encoding, level)
+        await responder(scope, receive, send)
+
+
+class CompressionResponder:
+    """Compresses one response's body messages.
+
+    Responses that are already encoded or aren't compressible are passed
+    through as is, as are messages other than http.response.body (eg: the
+    pathsend and zerocopy extensions used for video files).
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int, encoding: str, level: int):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoding = encoding
+        self.send: Send
+        self.start: Optional[Message] = None
+        """Held until the first body message shows whether it's worth compressing"""
+        self.compressing = False
+        self.compressor: Any
+        if encoding == "br":
+            self.compressor = brotli.Compressor(quality=level)
+        else:
+            self.compressor = zlib.compressobj(
+                level, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+            )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if "content-encoding" in headers or not is_compressible(
+                headers.get("content-type", "")
+            ):
+                await self.send(message)
+            else:
+                self.start = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self.send_start()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is not None:
+            if more_body or len(body) >= self.minimum_size:
+                headers = MutableHeaders(raw=self.start["headers"])
+                headers.add_vary_header("Accept-Encoding")
+                headers["content-encoding"] = self.encoding
+                if "content-length" in headers:
+                    del headers["content-length"]
+                self.compressing = True
+            else:
+                await self.send_start()
+                await self.send(message)
+                return
+        if self.compressing:
+            body = self.compress(body, more_body)
+            if self.start is not None and not more_body:
+                MutableHeaders(raw=self.start["headers"])["content-length"] = str(
+                    len(body)
+                )
+            message = {**message, "body": body}
+        await self.send_start()
+        await self.send(message)
+
+    async def send_start(self):
+        if self.start is not None:
+            start, self.start = self.start, None
+            await self.send(start)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        # flushed per chunk, so streamed lists reach the client as they're sent
+        if self.encoding == "br":
+            out = self.compressor.process(body)
+            if more_body:
+                return out + self.compressor.flush()
+            return out + self.compressor.finish()
+        out = self.compressor.compress(body)
+        return out + self.compressor.flush(
+            zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH
+        )
+
+
+class PrecompressedFiles(StaticFiles):
+    """Serves compressible files as .br or .gz, per Accept-Encoding.
+
+    A sibling file (eg: index.js.br) is used if the build made one. Otherwise the
+    file is compressed (at maximum level) the first time it's requested, and
+    kept in cache_dir until it changes. Files under assets/ have hashed names,
+    so they're cached by browsers as immutable; others are revalidated.
+    """
+
+    def __init__(self, *, cache_dir: str, minimum_size: int = 1024, **kwargs):
+        super().__init__(**kwargs)
+        self.cache_dir = cache_dir
+        self.minimum_size = minimum_size
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        cache_control = IMMUTABLE if path.startswith(f"assets{os.sep}") else "no-cache"
+        if isinstance(response, FileResponse) and response.status_code == 200:
+            encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+            media_type = response.media_type or ""
+            size = int(response.headers.get("content-length", 0))
+            if encoding and is_compressible(media_type) and size >= self.minimum_size:
+                compressed, stat = await anyio.to_thread.run_sync(
+                    self.compressed_file, str(response.path), encoding
+                )
+                response = FileResponse(
+                    compressed,
+                    stat_result=stat,
+                    media_type=media_type,
+                    headers={"content-encoding": encoding, "vary": "Accept-Encoding"},
+                )
+                if self.is_not_modified(response.headers, Headers(scope=scope)):
+                    response = NotModifiedResponse(response.headers)
+        if response.status_code in [200, 304]:
+            response.headers["cache-control"] = cache_control
+        return response
+
+    def compressed_file(
+        self, full_path: str, encoding: str
+    ) -> tuple[str, os.stat_result]:
+        ext = "br" if encoding == "br" else "gz"
+        if os.path.isfile(f"{full_path}.{ext}"):
+            return f"{full_path}.{ext}", os.stat(f"{full_path}.{ext}")
+        source = gen_hash(full_path)
+        mtime = os.stat(full_path).st_mtime_ns
+        cached = f"{self.cache_dir}/{source}-{mtime}.{ext}"
+        if os.path.isfile(cached):
+            return cached, os.stat(cached)
+
+        with open(full_path, "rb") as f:
+            content = f.read()
+        if encoding == "br":
+            content = brotli.compress(content, quality=11)
+        else:
+            content = gzip.compress(content, compresslevel=9, mtime=0)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # unique, so concurrent first requests don't replace each other's temp file
+        temp = f"{cached}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with open(temp, "wb") as f:
+                f.write(content)
+            os.replace(temp, cached)
+        except BaseException:
+            if os.path.isfile(temp):
+                os.remove(temp)
+            raise
+        # drop versions compressed before the file changed (another request may
+        # be dropping them too)
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(f"{source}-") and name.endswith(f".{ext}"):
+                version = name[len(source) + 1 : -len(ext) - 1]
+                if version.isdigit() and int(version) < mtime:
+                    try:
+                        os.remove(f"{self.cache_dir}/{name}")
+                    except FileNotFoundError:
+                        pass
+        return cached, os.stat(cached)
+
+        with open(full_path, "rb") as f:
+            content = f.read()
+        if encoding == "br":
+            content = brotli.compress(content, quality=11)
+        else:
+            content = gzip.compress(content, compresslevel=9, mtime=0)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp = f"{cached}.tmp"
+        with open(temp, "wb") as f:
+            f.write(content)
+        os.replace(temp, cached)
+        # drop versions compressed before the file changed
+        for name in os.listdir(self.cache_dir):
+            if name.startswith(f"{source}-") and name.endswith(f".{ext}"):
+                if f"{self.cache_dir}/{name}" != cached:
+                    os.remove(f"{self.cache_dir}/{name}")
+        return cached, os.stat(cached)
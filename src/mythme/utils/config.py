@@ -7,10 +7,19 @@ import mariadb
 from dotenv import load_dotenv
 from yaml import safe_load
 from mythme.model.config import (
+    CacheConfig,
+    CompressionConfig,
     DailyVidConfig,
     DbConnectConfig,
+    DbPoolConfig,
+    GuideConfig,
+    JobsConfig,
+    MediaConfig,
     MythmeConfig,
     MythtvConfig,
+    MythtvHttpConfig,
+    ThumbnailsConfig,
+    VideosConfig,
 )
 from mythme.model.setting import Setting
 from mythme.utils.log import logger
@@ -26,6 +35,22 @@ def required(name: str, dict: dict[str, Any], default: Optional[str] = None) ->
     return dict[name]
 
 
+def apply_config(target: Any, values: Optional[dict[str, Any]], section: str) -> Any:
+    """Override dataclass defaults with values from a mythme.yaml section."""
+    for name, value in (values or {}).items():
+        if not hasattr(target, name):
+            raise ValueError(f"Unknown key in {section} config: {name}")
+        setattr(target, name, value)
+    return target
+
+
+def load_pool_config(database: dict[str, Any]) -> DbPoolConfig:
+    pool_config = apply_config(DbPoolConfig(), database.get("pool"), "database.pool")
+    if pool_config.max_size < 1 or pool_config.min_size > pool_config.max_size:
+        raise ValueError(f"Invalid database pool size: {pool_config}")
+    return pool_config
+
+
 def to_setting(row: dict) -> Setting:
     return Setting(name=row["value"], value=row["data"], host=row["hostname"])
 
@@ -46,7 +71,7 @@ def load_config() -> MythmeConfig:
             cfg = safe_load(f.read()) or {}
 
     db_config: Optional[DbConnectConfig] = None
-    if "database" in cfg:
+    if set((cfg.get("database") or {}).keys()) - {"pool"}:
         database = cfg["database"]
         db_config = DbConnectConfig(
             host=required("host", database),
@@ -76,6 +101,7 @@ def load_config() -> MythmeConfig:
     if db_config is None:
         raise ValueError("No MythTV database config found")
     else:
+        db_config.pool = load_pool_config(cfg.get("database") or {})
         logger.debug(f"Loaded DB config: {db_config}")
 
     myth_config: Optional[MythtvConfig] = None
@@ -134,6 +160,10 @@ WHERE value in ('BackendStatusPort', 'BackendServerAddr')"""
 
     if myth_config is None:
         raise ValueError("No MythTV API base URL found")
+    else:
+        myth_config.http = apply_config(
+            MythtvHttpConfig(), (cfg.get("mythtv") or {}).get("http"), "mythtv.http"
+        )
 
     mythme_config = MythmeConfig(
         mythme_dir=f"{mythme_dir}",
@@ -144,6 +174,18 @@ WHERE value in ('BackendStatusPort', 'BackendServerAddr')"""
     if "dailyvid" in cfg:
         mythme_config.dailyvid = DailyVidConfig(psv_file=cfg["dailyvid"]["psv_file"])
 
+    mythme_config.cache = apply_config(CacheConfig(), cfg.get("cache"), "cache")
+    mythme_config.videos = apply_config(VideosConfig(), cfg.get("videos"), "videos")
+    mythme_config.guide = apply_config(GuideConfig(), cfg.get("guide"), "guide")
+    mythme_config.media = apply_config(MediaConfig(), cfg.get("media"), "media")
+    mythme_config.thumbnails = apply_config(
+        ThumbnailsConfig(), cfg.get("thumbnails"), "thumbnails"
+    )
+    mythme_config.compression = apply_config(
+        CompressionConfig(), cfg.get("compression"), "compression"
+    )
+    mythme_config.jobs = apply_config(JobsConfig(), cfg.get("jobs"), "jobs")
+
     logger.debug(f"Loaded mythme config: {mythme_config}")
 
     return mythme_config
@@ -1,26 +1,123 @@
+import os
+import threading
 from datetime import datetime
+from typing import Optional
 from mythme.model.video import Video
 from mythme.utils.config import config
 from mythme.utils.log import logger
 
 DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+COMPACT_AFTER = 100
+"""Journal entries before they're merged into the psv file"""
 
 
-def load_watched_vids(videos: list[Video], log_unfound=True) -> dict[str, datetime]:
-    if not config.dailyvid:
+class WatchedStore:
+    """Dailyvid watched times, kept in memory.
+
+    Updates are appended to a journal next to the psv file and periodically
+    compacted into it. The psv file is reloaded if edited externally.
+    """
+
+    def __init__(self, psv_file: str):
+        self.psv_file = psv_file
+        self.journal_file = f"{psv_file}.journal"
+        self.watched: dict[str, datetime] = {}
+        self.journaled = 0
+        self.loaded = False
+        self.psv_stat: Optional[tuple[int, int]] = None
+        self.lock = threading.Lock()
+
+    def get_watched(self) -> dict[str, datetime]:
+        with self.lock:
+            self.reload_if_changed()
+            return dict(self.watched)
+
+    def set_watched(self, file: str, watched: datetime) -> bool:
+        """Returns True if file was already watched."""
+        with self.lock:
+            self.reload_if_changed()
+            existing = file in self.watched
+            self.watched[file] = watched
+            with open(self.journal_file, "a", encoding="utf-8") as f:
+                f.write(f"{self.to_line(file, watched)}\n")
+            self.journaled += 1
+            if self.journaled >= COMPACT_AFTER:
+                self.compact()
+            return existing
+
+    def reload_if_changed(self):
+        if not self.loaded or self.stat() != self.psv_stat:
+            self.load()
+
+    def load(self):
+        watched: dict[str, datetime] = {}
+        self.psv_stat = self.stat()
+        with open(self.psv_file, "r") as file:
+            for i, line in enumerate(file):
+                parsed = self.parse(line, f"line {i + 1}")
+                if parsed is None:
+                    continue
+                if parsed[0] in watched:
+                    logger.error(f"Duplicate dailyvid on line {i + 1}: '{parsed[0]}'")
+                else:
+                    watched[parsed[0]] = parsed[1]
+        journaled = 0
+        if os.path.isfile(self.journal_file):
+            with open(self.journal_file, "r") as file:
+                for i, line in enumerate(file):
+                    parsed = self.parse(line, f"journal line {i + 1}")
+                    if parsed:
+                        watched[parsed[0]] = parsed[1]
+                        journaled += 1
+        self.watched = watched
+        self.journaled = journaled
+        self.loaded = True
+        if journaled:
+            self.compact()
+
+    def compact(self):
+        """Rewrites the psv file (sorted by file) and empties the journal."""
+        files = sorted(self.watched, key=str.lower)
+        lines = [self.to_line(file, self.watched[file]) for file in files]
+        temp_file = f"{self.psv_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+        os.replace(temp_file, self.psv_file)
+        self.psv_stat = self.stat()
+        if os.path.isfile(self.journal_file):
+            os.remove(self.journal_file)
+        self.journaled = 0
+
+    def stat(self) -> Optional[tuple[int, int]]:
+        try:
+            st = os.stat(self.psv_file)
+            return (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+
+    def parse(self, line: str, where: str) -> Optional[tuple[str, datetime]]:
+        parts = line.strip().split("|")
+        if len(parts) < 2:
+            if line.strip():
+                logger.error(f"Invalid dailyvid on {where}: '{line.strip()}'")
+            return None
+        try:
+            return parts[0], datetime.strptime(parts[1], DATETIME_FORMAT)
+        except ValueError:
+            logger.error(f"Invalid dailyvid watched time on {where}: '{parts[1]}'")
+            return None
+
+    def to_line(self, file: str, watched: datetime) -> str:
+        return f"{file}|{watched.strftime(DATETIME_FORMAT)}"
+
+
+watched_store = WatchedStore(config.dailyvid.psv_file) if config.dailyvid else None
+
+
+def get_watched_store() -> WatchedStore:
+    if watched_store is None:
         raise ValueError("Missing config: 'dailyvid'")
-    video_files = [vid.file for vid in videos]
-    watched_vids: dict[str, datetime] = {}
-    with open(config.dailyvid.psv_file, "r") as file:
-        for i, line in enumerate(file):
-            parts = line.strip().split("|")
-            if parts[0] in watched_vids:
-                logger.error(f"Duplicate dailyvid on line {i + 1}: '{parts[0]}'")
-            elif parts[0] in video_files:
-                watched_vids[parts[0]] = datetime.strptime(parts[1], DATETIME_FORMAT)
-            elif log_unfound:
-                logger.error(f"Unfound dailyvid on line {i + 1}: '{parts[0]}'")
-    return watched_vids
+    return watched_store
 
 
 def to_psv(videos: list[Video]) -> str:
@@ -29,25 +126,8 @@ def to_psv(videos: list[Video]) -> str:
 
 
 def update_watched(video: Video) -> bool:
-    if not config.dailyvid:
-        raise ValueError("Missing config: 'dailyvid'")
+    store = get_watched_store()
     if not video.watched:
         return False
-    lines: list[str] = []
-    idx = -1
-    with open(config.dailyvid.psv_file, "r") as file:
-        lines = [line.strip() for line in file]
-        idx = next(
-            (i for i, ln in enumerate(lines) if ln.strip().split("|")[0] == video.file),
-            -1,
-        )
-
-    if idx >= 0:
-        lines[idx] = f"{video.file}|{video.watched}"
-    else:
-        lines.append(f"{video.file}|{video.watched}")
-    lines.sort(key=lambda line: line.strip().split("|")[0].lower())
-    with open(config.dailyvid.psv_file, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
-
-    return idx >= 0
+    existing = store.set_watched(video.file, video.watched)
+    return existing
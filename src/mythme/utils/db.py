@@ -1,12 +1,218 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Iterator, Optional, TypeVar
+import anyio
 import mariadb
+from mythme.model.config import DbConnectConfig
+from mythme.model.metrics import DbPoolMetrics
 from mythme.utils.config import config
+from mythme.utils.log import logger
 
 
-def get_connection() -> mariadb.Connection:
-    return mariadb.connect(
-        host=config.database.host,
-        port=config.database.port,
-        database=config.database.database,
-        user=config.database.username,
-        password=config.database.password,
-    )
+class ConnectionPool:
+    """Bounded pool of reusable MariaDB connections.
+
+    Idle connections are handed out most-recently-used first, pinged if they've
+    sat idle longer than validation_interval, and closed once idle longer than
+    max_idle (never dropping below min_size).
+    """
+
+    def __init__(self, db_config: DbConnectConfig):
+        self.db_config = db_config
+        self.pool_config = db_config.pool
+        self._idle: deque[tuple[mariadb.Connection, float]] = deque()
+        self._size = 0
+        self._cond = threading.Condition()
+        self._created = 0
+        self._closed = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._exhausted = 0
+        self._failed_checks = 0
+        self._recycled = 0
+
+    def connect(self) -> mariadb.Connection:
+        conn = mariadb.connect(
+            host=self.db_config.host,
+            port=self.db_config.port,
+            database=self.db_config.database,
+            user=self.db_config.username,
+            password=self.db_config.password,
+        )
+        with self._cond:
+            self._created += 1
+        return conn
+
+    def open(self):
+        """Establish min_size connections up front."""
+        while True:
+            with self._cond:
+                if self._size >= self.pool_config.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self.connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            self.release(conn)
+
+    def acquire(self) -> mariadb.Connection:
+        deadline = time.monotonic() + self.pool_config.timeout
+        waited = False
+        with self._cond:
+            self._recycle_idle()
+            while not self._idle and self._size >= self.pool_config.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._exhausted += 1
+                    raise mariadb.PoolError(
+                        f"No database connection available after {self.pool_config.timeout} seconds "
+                        f"(max_size: {self.pool_config.max_size})"
+                    )
+                if not waited:
+                    waited = True
+                    self._waits += 1
+                self._cond.wait(remaining)
+            self._checkouts += 1
+            if self._idle:
+                conn, last_used = self._idle.pop()
+            else:
+                self._size += 1
+                conn, last_used = None, 0
+
+        if conn is not None:
+            if time.monotonic() - last_used < self.pool_config.validation_interval:
+                return conn
+            if self._is_healthy(conn):
+                return conn
+            logger.info("Discarding stale database connection")
+            self._discard(conn, replace=True)
+            with self._cond:
+                self._failed_checks += 1
+
+        try:
+            return self.connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn: mariadb.Connection, discard: bool = False):
+        if not discard:
+            try:
+                if not conn.autocommit:
+                    # match close() semantics: uncommitted work is not carried over
+                    conn.rollback()
+            except mariadb.Error as ex:
+                logger.debug(f"Database connection unusable on release: {ex}")
+                discard = True
+        if discard:
+            self._discard(conn)
+        else:
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            idle = [conn for conn, _last_used in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._closed += len(idle)
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def metrics(self) -> DbPoolMetrics:
+        with self._cond:
+            return DbPoolMetrics(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=self._size - len(self._idle),
+                max_size=self.pool_config.max_size,
+                created=self._created,
+                closed=self._closed,
+                checkouts=self._checkouts,
+                waits=self._waits,
+                exhausted=self._exhausted,
+                failed_checks=self._failed_checks,
+                recycled=self._recycled,
+            )
+
+    def _recycle_idle(self):
+        """Close least-recently-used idle connections past max_idle. Caller holds the lock."""
+        cutoff = time.monotonic() - self.pool_config.max_idle
+        while (
+            self._idle
+            and self._idle[0][1] < cutoff
+            and self._size > self.pool_config.min_size
+        ):
+            conn, _last_used = self._idle.popleft()
+            self._size -= 1
+            self._closed += 1
+            self._recycled += 1
+            self._close_quietly(conn)
+
+    def _is_healthy(self, conn: mariadb.Connection) -> bool:
+        try:
+            conn.ping()
+            return True
+        except mariadb.Error:
+            return False
+
+    def _discard(self, conn: mariadb.Connection, replace: bool = False):
+        """Close a checked-out connection. With replace, its slot stays reserved for the caller."""
+        self._close_quietly(conn)
+        with self._cond:
+            self._closed += 1
+            if not replace:
+                self._size -= 1
+                self._cond.notify()
+
+    def _close_quietly(self, conn: mariadb.Connection):
+        try:
+            conn.close()
+        except mariadb.Error:
+            pass
+
+
+pool = ConnectionPool(config.database)
+
+
+@contextmanager
+def get_connection() -> Iterator[mariadb.Connection]:
+    """Borrow a pooled connection for the duration of the with block."""
+    conn = pool.acquire()
+    try:
+        yield conn
+    except (mariadb.InterfaceError, mariadb.OperationalError):
+        pool.release(conn, discard=True)
+        raise
+    except BaseException:
+        pool.release(conn)
+        raise
+    else:
+        pool.release(conn)
+
+
+T = TypeVar("T")
+
+db_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+async def run_db(func: Callable[..., T], *args: Any) -> T:
+    """Run blocking database work from async code.
+
+    Worker threads are capped by a dedicated limiter sized to the pool's max_size,
+    so database access never waits behind (or starves) Starlette's default
+    threadpool limit.
+    """
+    global db_limiter
+    if db_limiter is None:
+        db_limiter = anyio.CapacityLimiter(pool.pool_config.max_size)
+    return await anyio.to_thread.run_sync(partial(func, *args), limiter=db_limiter)
@@ -0,0 +1,143 @@
+import json
+import asyncio
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+from mythme.utils.config import config
+from mythme.utils.log import logger
+
+MAX_PROBES = 1000
+
+
+class FfmpegError(Exception):
+    pass
+
+
+@dataclass
+class MediaInfo:
+    duration: float
+    """Seconds"""
+    video_codec: Optional[str]
+    audio_codec: Optional[str]
+    start_time: float = 0
+    """Of the first packet (MPEG-TS recordings don't start at zero)"""
+
+
+class Ffmpeg:
+    """Runs ffmpeg/ffprobe subprocesses, at most `workers` at a time.
+
+    A process is killed if its caller is cancelled (eg: the client went away).
+    """
+
+    def __init__(self, workers: int, ffmpeg: str, ffprobe: str):
+        self.workers = workers
+        self.ffmpeg = ffmpeg
+        self.ffprobe = ffprobe
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._probes: dict[tuple[str, int], MediaInfo] = {}
+        self._keyframes: dict[tuple[str, int], list[float]] = {}
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(1, self.workers))
+        return self._semaphore
+
+    async def run(self, args: list[str]) -> bytes:
+        """Runs ffmpeg with args, returning its stdout."""
+        return await self.exec(
+            [self.ffmpeg, "-hide_banner", "-loglevel", "error", "-nostdin", *args]
+        )
+
+    async def probe(self, path: Path) -> MediaInfo:
+        """Duration and first video/audio codecs, remembered per file mtime."""
+        key = (str(path), path.stat().st_mtime_ns)
+        if key in self._probes:
+            return self._probes[key]
+        out = await self.exec(
+            [
+                self.ffprobe,
+                "-v",
+                "error",
+                "-show_entries",
+                "format=duration,start_time:stream=codec_type,codec_name",
+                "-of",
+                "json",
+                str(path),
+            ]
+        )
+        result = json.loads(out)
+        codecs: dict[str, str] = {}
+        for stream in result.get("streams", []):
+            codecs.setdefault(stream.get("codec_type"), stream.get("codec_name"))
+        fmt = result.get("format", {})
+        info = MediaInfo(
+            duration=float(fmt.get("duration", 0)),
+            video_codec=codecs.get("video"),
+            audio_codec=codecs.get("audio"),
+            start_time=float(fmt.get("start_time", 0)),
+        )
+        if len(self._probes) >= MAX_PROBES:
+            self._probes.clear()
+        self._probes[key] = info
+        return info
+
+    async def keyframes(self, path: Path) -> list[float]:
+        """Sorted video keyframe times (from the start of the file), remembered
+        per file mtime. Only packet headers are read, nothing is decoded.
+        """
+        key = (str(path), path.stat().st_mtime_ns)
+        if key in self._keyframes:
+            return self._keyframes[key]
+        info = await self.probe(path)
+        out = await self.exec(
+            [
+                self.ffprobe,
+                "-v",
+                "error",
+                "-select_streams",
+                "v:0",
+                "-show_entries",
+                "packet=pts_time,flags",
+                "-of",
+                "csv=p=0",
+                str(path),
+            ]
+        )
+        times: list[float] = []
+        for line in out.decode(errors="replace").splitlines():
+            pts_time, _, flags = line.partition(",")
+            if "K" in flags and pts_time not in ("", "N/A"):
+                times.append(float(pts_time) - info.start_time)
+        times.sort()
+        if len(self._keyframes) >= MAX_PROBES:
+            self._keyframes.clear()
+        self._keyframes[key] = times
+        return times
+
+    async def exec(self, cmd: list[str]) -> bytes:
+        async with self.semaphore:
+            try:
+                proc = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                )
+            except FileNotFoundError:
+                raise FfmpegError(f"Not found: {cmd[0]}")
+            try:
+                stdout, stderr = await proc.communicate()
+            finally:
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+            if proc.returncode != 0:
+                message = stderr.decode(errors="replace").strip()
+                logger.error(
+                    f"{Path(cmd[0]).name} failed ({proc.returncode}): {message}"
+                )
+                raise FfmpegError(message or f"Exit code {proc.returncode}")
+            return stdout
+
+
+ffmpeg = Ffmpeg(config.media.workers, config.media.ffmpeg, config.media.ffprobe)
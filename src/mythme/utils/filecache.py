@@ -0,0 +1,91 @@
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from mythme.model.metrics import CacheMetrics
+
+
+class FileCache:
+    """Generated files under dir (matching pattern, eg: "*/*.ts"), removed least
+    recently used first once their total size exceeds max_bytes. Access times
+    are kept in file mtimes so the order survives restarts. Only used from the
+    event loop.
+    """
+
+    def __init__(self, dir: Path, max_bytes: int, pattern: str):
+        self.dir = dir
+        self.max_bytes = max_bytes
+        self.pattern = pattern
+        self.files: OrderedDict[str, int] = OrderedDict()
+        self.bytes = 0
+        self.loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def load(self):
+        """Indexes files left by a previous run (and drops partial ones)."""
+        os.makedirs(self.dir, exist_ok=True)
+        found: list[tuple[float, str, int]] = []
+        for source in self.dir.iterdir():
+            if source.is_dir() and not any(source.iterdir()):
+                source.rmdir()
+        for file in self.dir.glob(os.path.splitext(self.pattern)[0] + "*"):
+            if not file.is_file():
+                continue
+            if not file.match(self.pattern):
+                file.unlink(missing_ok=True)
+                continue
+            st = file.stat()
+            found.append((st.st_mtime, str(file.relative_to(self.dir)), st.st_size))
+        for _mtime, name, size in sorted(found):
+            self.files[name] = size
+            self.bytes += size
+        self.loaded = True
+        self.evict()
+
+    def get(self, name: str) -> Optional[Path]:
+        if name not in self.files:
+            self.misses += 1
+            return None
+        path = self.dir / name
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.bytes -= self.files.pop(name)
+            self.misses += 1
+            return None
+        self.files.move_to_end(name)
+        self.hits += 1
+        return path
+
+    def put(self, name: str, size: int):
+        if name in self.files:
+            self.bytes -= self.files.pop(name)
+        self.files[name] = size
+        self.bytes += size
+        self.evict()
+
+    def evict(self):
+        # the newest file is kept even if it's over the cap by itself
+        while self.bytes > self.max_bytes and len(self.files) > 1:
+            name, size = self.files.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+            # emptied source dirs are removed by the next load()
+            (self.dir / name).unlink(missing_ok=True)
+
+    def remove(self, name: str):
+        if name in self.files:
+            self.bytes -= self.files.pop(name)
+        (self.dir / name).unlink(missing_ok=True)
+
+    def metrics(self) -> CacheMetrics:
+        return CacheMetrics(
+            entries=len(self.files),
+            bytes=self.bytes,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            expirations=0,
+        )
@@ -0,0 +1,137 @@
+import os
+import time
+import uuid
+import errno
+import fcntl
+import hashlib
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+FICLONE = 0x40049409
+"""Linux ioctl: share the source's blocks (btrfs, xfs, zfs 2.2+)"""
+CHUNK_SIZE = 8 * 1024 * 1024
+UNSUPPORTED = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS}
+"""errnos meaning the filesystem can't do a reflink or copy_file_range"""
+
+
+@dataclass
+class CopyResult:
+    size: int
+    seconds: float
+    method: str
+    """reflink, copy_file_range or stream"""
+    sha256: Optional[str] = None
+    """Of the bytes read (reflinks share the source's blocks, so aren't read)"""
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.size / self.seconds if self.seconds else 0
+
+
+Progress = Callable[[int, int, float], None]
+"""(copied, total, bytes_per_sec), may raise to stop the copy"""
+
+
+def copy_file(
+    source: str,
+    dest: str,
+    max_bytes_per_sec: float = 0,
+    checksum: bool = True,
+    progress: Optional[Progress] = None,
+) -> CopyResult:
+    """Copies source to a hidden temp file next to dest, which is renamed once
+    complete (and synced), so dest never exists partially written.
+
+    A reflink is tried first. Otherwise the data is copied in CHUNK_SIZE pieces,
+    in the kernel with copy_file_range, or through a buffer when checksum is
+    wanted (or copy_file_range isn't supported). max_bytes_per_sec (0: no limit)
+    leaves disk bandwidth for playback.
+    """
+    dirname, basename = os.path.split(dest)
+    temp = os.path.join(dirname, f".{basename}.{uuid.uuid4().hex[:8]}.part")
+    before = time.perf_counter()
+    try:
+        with open(source, "rb") as src, open(temp, "wb") as dst:
+            total = os.fstat(src.fileno()).st_size
+            copier = Copier(src.fileno(), dst.fileno(), total, max_bytes_per_sec)
+            if reflink(src.fileno(), dst.fileno()):
+                method, sha256 = "reflink", None
+                if progress:
+                    progress(total, total, 0)
+            elif not checksum and copier.copy_file_range(progress):
+                method, sha256 = "copy_file_range", None
+            else:
+                method, sha256 = "stream", copier.stream(progress)
+            os.fsync(dst.fileno())
+        os.chmod(temp, os.stat(source).st_mode & 0o7777)
+        if os.path.exists(dest):
+            raise FileExistsError(errno.EEXIST, "File already exists", dest)
+        os.replace(temp, dest)
+    except BaseException:
+        if os.path.isfile(temp):
+            os.remove(temp)
+        raise
+    return CopyResult(
+        size=total,
+        seconds=time.perf_counter() - before,
+        method=method,
+        sha256=sha256,
+    )
+
+
+def reflink(src_fd: int, dst_fd: int) -> bool:
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return True
+    except OSError as ex:
+        if ex.errno in UNSUPPORTED:
+            return False
+        raise
+
+
+class Copier:
+    def __init__(self, src_fd: int, dst_fd: int, total: int, max_bytes_per_sec: float):
+        self.src_fd = src_fd
+        self.dst_fd = dst_fd
+        self.total = total
+        self.max_bytes_per_sec = max_bytes_per_sec
+        self.copied = 0
+        self.start = time.perf_counter()
+
+    def copy_file_range(self, progress: Optional[Progress]) -> bool:
+        """False if unsupported (before anything is copied)."""
+        while self.copied < self.total:
+            try:
+                count = os.copy_file_range(self.src_fd, self.dst_fd, CHUNK_SIZE)
+            except OSError as ex:
+                if self.copied == 0 and ex.errno in UNSUPPORTED:
+                    return False
+                raise
+            if count == 0:
+                break  # source shrank
+            self.advance(count, progress)
+        return True
+
+    def stream(self, progress: Optional[Progress]) -> str:
+        """Returns the sha256 of the copied bytes."""
+        sha256 = hashlib.sha256()
+        buffer = memoryview(bytearray(CHUNK_SIZE))
+        with open(self.src_fd, "rb", buffering=0, closefd=False) as src:
+            while count := src.readinto(buffer):
+                chunk = buffer[:count]
+                sha256.update(chunk)
+                written = 0
+                while written < count:
+                    written += os.write(self.dst_fd, chunk[written:])
+                self.advance(count, progress)
+        return sha256.hexdigest()
+
+    def advance(self, count: int, progress: Optional[Progress]):
+        self.copied += count
+        elapsed = time.perf_counter() - self.start
+        if progress:
+            progress(self.copied, self.total, self.copied / elapsed if elapsed else 0)
+        if self.max_bytes_per_sec:
+            ahead = self.copied / self.max_bytes_per_sec - elapsed
+            if ahead > 0:
+                time.sleep(ahead)
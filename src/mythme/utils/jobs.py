@@ -0,0 +1,188 @@
+import os
+import json
+import uuid
+import asyncio
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+from pydantic import BaseModel
+from mythme.model.job import Job
+from mythme.utils.config import config
+from mythme.utils.log import logger
+
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class JobError(Exception):
+    """Fails the job with this message (without logging a stack trace)."""
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobNotCancellable(Exception):
+    """The job is running work that can't be stopped partway (eg: a transaction)."""
+
+
+class JobContext:
+    """Handed to running jobs, which may call it from worker threads."""
+
+    def __init__(self, job: Job):
+        self.job = job
+        self.cancel_event = threading.Event()
+
+    def progress(self, fraction: float, message: Optional[str] = None):
+        self.job.progress = round(min(1.0, fraction), 3)
+        if message is not None:
+            self.job.message = message
+
+    def check_cancelled(self):
+        """Long-running work in threads calls this between steps."""
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+
+JobFunc = Callable[[JobContext], Awaitable[Optional[BaseModel]]]
+
+
+class JobQueue:
+    """Runs long operations in the background, at most workers at a time.
+
+    Jobs are saved to file on each status change, so finished ones (up to keep)
+    can still be looked up after a restart. Jobs that were queued or running
+    when the server stopped are marked failed on load. Only used from the
+    event loop (except JobContext).
+    """
+
+    def __init__(self, file: str, workers: int, keep: int):
+        self.file = file
+        self.workers = workers
+        self.keep = keep
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self.contexts: dict[str, JobContext] = {}
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.semaphore: Optional[asyncio.Semaphore] = None
+
+    def load(self):
+        if not os.path.isfile(self.file):
+            return
+        try:
+            with open(self.file, "r") as f:
+                jobs = [Job(**job) for job in json.load(f)["jobs"]]
+        except (OSError, ValueError) as ex:
+            logger.warning(f"Ignoring unreadable jobs file {self.file}: {ex}")
+            return
+        for job in jobs:
+            if job.status not in FINISHED:
+                job.status = "failed"
+                job.error = "Interrupted by server restart"
+                job.finished = job.finished or datetime.now(timezone.utc)
+            self.jobs[job.id] = job
+        self.save()
+
+    def save(self):
+        finished = [job for job in self.jobs.values() if job.status in FINISHED]
+        for job in finished[: max(0, len(finished) - self.keep)]:
+            del self.jobs[job.id]
+        os.makedirs(os.path.dirname(self.file), exist_ok=True)
+        temp_file = f"{self.file}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump(
+                {
+                    "jobs": [
+                        job.model_dump(mode="json", exclude_none=True)
+                        for job in self.jobs.values()
+                    ]
+                },
+                f,
+            )
+        os.replace(temp_file, self.file)
+
+    def submit(self, type: str, func: JobFunc, cancellable: bool = False) -> Job:
+        """cancellable: func stops (raising JobCancelled) when its context is
+        cancelled. Other jobs can only be cancelled while they're queued."""
+        job = Job(
+            id=uuid.uuid4().hex,
+            type=type,
+            status="queued",
+            created=datetime.now(timezone.utc),
+            cancellable=cancellable,
+        )
+        self.jobs[job.id] = job
+        self.contexts[job.id] = JobContext(job)
+        self.save()
+        self.tasks[job.id] = asyncio.create_task(self.run(job, func))
+        return job
+
+    def get(self, id: str) -> Optional[Job]:
+        return self.jobs.get(id)
+
+    def get_jobs(self) -> list[Job]:
+        """Newest first"""
+        return list(reversed(self.jobs.values()))
+
+    def cancel(self, id: str) -> Optional[Job]:
+        """Status is only set to cancelled once the job has actually stopped."""
+        job = self.jobs.get(id)
+        if job is None or job.status in FINISHED:
+            return job
+        if job.status == "queued":
+            task = self.tasks.get(id)
+            if task:
+                task.cancel()  # still waiting for a worker
+        elif job.cancellable:
+            # not task.cancel(): the thread's work would carry on regardless
+            self.contexts[id].cancel_event.set()
+        else:
+            raise JobNotCancellable(
+                f"Job {job.type} {id} can't be cancelled once running"
+            )
+        return job
+
+    async def run(self, job: Job, func: JobFunc):
+        context = self.contexts[job.id]
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.workers)
+        try:
+            async with self.semaphore:
+                if context.cancel_event.is_set():
+                    raise JobCancelled()
+                job.status = "running"
+                job.started = datetime.now(timezone.utc)
+                self.save()
+                result = await func(context)
+            job.status = "succeeded"
+            job.progress = 1.0
+            if result is not None:
+                job.result = result.model_dump(mode="json", exclude_none=True)
+        except (asyncio.CancelledError, JobCancelled):
+            job.status = "cancelled"
+        except JobError as ex:
+            job.status = "failed"
+            job.error = str(ex)
+        except Exception as ex:
+            logger.exception(f"Job {job.type} {job.id} failed: {ex}")
+            job.status = "failed"
+            job.error = str(ex) or type(ex).__name__
+        finally:
+            job.finished = datetime.now(timezone.utc)
+            self.contexts.pop(job.id, None)
+            self.tasks.pop(job.id, None)
+            self.save()
+
+    async def stop(self):
+        """Cancels queued and cancellable jobs, and waits for the others to finish."""
+        tasks = list(self.tasks.values())
+        for id in list(self.tasks):
+            try:
+                self.cancel(id)
+            except JobNotCancellable:
+                pass
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+job_queue = JobQueue(
+    f"{config.mythme_dir}/jobs.json", config.jobs.workers, config.jobs.keep
+)
@@ -1,7 +1,11 @@
-import aiofiles
+import os
+import stat
 from typing import Optional
 from pathlib import Path
-from fastapi import HTTPException, status
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
 from mythme.utils.mythtv import get_storage_group_dirs
 
 # TODO: more comprehensive
@@ -9,7 +13,6 @@ AUDIO_MEDIA_TYPES = {"mp3": "audio/mpeg"}
 
 # TODO: more comprehensive
 VIDEO_MEDIA_TYPES = {"mp4": "video/mp4", "mpg": "video/mpeg", "ts": "video/mp2t"}
-VIDEO_CHUNK_SIZE = 1024 * 1024
 
 
 def video_media_type(file: str) -> Optional[str]:
@@ -25,42 +28,128 @@ def media_file_path(group: str, path: str) -> Optional[Path]:
     dirs = get_storage_group_dirs(group)
     if dirs:
         for dir in dirs:
-            file_path = Path(f"{dir}/{path}")
-        if file_path.exists():
-            return file_path
+            # path comes from the request: don't let ../ escape the storage group
+            # (normpath rather than resolve, so symlinked files are still served)
+            file_path = Path(os.path.normpath(os.path.join(dir, path)))
+            if not file_path.is_relative_to(os.path.normpath(dir)):
+                continue
+            if file_path.is_file():
+                return file_path
     return None
 
 
-def get_range(range_header: str, file_size: int) -> tuple[int, int]:
-    def _invalid_range():
-        return HTTPException(
-            status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
-            detail=f"Invalid request range: {range_header})",
-        )
+class VideoFileResponse(FileResponse):
+    """FileResponse (single/multi-range, If-Range, Last-Modified, ETag) that
+    hands the file to the server for zero-copy sending where supported.
 
-    try:
-        asked = range_header.replace("bytes=", "").split("-")
-        start = int(asked[0]) if asked[0] != "" else 0
-        end = int(asked[1]) if asked[1] != "" else file_size - 1
-    except ValueError:
-        raise _invalid_range()
+    Full-file responses use the ASGI pathsend extension, and full and
+    single-range responses use the zerocopy extension (os.sendfile). Otherwise
+    the file is read in chunk_size pieces. Only FileResponse's public interface
+    is used: anything but a full or single-range GET is left to it.
+    """
 
-    if start > end or start < 0 or end > file_size - 1:
-        raise _invalid_range()
+    def __init__(
+        self,
+        path: Path,
+        media_type: str,
+        chunk_size: int,
+        headers: Optional[dict[str, str]] = None,
+    ):
+        super().__init__(
+            path,
+            media_type=media_type,
+            headers={
+                "content-encoding": "identity",
+                "access-control-expose-headers": (
+                    "content-type, accept-ranges, content-length, "
+                    "content-range, content-encoding"
+                ),
+                **(headers or {}),
+            },
+        )
+        self.chunk_size = chunk_size
 
-    return start, end
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions", {})
+        headers = Headers(scope=scope)
+        http_range = headers.get("range")
+        if (
+            "http.response.zerocopy" not in extensions
+            or scope["method"].upper() == "HEAD"
+            or headers.get("if-range") is not None
+            or (http_range is None and "http.response.pathsend" in extensions)
+        ):
+            return await super().__call__(scope, receive, send)
+        if self.stat_result is None:
+            try:
+                stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            except FileNotFoundError:
+                stat_result = None
+            if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                # FileResponse reports it
+                return await super().__call__(scope, receive, send)
+            self.stat_result = stat_result
+            self.set_stat_headers(stat_result)
+        file_size = self.stat_result.st_size
+        if http_range is None:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            await self.send_zerocopy(send, 0, file_size)
+        else:
+            byte_range = single_range(http_range, file_size)
+            if byte_range is None:
+                # multiple, malformed or unsatisfiable ranges
+                return await super().__call__(scope, receive, send)
+            start, end = byte_range
+            self.headers["content-range"] = f"bytes {start}-{end - 1}/{file_size}"
+            self.headers["content-length"] = str(end - start)
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 206,
+                    "headers": self.raw_headers,
+                }
+            )
+            await self.send_zerocopy(send, start, end - start)
+        if self.background is not None:
+            await self.background()
 
+    async def send_zerocopy(self, send: Send, offset: int, count: int):
+        file = await anyio.to_thread.run_sync(open, self.path, "rb")
+        try:
+            await send(
+                {
+                    "type": "http.response.zerocopy",
+                    "file": file,
+                    "offset": offset,
+                    "count": count,
+                    "more_body": False,
+                }
+            )
+        finally:
+            file.close()
 
-async def send_bytes_range_requests(
-    file_path: str, start: int, end: int, chunk_size: int
-):
-    async with aiofiles.open(file_path, mode="rb") as f:
-        await f.seek(start)
-        pos = await f.tell()
-        while pos <= end:
-            read_size = min(chunk_size, end + 1 - pos)
-            chunk = await f.read(read_size)
-            if not chunk:
-                break
-            pos += len(chunk)
-            yield chunk
+
+def single_range(http_range: str, file_size: int) -> Optional[tuple[int, int]]:
+    """(start, exclusive end) of a satisfiable single bytes range, or None."""
+    units, _, spec = http_range.partition("=")
+    first, dash, last = spec.strip().partition("-")
+    first, last = first.strip(), last.strip()
+    if units.strip().lower() != "bytes" or not dash or "," in spec:
+        return None
+    if not (first.isdigit() or first == "") or not (last.isdigit() or last == ""):
+        return None
+    if first == "":
+        if last == "" or int(last) == 0:
+            return None
+        return max(0, file_size - int(last)), file_size
+    start = int(first)
+    end = min(file_size, int(last) + 1) if last else file_size
+    if start >= end:
+        return None
+    return start, end
@@ -1,13 +1,214 @@
+import time
+import asyncio
+import threading
+import httpx
 import requests
-from typing import Optional, Literal
+from dataclasses import dataclass
+from typing import Optional, Literal, Union
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from mythme.model.config import MythtvHttpConfig
+from mythme.model.metrics import EndpointMetrics
 from mythme.model.query import Query
+from mythme.utils.cache import TtlCache, response_cache
 from mythme.utils.config import config
 from mythme.utils.log import logger
 
 load_dotenv()
 
-ApiMethod = Literal["GET", "POST"]
+ApiMethod = Literal["GET", "HEAD", "POST"]
+
+RETRY_STATUSES = [500, 502, 503, 504]
+
+
+@dataclass
+class EndpointStats:
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    total_ms: float = 0
+    max_ms: float = 0
+
+
+class ApiStats:
+    """Per-endpoint request counters shared by the sync and async clients."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: dict[str, EndpointStats] = {}
+
+    def record(self, endpoint: str, elapsed: float, error: bool, retries: int = 0):
+        ms = elapsed * 1000
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, EndpointStats())
+            stats.requests += 1
+            stats.errors += 1 if error else 0
+            stats.retries += retries
+            stats.total_ms += ms
+            stats.max_ms = max(stats.max_ms, ms)
+
+    def metrics(self) -> dict[str, EndpointMetrics]:
+        with self._lock:
+            return {
+                endpoint: EndpointMetrics(
+                    requests=stats.requests,
+                    errors=stats.errors,
+                    retries=stats.retries,
+                    avg_ms=round(stats.total_ms / stats.requests, 1),
+                    max_ms=round(stats.max_ms, 1),
+                )
+                for endpoint, stats in sorted(self._stats.items())
+            }
+
+
+def endpoint_name(url: str) -> str:
+    return url[len(config.mythtv.api_base) :].split("?")[0].strip("/")
+
+
+class MythtvClient:
+    """Shared keep-alive HTTP session for the MythTV backend.
+
+    Connection errors are retried for any method, 5xx responses only for GET
+    (a retried POST could schedule the same recording twice).
+    """
+
+    def __init__(self, http_config: MythtvHttpConfig, stats: ApiStats):
+        self.timeout = (http_config.connect_timeout, http_config.read_timeout)
+        self.stats = stats
+        retry = Retry(
+            total=http_config.retries,
+            backoff_factor=http_config.backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=["GET"],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=http_config.pool_size, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(
+        self, method: ApiMethod, url: str, headers: Optional[dict[str, str]] = None
+    ) -> requests.Response:
+        endpoint = endpoint_name(url)
+        before = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, url, headers=headers, timeout=self.timeout
+            )
+        except requests.RequestException:
+            self.stats.record(endpoint, time.perf_counter() - before, error=True)
+            raise
+        retries = response.raw.retries if response.raw else None
+        self.stats.record(
+            endpoint,
+            time.perf_counter() - before,
+            error=response.status_code >= 500,
+            retries=len(retries.history) if retries else 0,
+        )
+        return response
+
+
+class AsyncMythtvClient:
+    """Async counterpart of MythtvClient, with the same timeout and retry policy."""
+
+    def __init__(self, http_config: MythtvHttpConfig, stats: ApiStats):
+        self.http_config = http_config
+        self.stats = stats
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                http_config.read_timeout, connect=http_config.connect_timeout
+            ),
+            limits=httpx.Limits(
+                max_connections=None, max_keepalive_connections=http_config.pool_size
+            ),
+        )
+
+    async def request(
+        self, method: ApiMethod, url: str, headers: Optional[dict[str, str]] = None
+    ) -> httpx.Response:
+        endpoint = endpoint_name(url)
+        before = time.perf_counter()
+        retries = 0
+        while True:
+            try:
+                response = await self.client.request(method, url, headers=headers)
+                retry = method == "GET" and response.status_code in RETRY_STATUSES
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                if retries >= self.http_config.retries:
+                    self.stats.record(
+                        endpoint, time.perf_counter() - before, True, retries
+                    )
+                    raise
+                retry = True
+            except httpx.HTTPError:
+                self.stats.record(endpoint, time.perf_counter() - before, True, retries)
+                raise
+            if not retry or retries >= self.http_config.retries:
+                break
+            await asyncio.sleep(self.http_config.backoff * (2**retries))
+            retries += 1
+        self.stats.record(
+            endpoint,
+            time.perf_counter() - before,
+            error=response.status_code >= 500,
+            retries=retries,
+        )
+        return response
+
+    async def stream(
+        self, url: str, headers: Optional[dict[str, str]] = None
+    ) -> httpx.Response:
+        """GET without reading the body, which the caller must aclose(). Not retried."""
+        endpoint = endpoint_name(url)
+        before = time.perf_counter()
+        try:
+            request = self.client.build_request("GET", url, headers=headers)
+            response = await self.client.send(request, stream=True)
+        except httpx.HTTPError:
+            self.stats.record(endpoint, time.perf_counter() - before, True)
+            raise
+        self.stats.record(
+            endpoint, time.perf_counter() - before, error=response.status_code >= 500
+        )
+        return response
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+api_stats = ApiStats()
+client = MythtvClient(config.mythtv.http, api_stats)
+async_client = AsyncMythtvClient(config.mythtv.http, api_stats)
+api_cache: TtlCache[dict] = TtlCache(
+    max_entries=config.cache.max_entries,
+    ttl=config.cache.ttl,
+    max_bytes=int(config.cache.max_mb * 1024 * 1024),
+)
+"""GET responses keyed by path (endpoint + paging params)"""
+
+
+def api_url(path: str, params: Optional[dict[str, str]] = None) -> str:
+    url = f"{config.mythtv.api_base}/{path}"
+    if params:
+        url += "?" + "&".join([f"{k}={v}" for k, v in params.items()])
+    return url
+
+
+def api_result(
+    method: ApiMethod, url: str, response: Union[requests.Response, httpx.Response]
+) -> Optional[dict]:
+    if response.status_code == 200:
+        return response.json()
+    elif response.status_code == 404:
+        logger.debug(f"{method} {url} not found: {response.text}")
+        return None
+    else:
+        logger.debug(f"{method} {url} failed: {response.text}")
+        raise Exception(f"{method} {url} failed: {response.status_code}")
 
 
 def api_call(
@@ -25,25 +226,13 @@ def api_call(
     :rtype: dict
     """
 
-    url = f"{config.mythtv.api_base}/{path}"
-    if params:
-        url += "?" + "&".join([f"{k}={v}" for k, v in params.items()])
+    url = api_url(path, params)
     logger.debug(f"{method}: {url}")
     headers = {"Accept": "application/json"}
 
-    if method == "POST":
-        response = requests.post(url, headers=headers)  # nosec B113
-    else:
-        response = requests.get(url, headers=headers)  # nosec B113
+    response = client.request(method, url, headers=headers)
 
-    if response.status_code == 200:
-        return response.json()
-    elif response.status_code == 404:
-        logger.debug(f"{method} {url} not found: {response.text}")
-        return None
-    else:
-        logger.debug(f"{method} {url} failed: {response.text}")
-        raise Exception(f"{method} {url} failed: {response.status_code}")
+    return api_result(method, url, response)
 
 
 def api_update(
@@ -56,25 +245,114 @@ def api_update(
         return False
 
 
-def get_channel_icon(channel_id: int) -> Optional[bytes]:
+async def api_call_async(
+    path: str, method: ApiMethod = "GET", params: Optional[dict[str, str]] = None
+) -> Optional[dict]:
+    """Non-blocking MythTV API request (see api_call)."""
+
+    url = api_url(path, params)
+    logger.debug(f"{method}: {url}")
+    headers = {"Accept": "application/json"}
+
+    response = await async_client.request(method, url, headers=headers)
+
+    return api_result(method, url, response)
+
+
+async def api_update_async(
+    path: str, method: ApiMethod = "POST", params: Optional[dict[str, str]] = None
+) -> bool:
+    res = await api_call_async(path, method, params)
+    if res and "bool" in res and res["bool"]:
+        return True
+    else:
+        return False
+
+
+def cached_api_call(path: str) -> Optional[dict]:
+    """MythTV API GET through api_cache. The result is shared and must not be modified."""
+    result = api_cache.get(path)
+    if result is None:
+        url = api_url(path)
+        logger.debug(f"GET: {url}")
+        response = client.request("GET", url, headers={"Accept": "application/json"})
+        result = api_result("GET", url, response)
+        if result is not None:
+            api_cache.put(path, result, len(response.content))
+    return result
+
+
+async def cached_api_call_async(path: str) -> Optional[dict]:
+    """Non-blocking cached_api_call."""
+    result = api_cache.get(path)
+    if result is None:
+        url = api_url(path)
+        logger.debug(f"GET: {url}")
+        response = await async_client.request(
+            "GET", url, headers={"Accept": "application/json"}
+        )
+        result = api_result("GET", url, response)
+        if result is not None:
+            api_cache.put(path, result, len(response.content))
+    return result
+
+
+@dataclass
+class ChannelIconInfo:
+    size: Optional[int]
+    modified: Optional[str]
+    """Last-Modified header"""
+
+
+async def get_channel_icon_async(
+    channel_id: int,
+) -> Optional[tuple[bytes, ChannelIconInfo]]:
     """Retrieve channel icon content.
 
     :param channel_id: channel id
     :type channel_id: int
-    :return: icon content
-    :rtype: bytes if found, None otherwise
+    :return: icon content, with its size and modification date
+    :rtype: tuple if found, None otherwise
     """
 
     url = f"{config.mythtv.api_base}/Guide/GetChannelIcon?ChanId={channel_id}"
     logger.debug(f"Retrieving icon for channel_id: {channel_id}")
 
-    response = requests.get(url)  # nosec B113
+    response = await async_client.request("GET", url)
+    if channel_icon_result(url, response):
+        info = ChannelIconInfo(
+            size=len(response.content),
+            modified=response.headers.get("last-modified"),
+        )
+        return response.content, info
+    return None
+
 
+async def get_channel_icon_info_async(channel_id: int) -> Optional[ChannelIconInfo]:
+    """Size and modification date of a channel icon, without its content.
+
+    None if the backend can't tell (eg: HEAD isn't supported).
+    """
+
+    url = f"{config.mythtv.api_base}/Guide/GetChannelIcon?ChanId={channel_id}"
+    response = await async_client.request("HEAD", url)
+    if response.status_code != 200:
+        return None
+    length = response.headers.get("content-length")
+    info = ChannelIconInfo(
+        size=int(length) if length and length.isdigit() else None,
+        modified=response.headers.get("last-modified"),
+    )
+    return None if info.size is None and info.modified is None else info
+
+
+def channel_icon_result(url: str, response: httpx.Response) -> bool:
+    """True if the icon was found."""
     if response.status_code == 200:
-        return response.content
+        return True
     elif response.status_code == 404:
         logger.debug(f"Channel icon not found at {url}: {response.text}")
-        return None
+        return False
     else:
         logger.debug(f"Channel icon retrieval at {url} failed: {response.text}")
         raise Exception(f"{url} failed: {response.status_code}")
@@ -114,6 +392,7 @@ def get_storage_group_dirs(group: str) -> Optional[list[str]]:
                     for dir_item in [dir_item]
                 ]
                 config.mythtv.storage_groups[group] = dirs
+                response_cache.invalidate("config:")
                 sg_dirs = dirs
     if sg_dirs is None or len(sg_dirs) == 0:
         logger.error(f"No storage group directories found: {group}")
@@ -0,0 +1,164 @@
+import os
+import math
+import asyncio
+from pathlib import Path
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from mythme.utils.config import config
+from mythme.utils.ffmpeg import MediaInfo, ffmpeg
+from mythme.utils.filecache import FileCache
+from mythme.utils.log import logger
+from mythme.utils.text import gen_hash
+
+BROWSER_VIDEO_CODECS = {"h264"}
+BROWSER_AUDIO_CODECS = {"aac", "mp3"}
+
+PREFETCH_SEGMENTS = 2
+"""Segments remuxed ahead of the one requested, so playback doesn't stall"""
+MIN_SEGMENT_SECONDS = 0.1
+KEYFRAME_MARGIN = 0.001
+"""Seconds, well under a frame"""
+
+
+class HlsRemuxer:
+    """Serves media files as HLS: a VOD playlist of MPEG-TS segments, each cut
+    (and remuxed or transcoded) by ffmpeg on first request.
+
+    Segments start with an input seek, so a player can jump anywhere in a
+    recording without the preceding segments being produced. Video and audio
+    are copied when browsers can decode them; otherwise (eg: MPEG-2/AC-3 from
+    broadcast recordings) just the requested segment is transcoded.
+
+    Copied video can only be cut on keyframes, so its segments start on the
+    first keyframe at least segment_seconds after the previous start (and may
+    be a little longer). Transcoded segments are cut at exact multiples.
+    """
+
+    def __init__(self, cache: FileCache, segment_seconds: float):
+        self.cache = cache
+        self.segment_seconds = segment_seconds
+        self.pending: dict[str, asyncio.Task[Path]] = {}
+
+    async def playlist(self, path: Path, segment_query: str = "") -> str:
+        """M3U8 with segment URIs relative to the playlist."""
+        info = await ffmpeg.probe(path)
+        starts = await self.segment_starts(path, info)
+        lengths = [self.segment_length(info, starts, i) for i in range(len(starts))]
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            "#EXT-X-PLAYLIST-TYPE:VOD",
+            f"#EXT-X-TARGETDURATION:{math.ceil(max(lengths))}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+        ]
+        for index, length in enumerate(lengths):
+            lines.append(f"#EXTINF:{length:.3f},")
+            lines.append(f"{index}.ts{segment_query}")
+        lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    async def segment(self, path: Path, index: int) -> Optional[Path]:
+        """Cached segment file, or None if index is past the end."""
+        if not self.cache.loaded:
+            await run_in_threadpool(self.cache.load)
+        info = await ffmpeg.probe(path)
+        starts = await self.segment_starts(path, info)
+        if index < 0 or index >= len(starts):
+            return None
+        name = self.segment_name(path, index)
+        cached = self.cache.get(name)
+        task = None if cached else self.start(path, info, starts, index, name)
+        for ahead in range(index + 1, index + 1 + PREFETCH_SEGMENTS):
+            if ahead < len(starts):
+                ahead_name = self.segment_name(path, ahead)
+                if ahead_name not in self.cache.files:
+                    self.start(path, info, starts, ahead, ahead_name)
+        if task is None:
+            return cached
+        # shielded: another request may be waiting on the same segment
+        return await asyncio.shield(task)
+
+    def start(
+        self, path: Path, info: MediaInfo, starts: list[float], index: int, name: str
+    ) -> asyncio.Task[Path]:
+        task = self.pending.get(name)
+        if task is None:
+            args = self.segment_args(path, info, starts, index)
+            task = asyncio.create_task(self.remux(path, args, index, name))
+            self.pending[name] = task
+            task.add_done_callback(lambda t: self.done(name, t))
+        return task
+
+    def done(self, name: str, task: asyncio.Task[Path]):
+        self.pending.pop(name, None)
+        if not task.cancelled():
+            task.exception()  # retrieved: ffmpeg has logged any failure
+
+    async def remux(self, path: Path, args: list[str], index: int, name: str) -> Path:
+        out = self.cache.dir / name
+        temp = out.with_suffix(".tmp")
+        os.makedirs(out.parent, exist_ok=True)
+        try:
+            await ffmpeg.run([*args, "-f", "mpegts", str(temp)])
+            os.replace(temp, out)
+        except BaseException:
+            temp.unlink(missing_ok=True)
+            raise
+        self.cache.put(name, out.stat().st_size)
+        logger.debug(f"Remuxed segment {index} of {path}")
+        return out
+
+    def segment_args(
+        self, path: Path, info: MediaInfo, starts: list[float], index: int
+    ) -> list[str]:
+        start = starts[index]
+        length = self.segment_length(info, starts, index)
+        if info.video_codec in BROWSER_VIDEO_CODECS:
+            # seek just past the keyframe (so rounding can't land on the one
+            # before) and stop just short of the next segment's keyframe
+            args = ["-ss", f"{start + KEYFRAME_MARGIN:.6f}", "-i", str(path)]
+            args += ["-t", f"{length - 2 * KEYFRAME_MARGIN:.6f}"]
+        else:
+            args = ["-ss", f"{start:.6f}", "-i", str(path)]
+            args += ["-t", f"{length:.6f}"]
+        args += ["-map", "0:v:0?", "-map", "0:a:0?"]
+        if info.video_codec in BROWSER_VIDEO_CODECS:
+            args += ["-c:v", "copy"]
+        else:
+            args += ["-vf", "yadif=deint=interlaced"]
+            args += ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23"]
+        if info.audio_codec in BROWSER_AUDIO_CODECS:
+            args += ["-c:a", "copy"]
+        else:
+            args += ["-c:a", "aac", "-ac", "2", "-b:a", "160k"]
+        return args + ["-output_ts_offset", f"{start:.6f}", "-muxdelay", "0"]
+
+    def segment_name(self, path: Path, index: int) -> str:
+        """Segments of a file are invalidated when it's modified."""
+        source = f"{gen_hash(str(path))}-{path.stat().st_mtime_ns}"
+        return f"{source}/{index}.ts"
+
+    async def segment_starts(self, path: Path, info: MediaInfo) -> list[float]:
+        """Start time of each segment."""
+        if info.video_codec not in BROWSER_VIDEO_CODECS:
+            count = max(1, math.ceil(info.duration / self.segment_seconds))
+            return [index * self.segment_seconds for index in range(count)]
+        starts = [0.0]
+        for keyframe in await ffmpeg.keyframes(path):
+            if keyframe >= info.duration - MIN_SEGMENT_SECONDS:
+                break
+            if keyframe - starts[-1] >= self.segment_seconds:
+                starts.append(keyframe)
+        return starts
+
+    def segment_length(self, info: MediaInfo, starts: list[float], index: int) -> float:
+        end = starts[index + 1] if index + 1 < len(starts) else info.duration
+        return max(MIN_SEGMENT_SECONDS, end - starts[index])
+
+
+segment_cache = FileCache(
+    Path(f"{config.mythme_dir}/segments"),
+    int(config.media.segment_cache_mb * 1024 * 1024),
+    "*/*.ts",
+)
+remuxer = HlsRemuxer(segment_cache, config.media.segment_seconds)
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+from mythme.utils.log import logger
+
+MANIFEST_VERSION = 2
+MAX_SCAN_THREADS = 8
+
+DirListing = dict[str, Any]
+"""{"mtime": st_mtime_ns, "dirs": [name, ...], "files": [name, ...]}"""
+
+
+class VideoScanner:
+    """Incremental storage group crawler.
+
+    A manifest of every directory listing is persisted between scans. A
+    directory's mtime only changes when entries are added, removed or renamed
+    in it, so unchanged directories reuse their recorded listing and cost one
+    stat instead of a scandir.
+    """
+
+    def __init__(self, manifest_file: str):
+        self.manifest_file = manifest_file
+
+    def scan(self, sg_dirs: list[str]) -> set[str]:
+        """Returns file paths relative to their storage group dir."""
+        before = time.time()
+        manifest = self.load()
+        listings: dict[str, DirListing] = {}
+        reused = 0
+        # one worker per top-level subdirectory across all storage group dirs
+        roots: list[str] = []
+        for sg_dir in sg_dirs:
+            listing, was_reused = self.list_dir(sg_dir, manifest)
+            if listing is None:
+                continue
+            listings[sg_dir] = listing
+            reused += was_reused
+            roots += [os.path.join(sg_dir, name) for name in listing["dirs"]]
+
+        if roots:
+            workers = min(MAX_SCAN_THREADS, len(roots))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for subtree, subtree_reused in executor.map(
+                    lambda root: self.walk(root, manifest), roots
+                ):
+                    listings.update(subtree)
+                    reused += subtree_reused
+
+        filepaths: set[str] = set()
+        for sg_dir in sg_dirs:
+            for dirpath, listing in self.subtree(sg_dir, listings):
+                reldir = dirpath[len(sg_dir) + 1 :]
+                for name in listing["files"]:
+                    filepaths.add(os.path.join(reldir, name))
+
+        self.save(listings)
+        logger.info(
+            f"Scanned {len(listings)} video dirs ({reused} unchanged), {len(filepaths)} files "
+            f"in: {(time.time() - before):.2f} seconds"
+        )
+        return filepaths
+
+    def walk(
+        self, top: str, manifest: dict[str, DirListing]
+    ) -> tuple[dict[str, DirListing], int]:
+        listings: dict[str, DirListing] = {}
+        reused = 0
+        stack = [top]
+        while stack:
+            dirpath = stack.pop()
+            listing, was_reused = self.list_dir(dirpath, manifest)
+            if listing is None:
+                continue
+            listings[dirpath] = listing
+            reused += was_reused
+            stack += [os.path.join(dirpath, name) for name in listing["dirs"]]
+        return listings, reused
+
+    def list_dir(
+        self, dirpath: str, manifest: dict[str, DirListing]
+    ) -> tuple[Optional[DirListing], bool]:
+        try:
+            mtime = os.stat(dirpath).st_mtime_ns
+        except OSError as ex:
+            logger.error(f"Cannot stat video dir {dirpath}: {ex}")
+            return None, False
+        recorded = manifest.get(dirpath)
+        if recorded and recorded["mtime"] == mtime:
+            return recorded, True
+
+        dirs: list[str] = []
+        files: list[str] = []
+        try:
+            with os.scandir(dirpath) as entries:
+                for entry in entries:
+                    # like os.walk: symlinked dirs are neither files nor followed
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            dirs.append(entry.name)
+                        continue
+                    files.append(entry.name)
+        except OSError as ex:
+            logger.error(f"Cannot list video dir {dirpath}: {ex}")
+            return None, False
+        return {"mtime": mtime, "dirs": dirs, "files": files}, False
+
+    def subtree(self, top: str, listings: dict[str, DirListing]):
+        stack = [top]
+        while stack:
+            dirpath = stack.pop()
+            listing = listings.get(dirpath)
+            if listing is None:
+                continue
+            yield dirpath, listing
+            stack += [os.path.join(dirpath, name) for name in listing["dirs"]]
+
+    def load(self) -> dict[str, DirListing]:
+        if not os.path.isfile(self.manifest_file):
+            return {}
+        try:
+            with open(self.manifest_file, "r") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                return manifest["dirs"]
+        except (OSError, ValueError, KeyError) as ex:
+            logger.error(
+                f"Ignoring unreadable scan manifest {self.manifest_file}: {ex}"
+            )
+        return {}
+
+    def save(self, listings: dict[str, DirListing]):
+        # unique, so concurrent scans can't write into each other's temp file
+        temp_file = f"{self.manifest_file}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with open(temp_file, "w") as f:
+                json.dump({"version": MANIFEST_VERSION, "dirs": listings}, f)
+            os.replace(temp_file, self.manifest_file)
+        except BaseException:
+            if os.path.isfile(temp_file):
+                os.remove(temp_file)
+            raise
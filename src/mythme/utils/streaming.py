@@ -0,0 +1,69 @@
+import json
+from typing import Any, Iterable, Iterator, Optional
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+NDJSON = "application/x-ndjson"
+BATCH_SIZE = 100
+"""Items serialized per chunk (each chunk is a threadpool round trip)"""
+
+
+def stream_format(request: Request) -> Optional[str]:
+    """'ndjson' (Accept: application/x-ndjson), 'json' (stream=true) or None."""
+    if NDJSON in request.headers.get("accept", ""):
+        return "ndjson"
+    if request.query_params.get("stream") == "true":
+        return "json"
+    return None
+
+
+def stream_list(
+    format: str, name: str, items: Iterable[BaseModel], **fields: Any
+) -> StreamingResponse:
+    """Streams items as they're produced (pass a generator to convert lazily),
+    followed by the response's other fields.
+
+    The json format has the same shape as the regular response, with the list
+    first. The ndjson format has a line per item, then a line with the other
+    fields. None values are left out, as with response_model_exclude_none.
+    """
+    return StreamingResponse(
+        chunks(format, name, items, fields),
+        media_type=NDJSON if format == "ndjson" else "application/json",
+    )
+
+
+def chunks(
+    format: str, name: str, items: Iterable[BaseModel], fields: dict[str, Any]
+) -> Iterator[str]:
+    """Sync, so starlette runs it (and any lazy conversion) in the threadpool."""
+    ndjson = format == "ndjson"
+    buffer: list[str] = [] if ndjson else [f'{{"{name}":[']
+    count = 0
+    for item in items:
+        serialized = item.model_dump_json(exclude_none=True)
+        if ndjson:
+            buffer.append(f"{serialized}\n")
+        else:
+            buffer.append(f",{serialized}" if count else serialized)
+        count += 1
+        if len(buffer) >= BATCH_SIZE:
+            yield "".join(buffer)
+            buffer = []
+    trailer = json.dumps(
+        {
+            key: value.model_dump(mode="json", exclude_none=True)
+            if isinstance(value, BaseModel)
+            else value
+            for key, value in fields.items()
+            if value is not None
+        },
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    if ndjson:
+        buffer.append(f"{trailer}\n")
+    else:
+        buffer.append("]}" if trailer == "{}" else f"],{trailer[1:]}")
+    yield "".join(buffer)
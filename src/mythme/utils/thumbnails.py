@@ -0,0 +1,155 @@
+import os
+import math
+import asyncio
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+from fastapi.concurrency import run_in_threadpool
+from mythme.model.config import ThumbnailsConfig
+from mythme.utils.config import config
+from mythme.utils.ffmpeg import Ffmpeg, FfmpegError
+from mythme.utils.filecache import FileCache
+from mythme.utils.media import media_file_path
+from mythme.utils.text import gen_hash
+
+MAX_SPRITE_TILES = 100
+MIN_SPRITE_INTERVAL = 10
+"""Seconds between sprite tiles, for short files"""
+
+
+@dataclass
+class Sprite:
+    path: Path
+    interval: float
+    """Seconds between tiles"""
+    columns: int
+    count: int
+
+
+class Thumbnailer:
+    """Thumbnails and seek-bar sprite sheets (JPEG), generated on first request.
+
+    Images are stored in dir, named by gen_hash(file path) and file mtime, so a
+    modified file gets new ones (and the old ones are removed). Least recently
+    used images are removed once they total more than settings.cache_mb.
+    """
+
+    def __init__(self, dir: Path, ffmpeg: Ffmpeg, settings: ThumbnailsConfig):
+        self.dir = dir
+        self.cache = FileCache(dir, int(settings.cache_mb * 1024 * 1024), "*.jpg")
+        self.ffmpeg = ffmpeg
+        self.settings = settings
+        self.pending: dict[str, asyncio.Task[Path]] = {}
+        self.prewarm_files: list[str] = []
+        self.prewarm_task: Optional[asyncio.Task] = None
+
+    async def thumbnail(self, path: Path, at: Optional[float] = None) -> Path:
+        """Frame at `at` seconds, rounded and kept within the file (default: 10%
+        in, at most a minute).
+        """
+        info = await self.ffmpeg.probe(path)
+        if at is None:
+            seconds = int(min(60, info.duration / 10))
+            suffix = ""
+        else:
+            seconds = max(0, min(round(at), int(info.duration)))
+            suffix = f"-{seconds}"
+        name = f"{self.source_name(path)}{suffix}.jpg"
+
+        async def write(out: Path):
+            await self.ffmpeg.run(
+                ["-ss", str(seconds), "-i", str(path), "-frames:v", "1"]
+                + ["-vf", f"scale={self.settings.width}:-2", "-q:v", "4"]
+                + ["-f", "image2", "-y", str(out)]
+            )
+
+        return await self.generate(path, name, write)
+
+    async def sprite(self, path: Path) -> Sprite:
+        """Grid of evenly spaced keyframes, at most MAX_SPRITE_TILES."""
+        info = await self.ffmpeg.probe(path)
+        interval = max(MIN_SPRITE_INTERVAL, info.duration / MAX_SPRITE_TILES)
+        count = max(1, math.ceil(info.duration / interval))
+        columns = min(count, self.settings.sprite_columns)
+        rows = math.ceil(count / columns)
+        name = f"{self.source_name(path)}-sprite.jpg"
+
+        async def write(out: Path):
+            # decoding only keyframes makes this much cheaper than a full pass
+            filters = f"fps=1/{interval:.3f},scale={self.settings.sprite_width}:-2,tile={columns}x{rows}"
+            await self.ffmpeg.run(
+                ["-skip_frame", "nokey", "-i", str(path), "-vf", filters]
+                + ["-frames:v", "1", "-q:v", "5", "-f", "image2", "-y", str(out)]
+            )
+
+        sprite_path = await self.generate(path, name, write)
+        return Sprite(path=sprite_path, interval=interval, columns=columns, count=count)
+
+    async def generate(
+        self, path: Path, name: str, write: Callable[[Path], Awaitable[None]]
+    ) -> Path:
+        if not self.cache.loaded:
+            await run_in_threadpool(self.cache.load)
+        cached = self.cache.get(name)
+        if cached:
+            return cached
+        task = self.pending.get(name)
+        if task is None:
+            task = asyncio.create_task(self.store(path, name, write))
+            self.pending[name] = task
+            task.add_done_callback(lambda _t: self.pending.pop(name, None))
+        # shielded: another request may be waiting on the same image
+        return await asyncio.shield(task)
+
+    async def store(
+        self, path: Path, name: str, write: Callable[[Path], Awaitable[None]]
+    ) -> Path:
+        out = self.dir / name
+        os.makedirs(self.dir, exist_ok=True)
+        temp = out.with_suffix(".tmp")
+        try:
+            await write(temp)
+            os.replace(temp, out)
+        except BaseException:
+            temp.unlink(missing_ok=True)
+            raise
+        self.remove_stale(path)
+        self.cache.put(name, out.stat().st_size)
+        return out
+
+    def remove_stale(self, path: Path):
+        """Removes images generated before the file was last modified."""
+        mtime = str(path.stat().st_mtime_ns)
+        for file in self.dir.glob(f"{gen_hash(str(path))}-*.jpg"):
+            if file.stem.split("-")[1] != mtime:
+                self.cache.remove(file.name)
+
+    def source_name(self, path: Path) -> str:
+        return f"{gen_hash(str(path))}-{path.stat().st_mtime_ns}"
+
+    def prewarm(self, files: list[str]):
+        """Generates thumbnails in the background for Videos storage group files."""
+        self.prewarm_files += files
+        if self.prewarm_task is None or self.prewarm_task.done():
+            self.prewarm_task = asyncio.create_task(self.run_prewarm())
+
+    async def run_prewarm(self):
+        while self.prewarm_files:
+            file = self.prewarm_files.pop(0)
+            path = await run_in_threadpool(media_file_path, "Videos", file)
+            if path:
+                try:
+                    await self.thumbnail(path)
+                except FfmpegError:
+                    pass  # logged by ffmpeg
+
+    def stop(self):
+        if self.prewarm_task:
+            self.prewarm_task.cancel()
+
+
+thumbnailer = Thumbnailer(
+    Path(f"{config.mythme_dir}/thumbnails"),
+    Ffmpeg(config.thumbnails.workers, config.media.ffmpeg, config.media.ffprobe),
+    config.thumbnails,
+)
@@ -0,0 +1,47 @@
+import asyncio
+from starlette.requests import Request
+from mythme.utils.cache import ResponseCache, TtlCache
+
+
+def test_ttl_cache_invalidate_prefix():
+    cache: TtlCache[int] = TtlCache(max_entries=10, ttl=60, max_bytes=100)
+    cache.put("Video/1", 1, 1)
+    cache.put("Video/2", 2, 1)
+    cache.put("Dvr/1", 3, 1)
+    cache.invalidate("Video/")
+    assert cache.get("Video/1") is None
+    assert cache.get("Video/2") is None
+    assert cache.get("Dvr/1") == 3
+    assert cache.metrics().bytes == 1
+
+
+def test_ttl_cache_invalidate_all():
+    cache: TtlCache[int] = TtlCache(max_entries=10, ttl=60, max_bytes=100)
+    cache.put("a", 1, 1)
+    cache.invalidate()
+    assert cache.get("a") is None
+    assert cache.metrics().entries == 0
+
+
+def request() -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": []})
+
+
+def test_response_cache_skips_store_across_invalidate():
+    cache = ResponseCache()
+
+    async def produce():
+        cache.invalidate("guide:")  # data changed while it was being read
+        return ["stale"]
+
+    async def fresh():
+        return ["fresh"]
+
+    async def respond():
+        first = await cache.respond(request(), "guide:x", produce)
+        second = await cache.respond(request(), "guide:x", fresh)
+        return first.body, second.body
+
+    first, second = asyncio.run(respond())
+    assert first == b'["stale"]'
+    assert second == b'["fresh"]'
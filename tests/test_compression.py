@@ -0,0 +1,125 @@
+import os
+import gzip
+import zlib
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from mythme.utils.compression import CompressionMiddleware, PrecompressedFiles
+
+GZIP = [(b"accept-encoding", b"gzip, deflate, br")]
+
+
+def run(app, headers=GZIP) -> list[dict]:
+    """Messages sent by CompressionMiddleware(app), with a minimum_size of 10."""
+    sent: list[dict] = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers}
+    asyncio.run(CompressionMiddleware(app, minimum_size=10)(scope, receive, send))
+    return sent
+
+
+def response(content_type: bytes, *messages: dict):
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", content_type)],
+            }
+        )
+        for message in messages:
+            await send(message)
+
+    return app
+
+
+def header(message: dict, name: bytes):
+    return dict(message["headers"]).get(name)
+
+
+def test_compresses_json():
+    body = b'{"programs": []}' * 10
+    sent = run(
+        response(b"application/json", {"type": "http.response.body", "body": body})
+    )
+    assert header(sent[0], b"content-encoding") == b"gzip"
+    assert header(sent[0], b"content-length") == str(len(sent[1]["body"])).encode()
+    assert gzip.decompress(sent[1]["body"]) == body
+
+
+def test_streams_ndjson_chunks():
+    lines = [b'{"id": 1, "title": "Dracula"}\n', b'{"total": 1}\n']
+    sent = run(
+        response(
+            b"application/x-ndjson",
+            {"type": "http.response.body", "body": lines[0], "more_body": True},
+            {"type": "http.response.body", "body": lines[1], "more_body": False},
+        )
+    )
+    assert header(sent[0], b"content-length") is None
+    # each chunk is flushed, so the first line can be read before the rest is sent
+    assert zlib.decompressobj(31).decompress(sent[1]["body"]) == lines[0]
+    assert gzip.decompress(sent[1]["body"] + sent[2]["body"]) == b"".join(lines)
+
+
+def test_small_and_unaccepted_pass_through():
+    body = b"{}"
+    sent = run(
+        response(b"application/json", {"type": "http.response.body", "body": body})
+    )
+    assert header(sent[0], b"content-encoding") is None and sent[1]["body"] == body
+    body = b'{"programs": []}' * 10
+    sent = run(
+        response(b"application/json", {"type": "http.response.body", "body": body}), []
+    )
+    assert header(sent[0], b"content-encoding") is None and sent[1]["body"] == body
+
+
+def test_zerocopy_video_passes_through():
+    zerocopy = {"type": "http.response.zerocopy", "file": 3, "count": 1000}
+    sent = run(response(b"video/mp4", zerocopy))
+    assert [m["type"] for m in sent] == [
+        "http.response.start",
+        "http.response.zerocopy",
+    ]
+    assert header(sent[0], b"content-encoding") is None
+
+
+def test_other_messages_release_held_start():
+    pathsend = {"type": "http.response.pathsend", "path": "/tmp/index.js"}
+    sent = run(response(b"text/javascript", pathsend))
+    assert [m["type"] for m in sent] == [
+        "http.response.start",
+        "http.response.pathsend",
+    ]
+
+
+def test_precompresses_concurrently(tmp_path):
+    asset = tmp_path / "index.js"
+    asset.write_text("console.log('mythme');\n" * 100)
+    cache_dir = tmp_path / "cache"
+    files = PrecompressedFiles(directory=str(tmp_path), cache_dir=str(cache_dir))
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(
+            executor.map(lambda _: files.compressed_file(str(asset), "gzip"), range(8))
+        )
+    assert len({path for path, _stat in results}) == 1
+    assert gzip.decompress(open(results[0][0], "rb").read()) == asset.read_bytes()
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_precompressed_drops_older_versions(tmp_path):
+    asset = tmp_path / "index.js"
+    asset.write_text("console.log('mythme');\n" * 100)
+    cache_dir = tmp_path / "cache"
+    files = PrecompressedFiles(directory=str(tmp_path), cache_dir=str(cache_dir))
+    old, _stat = files.compressed_file(str(asset), "gzip")
+    os.utime(asset, ns=(0, os.stat(asset).st_mtime_ns + 1_000_000_000))
+    new, _stat = files.compressed_file(str(asset), "gzip")
+    assert new != old
+    assert os.listdir(cache_dir) == [os.path.basename(new)]
@@ -0,0 +1,117 @@
+from datetime import UTC, datetime, timedelta
+from typing import Optional
+from mythme.data.guide import GuideSnapshot
+from mythme.model.query import Criterion, Paging, Query, Sort
+
+NOW = datetime.now(UTC).replace(tzinfo=None, microsecond=0)
+CHANNELS = {
+    1: {"chanid": 1, "channum": "2", "callsign": "WGBH", "name": "GBH", "icon": None},
+    2: {"chanid": 2, "channum": "10", "callsign": "WJAR", "name": "NBC", "icon": None},
+}
+
+
+def program(
+    hours: int, chanid: int, title: str, category_type: Optional[str], stars=0.5
+) -> dict:
+    starttime = NOW + timedelta(hours=hours)
+    return {
+        "chanid": chanid,
+        "title": title,
+        "subtitle": "",
+        "starttime": starttime,
+        "endtime": starttime + timedelta(hours=1),
+        "description": f"{title} description",
+        "category": "Drama",
+        "category_type": category_type,
+        "airdate": 1931,
+        "year": "1931",
+        "stars": stars,
+        "season": 0,
+        "episode": 0,
+        "originalairdate": None,
+        "credits": 0,
+        "genres": ["drama"],
+    }
+
+
+def snapshot() -> GuideSnapshot:
+    rows = [
+        program(1, 1, "Dracula", "movie", 0.75),
+        program(1, 2, "Frankenstein", None, None),
+        program(2, 1, "Nova", "series"),
+        program(3, 2, "Dracula's Daughter", "movie", 0.25),
+        program(4, 1, "The Mummy", None),
+    ]
+    return GuideSnapshot(("test",), rows, CHANNELS)
+
+
+def titles(
+    criteria: list[Criterion] = [],
+    sort: Sort = Sort(name="start"),
+    limit: int = 10,
+    cursor: Optional[str] = None,
+) -> tuple[list[str], Optional[str]]:
+    query = Query(
+        criteria=criteria,
+        sort=sort,
+        paging=Paging(offset=0, limit=limit, cursor=cursor),
+    )
+    page = snapshot().get_page(query)
+    assert page is not None
+    return [row["title"] for row in page.rows], page.cursor
+
+
+def test_equals_skips_null():
+    found, _ = titles([Criterion(name="type", value="Movie")])
+    assert found == ["Dracula", "Dracula's Daughter"]
+
+
+def test_in_skips_null():
+    value = '["movie", "series"]'
+    found, _ = titles([Criterion(name="type", value=value, operator="IN")])
+    assert found == ["Dracula", "Nova", "Dracula's Daughter"]
+
+
+def test_like_skips_null():
+    found, _ = titles([Criterion(name="type", value="ser%", operator="LIKE")])
+    assert found == ["Nova"]
+
+
+def test_range_skips_null():
+    found, _ = titles([Criterion(name="rating", value="2", operator=">")])
+    assert found == ["Dracula", "Nova", "The Mummy"]
+
+
+def test_sort_nulls_first():
+    found, _ = titles(sort=Sort(name="type"))
+    assert found == [
+        "Frankenstein",
+        "The Mummy",
+        "Dracula",
+        "Dracula's Daughter",
+        "Nova",
+    ]
+
+
+def test_sort_desc_nulls_last():
+    found, _ = titles(sort=Sort(name="type", order="desc"))
+    assert found == [
+        "Nova",
+        "Dracula",
+        "Dracula's Daughter",
+        "Frankenstein",
+        "The Mummy",
+    ]
+
+
+def test_cursor_paging():
+    sort = Sort(name="type")
+    expected, _ = titles(sort=sort)
+    found: list[str] = []
+    cursor = None
+    while True:
+        page, cursor = titles(sort=sort, limit=2, cursor=cursor)
+        found += page
+        if cursor is None:
+            break
+    assert found == expected
@@ -0,0 +1,83 @@
+import asyncio
+from pathlib import Path
+from mythme.utils.media import VideoFileResponse, single_range
+
+CONTENT = bytes(range(100))
+
+
+def run(path: Path, headers: list, extensions: dict) -> list[dict]:
+    """Messages sent by a VideoFileResponse for path."""
+    sent: list[dict] = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.zerocopy":
+            file = message["file"]
+            file.seek(message["offset"])
+            message = {**message, "body": file.read(message["count"])}
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": headers,
+        "extensions": extensions,
+    }
+    response = VideoFileResponse(path, "video/mp2t", 64 * 1024)
+    asyncio.run(response(scope, receive, send))
+    return sent
+
+
+def video(tmp_path: Path) -> Path:
+    path = tmp_path / "video.ts"
+    path.write_bytes(CONTENT)
+    return path
+
+
+ZEROCOPY = {"http.response.zerocopy": {}}
+
+
+def test_single_range():
+    assert single_range("bytes=0-9", 100) == (0, 10)
+    assert single_range("bytes=90-", 100) == (90, 100)
+    assert single_range("bytes=-10", 100) == (90, 100)
+    assert single_range("bytes=50-500", 100) == (50, 100)
+    assert single_range("bytes=0-1, 5-6", 100) is None
+    assert single_range("bytes=100-", 100) is None
+    assert single_range("items=0-9", 100) is None
+
+
+def test_zerocopy_full(tmp_path):
+    sent = run(video(tmp_path), [], ZEROCOPY)
+    assert sent[0]["status"] == 200
+    assert sent[1]["type"] == "http.response.zerocopy"
+    assert sent[1]["body"] == CONTENT
+
+
+def test_zerocopy_range(tmp_path):
+    sent = run(video(tmp_path), [(b"range", b"bytes=10-19")], ZEROCOPY)
+    headers = dict(sent[0]["headers"])
+    assert sent[0]["status"] == 206
+    assert headers[b"content-range"] == b"bytes 10-19/100"
+    assert headers[b"content-length"] == b"10"
+    assert sent[1]["body"] == CONTENT[10:20]
+
+
+def test_multiple_ranges_left_to_file_response(tmp_path):
+    sent = run(video(tmp_path), [(b"range", b"bytes=0-1, 5-6")], ZEROCOPY)
+    assert sent[0]["status"] == 206
+    assert all(message["type"] != "http.response.zerocopy" for message in sent)
+
+
+def test_unsatisfiable_range(tmp_path):
+    sent = run(video(tmp_path), [(b"range", b"bytes=200-")], ZEROCOPY)
+    assert sent[0]["status"] == 416
+
+
+def test_without_zerocopy(tmp_path):
+    sent = run(video(tmp_path), [(b"range", b"bytes=10-19")], {})
+    assert sent[0]["status"] == 206
+    assert b"".join(message["body"] for message in sent[1:]) == CONTENT[10:20]